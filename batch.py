@@ -0,0 +1,435 @@
+"""
+Mode batch sans interface graphique : exécute les détecteurs de visage et de
+mains ainsi que les règles d'expressions et de gestes sur des fichiers vidéo
+et des dossiers d'images, et écrit un résultat par image au format JSONL ou CSV.
+
+Les entrées sont découpées en tâches (segments de vidéo, paquets d'images)
+réparties sur plusieurs processus, chacun possédant ses propres instances
+FaceMesh/Hands, pour que le débit augmente avec le nombre de cœurs.
+
+Utilisation :
+    python batch.py videos/ "sessions/*.mp4" -o resultats.jsonl --workers 4
+"""
+import argparse  # Pour les options de la ligne de commande
+import csv  # Pour l'écriture au format CSV
+import glob  # Pour développer les motifs de fichiers
+import json  # Pour l'écriture au format JSONL
+import multiprocessing  # Pour répartir les tâches sur plusieurs processus
+import os  # Pour parcourir les dossiers
+import sys  # Pour la sortie standard
+
+import cv2  # Bibliothèque OpenCV pour la lecture des vidéos et des images
+import numpy as np  # Pour les opérations mathématiques sur les tableaux
+
+from classification import (classify_faces, classify_hands, faces_to_array,
+                            hands_to_array, handedness_labels)
+from detectors import DETECTION_MODES, DetectorSet
+from instrumentation import StageProfiler, StatsExporter
+from preprocess import FramePreprocessor
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v', '.mpg', '.mpeg', '.wmv')
+CSV_FIELDS = ('source', 'frame', 'timestamp_ms', 'faces', 'hands', 'expression', 'gesture')
+
+
+def expand_inputs(inputs):
+    """
+    Développe les fichiers, dossiers et motifs glob en une liste de fichiers
+
+    Args:
+        inputs: Chemins de fichiers, de dossiers ou motifs glob
+
+    Returns:
+        List: Chemins triés des fichiers vidéo et image trouvés
+    """
+    supported = IMAGE_EXTENSIONS + VIDEO_EXTENSIONS
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            # Parcourir le dossier récursivement
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, name) for name in files
+                             if name.lower().endswith(supported))
+        elif os.path.isfile(item):
+            paths.append(item)
+        else:
+            paths.extend(path for path in glob.glob(item, recursive=True)
+                         if os.path.isfile(path) and path.lower().endswith(supported))
+    # Supprimer les doublons en conservant un ordre déterministe
+    return sorted(set(paths))
+
+
+def make_tasks(paths, segment_frames=300, images_per_task=32):
+    """
+    Découpe les entrées en tâches indépendantes
+
+    Args:
+        paths: Fichiers renvoyés par expand_inputs
+        segment_frames: Nombre d'images par segment de vidéo
+        images_per_task: Nombre d'images par paquet d'images
+
+    Returns:
+        List: Tâches ('video', chemin, première image, fin exclue) ou ('images', [chemins])
+    """
+    tasks = []
+    images = []
+    for path in paths:
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            images.append(path)
+            continue
+        cap = cv2.VideoCapture(path)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if frame_count <= 0:
+            # Nombre d'images inconnu : la vidéo est traitée d'un seul tenant
+            tasks.append(('video', path, 0, None))
+            continue
+        for start in range(0, frame_count, segment_frames):
+            tasks.append(('video', path, start, min(start + segment_frames, frame_count)))
+    for start in range(0, len(images), images_per_task):
+        tasks.append(('images', images[start:start + images_per_task]))
+    return tasks
+
+
+class FrameAnalyzer:
+    """
+    Exécute les détecteurs sur des images et accumule les points clés afin
+    d'évaluer les règles sur tout un segment en une seule passe vectorisée.
+    """
+    def __init__(self, mode='both', mirror=True, static_image_mode=False):
+        """
+        Args:
+            mode: 'face', 'hand', ou 'both'
+            mirror: True pour appliquer l'effet miroir de l'application avant la détection
+            static_image_mode: True pour des images indépendantes
+        """
+        self.mode = mode
+        self.mirror = mirror
+        self.static_image_mode = static_image_mode
+        self.detectors = DetectorSet(mode, static_image_mode=static_image_mode)
+        self.preprocessor = FramePreprocessor(mirror)  # Image des détecteurs sans allocation par image
+        self._used = False  # Les détecteurs ont-ils déjà traité des images ?
+        self.profiler = StageProfiler()  # Latence par étape
+        self.last_timings = []  # Durées par étape de chaque image du dernier appel à analyze()
+
+    def analyze(self, frames):
+        """
+        Args:
+            frames: Itérable de tuples (source, numéro d'image, horodatage en ms ou None, image BGR)
+
+        Returns:
+            List: Un dictionnaire de résultats par image (les durées par étape sont dans last_timings)
+        """
+        self._used = True
+        profiler = self.profiler
+        records = []
+        timings = []
+        faces, face_shapes, face_owner = [], [], []
+        hands, hand_types, hand_owner = [], [], []
+
+        frames = iter(frames)
+        while True:
+            profiler.start_frame()
+            item = next(frames, None)
+            profiler.mark('decode')
+            if item is None:
+                break
+            source, frame_id, timestamp_ms, img = item
+            # Image RGB (miroir si demandé) écrite dans un tampon réutilisé, en un seul passage
+            _, img_rgb = self.preprocessor.process(img, display=False, profiler=profiler)
+            face_results, hand_results = self.detectors.process(img_rgb, profiler)
+
+            record = {'source': source, 'frame': frame_id, 'timestamp_ms': timestamp_ms,
+                      'faces': [], 'hands': []}
+            index = len(records)
+            records.append(record)
+
+            if face_results is not None and face_results.multi_face_landmarks:
+                # Seuls les points lus par les règles sont extraits
+                array = faces_to_array(face_results.multi_face_landmarks, gather=True)
+                faces.append(array)
+                face_shapes.extend([img.shape[:2]] * len(array))
+                face_owner.extend([index] * len(array))
+
+            if hand_results is not None and hand_results.multi_hand_landmarks:
+                array = hands_to_array(hand_results.multi_hand_landmarks)
+                hands.append(array)
+                # Latéralité inconnue (None) pour les mains sans classification, comme Detections.from_results
+                labels = handedness_labels(hand_results.multi_handedness)[:len(array)]
+                hand_types.extend(labels + [None] * (len(array) - len(labels)))
+                hand_owner.extend([index] * len(array))
+            profiler.mark('extract')
+            timings.append(profiler.end_frame())
+
+        # Évaluer les règles sur tous les visages et toutes les mains du segment
+        start = profiler.clock()
+        if faces:
+            expressions = classify_faces(np.concatenate(faces), np.array(face_shapes))
+            for owner, expression in zip(face_owner, expressions):
+                records[owner]['faces'].append(expression)
+        if hands:
+            # Comme dans l'application, seules les mains de latéralité connue sont classées
+            known = [i for i, hand_type in enumerate(hand_types) if hand_type is not None]
+            gestures = [None] * len(hand_types)
+            if known:
+                labels = classify_hands(np.concatenate(hands)[known], [hand_types[i] for i in known])
+                for i, gesture in zip(known, labels):
+                    gestures[i] = gesture
+            for owner, hand_type, gesture in zip(hand_owner, hand_types, gestures):
+                records[owner]['hands'].append({'handedness': hand_type, 'gesture': gesture})
+        # La classification étant faite par lot, sa durée est répartie entre les images
+        if timings:
+            classify_time = (profiler.clock() - start) / len(timings)
+            for frame_timings in timings:
+                frame_timings['classify'] = classify_time
+                frame_timings['total'] += classify_time
+        self.last_timings = timings
+
+        for record in records:
+            # Comme dans l'application : la dernière détection non vide est affichée
+            record['expression'] = next((e for e in reversed(record['faces']) if e), None)
+            record['gesture'] = next((h['gesture'] for h in reversed(record['hands']) if h['gesture']), None)
+        return records
+
+    def reset(self):
+        """
+        Recrée les détecteurs pour oublier l'état de suivi des images précédentes
+        """
+        if self._used:
+            self.detectors.close()
+            self.detectors = DetectorSet(self.mode, static_image_mode=self.static_image_mode)
+            self._used = False
+
+    def close(self):
+        self.detectors.close()
+
+
+def iter_video_frames(path, start=0, end=None):
+    """
+    Lit les images d'un segment de vidéo
+
+    Yields:
+        Tuple: (chemin, numéro d'image, horodatage en ms, image BGR)
+    """
+    cap = cv2.VideoCapture(path)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    frame_id = start
+    try:
+        while end is None or frame_id < end:
+            success, img = cap.read()
+            if not success:
+                break
+            yield path, frame_id, cap.get(cv2.CAP_PROP_POS_MSEC), img
+            frame_id += 1
+    finally:
+        cap.release()
+
+
+def iter_image_frames(paths):
+    """
+    Lit des fichiers image (les fichiers illisibles sont ignorés)
+
+    Yields:
+        Tuple: (chemin, 0, None, image BGR)
+    """
+    for path in paths:
+        img = cv2.imread(path)
+        if img is not None:
+            yield path, 0, None, img
+
+
+# Analyseurs propres à chaque processus de travail (un pour les vidéos, un pour les images)
+_worker_options = {}
+_worker_analyzers = {}
+
+
+def _init_worker(mode, mirror):
+    """
+    Initialise un processus de travail
+    """
+    # Un seul thread OpenCV par processus pour éviter la surcharge des cœurs
+    cv2.setNumThreads(1)
+    _worker_options.update(mode=mode, mirror=mirror)
+
+
+def _get_analyzer(static_image_mode):
+    analyzer = _worker_analyzers.get(static_image_mode)
+    if analyzer is None:
+        analyzer = FrameAnalyzer(_worker_options['mode'], _worker_options['mirror'], static_image_mode)
+        _worker_analyzers[static_image_mode] = analyzer
+    return analyzer
+
+
+def run_task(task):
+    """
+    Exécute une tâche créée par make_tasks dans le processus courant
+
+    Returns:
+        Tuple: (résultats par image, durées par étape de chaque image)
+    """
+    if task[0] == 'video':
+        _, path, start, end = task
+        analyzer = _get_analyzer(static_image_mode=False)
+        # Chaque segment repart d'un suivi MediaPipe vierge : les résultats ne
+        # dépendent ainsi ni du découpage ni du nombre de processus
+        analyzer.reset()
+        records = analyzer.analyze(iter_video_frames(path, start, end))
+    else:
+        analyzer = _get_analyzer(static_image_mode=True)
+        records = analyzer.analyze(iter_image_frames(task[1]))
+    return records, analyzer.last_timings
+
+
+def iter_results(inputs, mode='both', workers=1, mirror=True, segment_frames=300, profiler=None):
+    """
+    Générateur de résultats par image, dans l'ordre des entrées
+
+    Args:
+        inputs: Fichiers, dossiers ou motifs glob
+        mode: 'face', 'hand', ou 'both'
+        workers: Nombre de processus de travail (1 = dans le processus courant)
+        mirror: True pour appliquer l'effet miroir de l'application avant la détection
+        segment_frames: Nombre d'images par tâche pour les vidéos
+        profiler: StageProfiler recevant les durées par étape mesurées dans les processus de travail
+
+    Yields:
+        Dict: Résultat d'une image (source, frame, timestamp_ms, faces, hands, expression, gesture)
+    """
+    if mode not in DETECTION_MODES:
+        raise ValueError(f"Mode de détection inconnu: {mode!r}")
+    tasks = make_tasks(expand_inputs(inputs), segment_frames)
+    recorder = _TimingRecorder(profiler)
+
+    if workers <= 1:
+        _init_worker(mode, mirror)
+        try:
+            for task in tasks:
+                records, timings = run_task(task)
+                recorder.record(timings)
+                yield from records
+        finally:
+            for analyzer in _worker_analyzers.values():
+                analyzer.close()
+            _worker_analyzers.clear()
+        return
+
+    # 'spawn' : chaque processus démarre sans état MediaPipe hérité (comportement identique sous Windows)
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers, initializer=_init_worker, initargs=(mode, mirror)) as pool:
+        # imap conserve l'ordre des tâches tout en les exécutant en parallèle
+        for records, timings in pool.imap(run_task, tasks):
+            recorder.record(timings)
+            yield from records
+
+
+class _TimingRecorder:
+    """
+    Transmet au profiler les durées reçues des tâches. Les résultats d'une tâche
+    arrivant d'un bloc, les instants de fin d'image sont répartis uniformément
+    depuis la réception précédente pour que le calcul des FPS reste juste.
+    """
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self._last = profiler.clock() if profiler is not None else None
+
+    def record(self, timings):
+        if self.profiler is None or not timings:
+            return
+        now = self.profiler.clock()
+        step = (now - self._last) / len(timings)
+        for i, frame_timings in enumerate(timings, 1):
+            self.profiler.record(frame_timings, self._last + step * i)
+        self._last = now
+
+
+def write_jsonl(results, stream):
+    """
+    Écrit un objet JSON par ligne
+
+    Returns:
+        Int: Nombre de lignes écrites
+    """
+    count = 0
+    for record in results:
+        stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def write_csv(results, stream):
+    """
+    Écrit une ligne CSV par image (nombre de visages et de mains, dernière expression et dernier geste)
+
+    Returns:
+        Int: Nombre de lignes écrites
+    """
+    writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    count = 0
+    for record in results:
+        writer.writerow(dict(record, faces=len(record['faces']), hands=len(record['hands'])))
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Détection sans interface sur des vidéos et des images")
+    parser.add_argument('inputs', nargs='+', help="Fichiers, dossiers ou motifs glob")
+    parser.add_argument('-o', '--output', default='-', help="Fichier de sortie (défaut: sortie standard)")
+    parser.add_argument('--format', choices=('jsonl', 'csv'),
+                        help="Format de sortie (déduit de l'extension du fichier par défaut)")
+    parser.add_argument('--mode', choices=DETECTION_MODES, default='both', help="Mode de détection")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Nombre de processus de travail (défaut: nombre de cœurs)")
+    parser.add_argument('--segment-frames', type=int, default=300,
+                        help="Nombre d'images par tâche pour les vidéos (défaut: 300)")
+    parser.add_argument('--no-mirror', action='store_true',
+                        help="Ne pas appliquer l'effet miroir avant la détection")
+    parser.add_argument('--stats', action='store_true',
+                        help="Afficher la latence par étape (p50/p95/p99) à la fin du traitement")
+    parser.add_argument('--stats-export', metavar='FICHIER',
+                        help="Exporter périodiquement les statistiques (.csv ou .prom pour Prometheus)")
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                        help="Intervalle entre deux exports en secondes (défaut: 10)")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ('csv' if args.output.lower().endswith('.csv') else 'jsonl')
+    # Les statistiques portent sur toutes les images traitées (fenêtre glissante illimitée en pratique)
+    profiler = StageProfiler(window=100000) if args.stats or args.stats_export else None
+    results = iter_results(args.inputs, args.mode, args.workers, mirror=not args.no_mirror,
+                           segment_frames=args.segment_frames, profiler=profiler)
+    if args.stats_export:
+        results = _export_periodically(results, StatsExporter(profiler, args.stats_export, args.stats_interval))
+    writer = write_csv if output_format == 'csv' else write_jsonl
+
+    if args.output == '-':
+        count = writer(results, sys.stdout)
+    else:
+        with open(args.output, 'w', newline='' if output_format == 'csv' else None, encoding='utf-8') as stream:
+            count = writer(results, stream)
+    print(f"{count} images traitées", file=sys.stderr)
+    if args.stats:
+        print_stats(profiler.summary(), sys.stderr)
+
+
+def _export_periodically(results, exporter):
+    for record in results:
+        exporter.maybe_export()
+        yield record
+    exporter.export()
+
+
+def print_stats(summary, stream):
+    """
+    Affiche un tableau des latences par étape
+    """
+    print(f"{summary['frames']} images, {summary['fps']:.1f} img/s", file=stream)
+    print(f"{'étape':<12} {'moy.':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)", file=stream)
+    for stage, stats in summary['stages'].items():
+        print(f"{stage:<12} {stats['mean_ms']:8.2f} {stats['p50_ms']:8.2f} "
+              f"{stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f}", file=stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Mesure la diffusion des détections (events.py) avec des abonnés dans le même
+processus : des événements 'frame' synthétiques (un visage et deux mains) sont
+publiés à la cadence de la caméra vers --subscribers abonnés rapides et un
+abonné lent qui demande les points. Le tableau donne le coût de publish() pour
+la boucle de détection, puis les événements remis, fusionnés et jetés et la
+latence de remise de chaque abonné.
+
+Utilisation :
+    python benchmarks/bench_events.py --subscribers 4 --fps 30 --duration 20
+"""
+import argparse  # Pour les options de la ligne de commande
+import asyncio  # Pour les abonnés
+import os  # Pour localiser les modules de l'application
+import sys  # Pour modifier le chemin d'import
+import threading  # Pour les abonnés à côté de la boucle de publication
+import time  # Pour la cadence de publication
+
+import numpy as np  # Pour les points synthétiques
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from events import EventHub, frame_event, print_summary, subscribe  # noqa: E402
+
+
+async def _subscriber(address, delay, landmarks, stop):
+    async for _ in subscribe(address, landmarks):
+        if stop.is_set():
+            return
+        if delay:
+            await asyncio.sleep(delay)  # Abonné lent : lit moins vite que la cadence de publication
+
+
+async def _subscribers(address, count, slow_delay, stop):
+    clients = [_subscriber(address, 0.0, False, stop) for _ in range(count)]
+    clients.append(_subscriber(address, slow_delay, True, stop))
+    await asyncio.gather(*clients)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--address', default='127.0.0.1:0', help="Adresse du serveur (défaut: port libre)")
+    parser.add_argument('--subscribers', type=int, default=4, help="Abonnés rapides (défaut: 4)")
+    parser.add_argument('--slow-delay', type=float, default=0.2,
+                        help="Pause de l'abonné lent après chaque événement en secondes (défaut: 0.2)")
+    parser.add_argument('--fps', type=float, default=30.0, help="Cadence de publication (défaut: 30)")
+    parser.add_argument('--duration', type=float, default=20.0, help="Durée en secondes (défaut: 20)")
+    parser.add_argument('--queue-size', type=int, default=16, help="Événements en attente par abonné (défaut: 16)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    faces = rng.random((1, 468, 3), dtype=np.float32)
+    hands = rng.random((2, 21, 3), dtype=np.float32)
+    stop = threading.Event()
+    with EventHub(args.address, queue_size=args.queue_size) as hub:
+        clients = threading.Thread(target=asyncio.run, daemon=True,
+                                   args=(_subscribers(hub.address, args.subscribers, args.slow_delay, stop),))
+        clients.start()
+        while len(hub.summary()['subscribers']) < args.subscribers + 1:
+            time.sleep(0.01)
+
+        costs = []
+        interval = 1.0 / args.fps
+        next_time = start = time.perf_counter()
+        frame_id = 0
+        while next_time - start < args.duration:
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            next_time += interval
+            begin = time.perf_counter()
+            hub.publish(frame_event(frame_id, ["SOURIRE :)"], ["OK 👌", None], ["Right", "Left"], faces, hands))
+            costs.append(time.perf_counter() - begin)
+            frame_id += 1
+        time.sleep(0.5)  # Laisser les abonnés rapides recevoir les derniers événements
+        stop.set()
+        costs = 1e6 * np.asarray(costs)
+        print(f"publish(): médiane {np.median(costs):.0f} µs, p99 {np.percentile(costs, 99):.0f} µs "
+              f"({len(costs)} événements)")
+        print_summary(hub.summary(), sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compare la transmission d'images entre processus : multiprocessing.Queue
+(image sérialisée par pickle, comme le transport 'pickle' du serveur) et
+FrameRing (image en mémoire partagée, seul l'emplacement est transmis), en
+720p et en 1080p. Le producteur reste dans ce processus, le consommateur est un
+processus 'spawn' qui lit un pixel de chaque image et mesure la latence
+(envoi -> réception).
+
+Pour le FrameRing, le producteur recopie l'image dans l'emplacement : dans le
+serveur, cette copie n'existe pas (cap.read() décode directement dans
+l'emplacement), les chiffres sont donc pessimistes pour l'anneau.
+
+Utilisation :
+    python benchmarks/bench_framering.py --frames 300 --slots 4
+"""
+import argparse  # Pour les options de la ligne de commande
+import multiprocessing  # Pour le processus consommateur
+import os  # Pour localiser les modules de l'application
+import sys  # Pour modifier le chemin d'import
+import time  # Pour les débits et les latences
+
+import numpy as np  # Pour les images synthétiques et les statistiques
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from framering import FrameRing  # noqa: E402
+
+RESOLUTIONS = {'720p': (720, 1280, 3), '1080p': (1080, 1920, 3)}
+
+
+def _consume(messages, results, ring_name):
+    """
+    Processus consommateur : reçoit les images, les lit et renvoie les latences
+    """
+    ring = FrameRing.attach(ring_name) if ring_name else None
+    latencies = []
+    checksum = 0
+    results.put('ready')
+    while True:
+        message = messages.get()
+        if message is None:
+            break
+        sent = message[0]
+        if ring is None:
+            frame = message[1]
+        else:
+            _, slot, sequence = message
+            frame = ring.frame(slot)
+        checksum += int(frame[-1, -1, -1])  # Lecture effective de l'image
+        latencies.append(time.perf_counter() - sent)
+        if ring is not None:
+            del frame
+            if not ring.is_current(slot, sequence):
+                raise RuntimeError("Image remplacée pendant sa lecture")
+            ring.release(slot)
+    if ring is not None:
+        ring.close()
+    results.put((latencies, checksum))
+
+
+def run(transport, shape, frames, slots):
+    """
+    Returns:
+        Dict: Débit (img/s et Mo/s) et latences (p50 et p95, en ms)
+    """
+    context = multiprocessing.get_context('spawn')
+    # Bornée à slots images pour que les deux transports aient la même profondeur de file
+    messages, results = context.Queue(maxsize=slots), context.Queue()
+    rng = np.random.default_rng(0)
+    sources = [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(4)]
+    ring = FrameRing(slots, shape) if transport == 'shared' else None
+    consumer = context.Process(target=_consume, args=(messages, results, ring and ring.name))
+    consumer.start()
+    try:
+        results.get()
+        start = time.perf_counter()
+        for index in range(frames):
+            source = sources[index % len(sources)]
+            if ring is None:
+                messages.put((time.perf_counter(), source))
+                continue
+            slot = ring.acquire()
+            while slot is None:  # Anneau plein : attendre qu'une image soit libérée
+                time.sleep(0)
+                slot = ring.acquire()
+            ring.frame(slot)[...] = source
+            messages.put((time.perf_counter(), slot, ring.publish(slot)))
+        messages.put(None)
+        latencies, _ = results.get()
+        elapsed = time.perf_counter() - start
+        consumer.join()
+    finally:
+        if consumer.is_alive():
+            consumer.terminate()
+        if ring is not None:
+            ring.close()
+    latencies = 1000 * np.asarray(latencies)
+    return {
+        'fps': frames / elapsed,
+        'mb_s': frames * int(np.prod(shape)) / elapsed / 1e6,
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p95_ms': float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300, help="Images transmises par mesure (défaut: 300)")
+    parser.add_argument('--slots', type=int, default=4,
+                        help="Emplacements de l'anneau et profondeur de la file (défaut: 4)")
+    parser.add_argument('--resolutions', nargs='+', choices=RESOLUTIONS, default=list(RESOLUTIONS),
+                        help="Résolutions mesurées (défaut: toutes)")
+    args = parser.parse_args()
+
+    print(f"{'résolution':<10} {'transport':<9} {'img/s':>8} {'Mo/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for resolution in args.resolutions:
+        for transport in ('pickle', 'shared'):
+            stats = run(transport, RESOLUTIONS[resolution], args.frames, args.slots)
+            print(f"{resolution:<10} {transport:<9} {stats['fps']:8.1f} {stats['mb_s']:8.0f} "
+                  f"{stats['latency_p50_ms']:9.2f} {stats['latency_p95_ms']:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare le débit de l'inférence séquentielle et parallèle en mode 'both'
+(maillage facial + mains) sur un clip enregistré.
+
+Utilisation :
+    python benchmarks/bench_parallel_inference.py clip.mp4 --frames 300
+"""
+import argparse  # Pour les options de la ligne de commande
+import os  # Pour localiser les modules de l'application
+import sys  # Pour modifier le chemin d'import
+import time  # Pour mesurer le temps d'exécution
+
+import cv2  # Bibliothèque OpenCV pour la lecture du clip
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detectors import DetectorSet  # noqa: E402
+
+
+def load_frames(path, max_frames):
+    """
+    Charge et prépare (miroir + RGB) les images du clip en mémoire pour
+    exclure le décodage vidéo de la mesure
+
+    Returns:
+        List: Images RGB
+    """
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        success, img = cap.read()
+        if not success:
+            break
+        frames.append(cv2.cvtColor(cv2.flip(img, 1), cv2.COLOR_BGR2RGB))
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Impossible de lire des images depuis {path}")
+    return frames
+
+
+def run(frames, parallel, warmup=10):
+    """
+    Exécute les deux détecteurs sur toutes les images
+
+    Returns:
+        Tuple: (images par seconde, latence moyenne par image en millisecondes)
+    """
+    detectors = DetectorSet('both', parallel=parallel)
+    try:
+        # Préchauffage : initialisation des graphes et du thread de travail
+        for img_rgb in frames[:warmup]:
+            detectors.process(img_rgb)
+        start = time.perf_counter()
+        for img_rgb in frames:
+            detectors.process(img_rgb)
+        elapsed = time.perf_counter() - start
+    finally:
+        detectors.close()
+    return len(frames) / elapsed, 1000 * elapsed / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('clip', help="Chemin du clip vidéo enregistré")
+    parser.add_argument('--frames', type=int, default=300, help="Nombre maximal d'images (défaut: 300)")
+    args = parser.parse_args()
+
+    frames = load_frames(args.clip, args.frames)
+    print(f"{len(frames)} images de {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    seq_fps, seq_ms = run(frames, parallel=False)
+    par_fps, par_ms = run(frames, parallel=True)
+    print(f"Séquentiel : {seq_fps:6.1f} img/s  ({seq_ms:6.2f} ms/image)")
+    print(f"Parallèle  : {par_fps:6.1f} img/s  ({par_ms:6.2f} ms/image)")
+    print(f"Accélération : x{par_fps / seq_fps:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Compare le coût par image du rendu d'origine (np.zeros_like, mp_drawing.draw_landmarks,
+cv2.addWeighted sur toute l'image, cv2.putText) et de l'OverlayRenderer, sur des
+points de repère synthétiques (un visage et deux mains) en 1280x720.
+
+Utilisation :
+    python benchmarks/bench_renderer.py --frames 300
+"""
+import argparse  # Pour les options de la ligne de commande
+import os  # Pour localiser les modules de l'application
+import sys  # Pour modifier le chemin d'import
+import time  # Pour mesurer le temps d'exécution
+
+import cv2  # Bibliothèque OpenCV pour le tracé
+import mediapipe as mp  # Pour le chemin de rendu d'origine
+import numpy as np  # Pour générer les images et les points
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detectors import array_to_landmark_list  # noqa: E402
+from renderer import LandmarkStyle, OverlayRenderer  # noqa: E402
+
+MODE_TITLE = "Mode: Détection Combinée (Visage et Mains)"
+QUIT_TEXT = "Appuyez sur 'Q' pour quitter"
+FACE_TEXT = "SOURIRE :)"
+HAND_TEXT = "LIKE"
+
+
+def synthetic_face():
+    """
+    Disposition plane du maillage facial : plongement spectral du graphe de
+    FACEMESH_TESSELATION (les points voisins dans le maillage restent proches,
+    comme sur un vrai visage)
+
+    Returns:
+        np.ndarray: Tableau (468, 2) de coordonnées dans [0, 1]
+    """
+    edges = np.array(list(mp.solutions.face_mesh.FACEMESH_TESSELATION))
+    adjacency = np.zeros((468, 468))
+    adjacency[edges[:, 0], edges[:, 1]] = adjacency[edges[:, 1], edges[:, 0]] = 1
+    _, vectors = np.linalg.eigh(np.diag(adjacency.sum(axis=1)) - adjacency)
+    layout = vectors[:, 1:3]
+    return (layout - layout.min(axis=0)) / (layout.max(axis=0) - layout.min(axis=0))
+
+
+def make_landmarks(frames, seed=0):
+    """
+    Génère un visage et deux mains qui se déplacent légèrement d'une image à l'autre
+
+    Returns:
+        List: Tuples (visages (1, 468, 3), mains (2, 21, 3)) normalisés
+    """
+    rng = np.random.default_rng(seed)
+    face = np.column_stack([0.4 + 0.2 * synthetic_face() * (1, 1.4), rng.normal(0, 0.02, 468)])
+    hand = np.stack([rng.uniform(-0.06, 0.06, 21), rng.uniform(-0.1, 0.1, 21), rng.normal(0, 0.02, 21)], axis=1)
+    hands = np.stack([hand + (0.2, 0.6, 0), hand + (0.8, 0.6, 0)])
+    samples = []
+    for i in range(frames):
+        shift = 0.02 * np.array([np.sin(i / 15), np.cos(i / 20), 0])
+        samples.append(((face + shift)[None].astype(np.float32), (hands + shift).astype(np.float32)))
+    return samples
+
+
+def render_legacy(img, faces, hands, drawing, face_spec):
+    """
+    Rendu d'origine de DetectionApp (faces et hands : listes de NormalizedLandmarkList)
+    """
+    black_img = np.zeros_like(img)
+    for face in faces:
+        drawing.draw_landmarks(image=black_img, landmark_list=face,
+                               connections=mp.solutions.face_mesh.FACEMESH_TESSELATION,
+                               landmark_drawing_spec=face_spec, connection_drawing_spec=face_spec)
+    for hand in hands:
+        drawing.draw_landmarks(black_img, hand, mp.solutions.hands.HAND_CONNECTIONS)
+    combined_img = cv2.addWeighted(img, 0.7, black_img, 0.3, 0)
+    cv2.putText(combined_img, MODE_TITLE, (20, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    cv2.putText(combined_img, FACE_TEXT, (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 0), 4)
+    cv2.putText(combined_img, HAND_TEXT, (50, 180), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 255), 4)
+    cv2.putText(combined_img, QUIT_TEXT, (20, img.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    return combined_img
+
+
+def render_new(renderer, img, faces, hands, face_style, hand_style):
+    """
+    Même rendu avec l'OverlayRenderer (faces et hands : tableaux NumPy)
+    """
+    renderer.begin(img)
+    for face in faces:
+        renderer.draw_landmarks(face, face_style)
+    for hand in hands:
+        renderer.draw_landmarks(hand, hand_style)
+    combined_img = renderer.blend(img)
+    renderer.put_text(combined_img, MODE_TITLE, (20, 30), 0.8, (255, 255, 255), 2)
+    renderer.put_text(combined_img, FACE_TEXT, (50, 100), 2, (0, 255, 0), 4)
+    renderer.put_text(combined_img, HAND_TEXT, (50, 180), 2, (0, 255, 255), 4)
+    renderer.put_text(combined_img, QUIT_TEXT, (20, img.shape[0] - 20), 0.8, (255, 255, 255), 2)
+    return combined_img
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300, help="Nombre d'images mesurées (défaut: 300)")
+    parser.add_argument('--width', type=int, default=1280, help="Largeur des images (défaut: 1280)")
+    parser.add_argument('--height', type=int, default=720, help="Hauteur des images (défaut: 720)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    backgrounds = [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(4)]
+    samples = make_landmarks(args.frames)
+    # Le chemin d'origine reçoit directement les protobufs MediaPipe : conversion hors mesure
+    legacy_samples = [([array_to_landmark_list(f) for f in faces], [array_to_landmark_list(h) for h in hands])
+                      for faces, hands in samples]
+
+    drawing = mp.solutions.drawing_utils
+    face_spec = drawing.DrawingSpec(thickness=1, circle_radius=1, color=(0, 255, 0))
+    face_style = LandmarkStyle.from_drawing_specs(mp.solutions.face_mesh.FACEMESH_TESSELATION, face_spec, face_spec)
+    hand_style = LandmarkStyle.from_drawing_specs(mp.solutions.hands.HAND_CONNECTIONS,
+                                                  drawing.DrawingSpec(color=(0, 0, 255)), drawing.DrawingSpec())
+    renderer = OverlayRenderer()
+
+    # Écart entre les deux rendus (points qui se chevauchent, arrondi des bords des textes)
+    img = backgrounds[0]
+    legacy = render_legacy(img, *legacy_samples[0], drawing, face_spec)
+    new = render_new(renderer, img, *samples[0], face_style, hand_style)
+    different = np.count_nonzero((legacy != new).any(axis=2))
+    print(f"{args.frames} images de {args.width}x{args.height}, "
+          f"{different} pixels différents sur {img.shape[0] * img.shape[1]} à la première image")
+
+    start = time.perf_counter()
+    for i, (faces, hands) in enumerate(legacy_samples):
+        render_legacy(backgrounds[i % len(backgrounds)], faces, hands, drawing, face_spec)
+    legacy_ms = 1000 * (time.perf_counter() - start) / args.frames
+
+    start = time.perf_counter()
+    for i, (faces, hands) in enumerate(samples):
+        render_new(renderer, backgrounds[i % len(backgrounds)], faces, hands, face_style, hand_style)
+    new_ms = 1000 * (time.perf_counter() - start) / args.frames
+
+    print(f"Rendu d'origine : {legacy_ms:6.2f} ms/image")
+    print(f"OverlayRenderer : {new_ms:6.2f} ms/image")
+    print(f"Accélération : x{legacy_ms / new_ms:.2f}")
+
+
+if __name__ == "__main__":
+    main()
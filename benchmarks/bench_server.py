@@ -0,0 +1,52 @@
+"""
+Mesure le débit du serveur multi-sources selon le nombre de processus
+d'inférence : le même clip est lu par plusieurs sources, sans cadence imposée
+et sans image jetée (politique 'block'), avec 1, 2, ... --max-workers processus.
+L'efficacité compare le débit obtenu à un débit parfaitement proportionnel
+au nombre de processus.
+
+Utilisation :
+    python benchmarks/bench_server.py clip.mp4 --sources 4 --max-workers 4
+"""
+import argparse  # Pour les options de la ligne de commande
+import os  # Pour localiser les modules de l'application
+import sys  # Pour modifier le chemin d'import
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import DetectionServer, StreamSource  # noqa: E402
+
+
+def run(clip, sources, workers, mode, max_frames):
+    """
+    Returns:
+        Dict: Résumé du serveur (voir DetectionServer.summary())
+    """
+    streams = [StreamSource(f"source{i}", clip, drop='block', max_frames=max_frames) for i in range(sources)]
+    return DetectionServer(streams, workers, mode).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('clip', help="Clip vidéo lu par chaque source")
+    parser.add_argument('--sources', type=int, default=4, help="Nombre de sources (défaut: 4)")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                        help="Nombre maximal de processus d'inférence (défaut: nombre de cœurs)")
+    parser.add_argument('--mode', choices=('face', 'hand', 'both'), default='both', help="Mode de détection")
+    parser.add_argument('--max-frames', type=int, default=150, help="Images lues par source (défaut: 150)")
+    args = parser.parse_args()
+
+    print(f"{args.sources} sources, {os.cpu_count()} cœurs")
+    print(f"{'processus':>9} {'img/s':>8} {'accél.':>7} {'efficacité':>10} {'latence p50 (ms)':>17}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        summary = run(args.clip, args.sources, workers, args.mode, args.max_frames)
+        fps = summary['fps']
+        baseline = baseline or fps
+        latencies = [stats['latency_p50_ms'] for stats in summary['sources'].values()]
+        print(f"{workers:9d} {fps:8.1f} {fps / baseline:6.2f}x {100 * fps / (baseline * workers):9.0f}% "
+              f"{sum(latencies) / len(latencies):17.1f}")
+
+
+if __name__ == "__main__":
+    main()
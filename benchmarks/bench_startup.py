@@ -0,0 +1,133 @@
+"""
+Mesure le temps avant la première image et avant la première détection, avec
+le démarrage d'origine (import de MediaPipe au lancement, détecteurs créés au
+clic) et avec le préchauffage en arrière-plan du DetectorPool.
+
+Chaque scénario tourne dans un nouvel interpréteur Python pour inclure le coût
+des imports. Le clic sur un mode est simulé après --menu-delay secondes passées
+sur l'écran d'accueil, puis une seconde session est lancée dans le même
+processus (retour à l'écran d'accueil puis nouveau clic).
+
+Utilisation :
+    python benchmarks/bench_startup.py clip.mp4 --mode both --menu-delay 2
+"""
+import time  # Pour mesurer le temps d'exécution (avant tout autre import)
+
+START = time.perf_counter()
+
+import argparse  # noqa: E402  Pour les options de la ligne de commande
+import importlib  # noqa: E402  Pour importer les modules de l'application par leur nom
+import json  # noqa: E402  Pour transmettre les mesures du processus enfant
+import os  # noqa: E402  Pour localiser les modules de l'application
+import subprocess  # noqa: E402  Pour lancer chaque scénario dans un nouvel interpréteur
+import sys  # noqa: E402  Pour modifier le chemin d'import
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIOS = ('origine', 'prechauffage')
+APP_MODULES = ('cv2', 'numpy', 'classification', 'detectors', 'instrumentation',
+               'pipeline', 'renderer', 'roi', 'scheduler')  # Modules importés par detection_app
+
+
+def first_frames(detectors, source, max_frames, start):
+    """
+    Lit le clip et exécute la détection comme la boucle de l'application
+
+    Args:
+        start: Instant de référence (clic sur le mode)
+
+    Returns:
+        Tuple: (secondes jusqu'à la première image traitée, secondes jusqu'à la
+                première image avec un visage ou une main, ou None)
+    """
+    import cv2  # Bibliothèque OpenCV pour la lecture du clip
+    from pipeline import open_capture
+
+    cap = open_capture(source)
+    first_frame = first_detection = None
+    try:
+        for _ in range(max_frames):
+            success, img = cap.read()
+            if not success:
+                break
+            img = cv2.flip(img, 1)
+            detections = detectors.detect(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+            now = time.perf_counter() - start
+            if first_frame is None:
+                first_frame = now
+            if not detections.empty:
+                first_detection = now
+                break
+    finally:
+        cap.release()
+    return first_frame, first_detection
+
+
+def run_scenario(scenario, source, mode, menu_delay, max_frames):
+    """
+    Exécute un scénario de démarrage (dans le processus enfant)
+
+    Returns:
+        Dict: Durées en millisecondes
+    """
+    if scenario == 'origine':
+        # Comme avant : MediaPipe importé au lancement, détecteurs créés après le clic
+        importlib.import_module('mediapipe')
+    for name in APP_MODULES:
+        importlib.import_module(name)
+    welcome = time.perf_counter() - START  # L'écran d'accueil peut s'afficher
+
+    from detectors import DetectorPool, DetectorSet
+    if scenario == 'origine':
+        pool = None
+    else:
+        pool = DetectorPool()
+        pool.start_warm_up()
+
+    results = {'scenario': scenario, 'accueil_ms': 1000 * welcome}
+    for session in (1, 2):
+        time.sleep(menu_delay)  # Temps passé sur l'écran d'accueil
+        click = time.perf_counter()
+        detectors = pool.detector_set(mode) if pool is not None else DetectorSet(mode)
+        first_frame, first_detection = first_frames(detectors, source, max_frames, click)
+        detectors.close()
+        results[f'session{session}'] = {
+            'premiere_image_ms': None if first_frame is None else 1000 * first_frame,
+            'premiere_detection_ms': None if first_detection is None else 1000 * first_detection,
+        }
+    if pool is not None:
+        pool.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', help="Clip vidéo (ou index de caméra) utilisé comme source")
+    parser.add_argument('--mode', default='both', choices=('face', 'hand', 'both'),
+                        help="Mode de détection (défaut: both)")
+    parser.add_argument('--menu-delay', type=float, default=2.0,
+                        help="Secondes passées sur l'écran d'accueil avant le clic (défaut: 2)")
+    parser.add_argument('--max-frames', type=int, default=100,
+                        help="Nombre maximal d'images lues pour attendre une détection (défaut: 100)")
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.source, args.mode, args.menu_delay, args.max_frames)))
+        return
+
+    for scenario in SCENARIOS:
+        command = [sys.executable, os.path.abspath(__file__), args.source, '--child', scenario,
+                   '--mode', args.mode, '--menu-delay', str(args.menu_delay), '--max-frames', str(args.max_frames)]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results = json.loads(output.strip().splitlines()[-1])
+        print(f"{scenario:<13} écran d'accueil après {results['accueil_ms']:7.1f} ms")
+        for session in ('session1', 'session2'):
+            timings = results[session]
+            detection = timings['premiere_detection_ms']
+            print(f"  {session} : première image {timings['premiere_image_ms']:7.1f} ms après le clic, "
+                  f"première détection {'aucune' if detection is None else f'{detection:7.1f} ms'}")
+
+
+if __name__ == "__main__":
+    main()
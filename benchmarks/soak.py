@@ -0,0 +1,215 @@
+"""
+Test d'endurance mémoire : rejoue un clip en boucle pendant des heures avec la
+boucle de l'application sans fenêtre (capture dans un tampon réutilisé,
+FramePreprocessor, détecteurs, règles, OverlayRenderer) et relève à intervalle
+régulier la mémoire résidente (RSS) et la mémoire suivie par tracemalloc
+(allocations Python et NumPy ; pic de chaque intervalle).
+
+À la fin, la pente de la RSS après la mise en température est comparée à
+--tolerance-mb : le test échoue (code de sortie 1) si la mémoire a augmenté de
+plus que cette tolérance sur la durée du test. --allocating reproduit le
+prétraitement d'origine (nouvelle image à chaque capture, flip et cvtColor)
+pour comparer.
+
+Utilisation :
+    python benchmarks/soak.py clip.mp4 --duration 4h --interval 60 -o soak.csv
+    python benchmarks/soak.py clip.mp4 --duration 10m --allocating --top 10
+"""
+import argparse  # Pour les options de la ligne de commande
+import csv  # Pour l'écriture des relevés
+import os  # Pour localiser les modules de l'application
+import sys  # Pour modifier le chemin d'import
+import time  # Pour la durée du test
+import tracemalloc  # Pour la mémoire allouée par Python et NumPy
+
+import cv2  # Bibliothèque OpenCV pour la lecture du clip
+import numpy as np  # Pour la pente de la mémoire
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classification import classify_faces, classify_hands  # noqa: E402
+from detectors import DETECTION_MODES, DetectorSet, mediapipe_solutions  # noqa: E402
+from preprocess import FramePreprocessor  # noqa: E402
+from renderer import LandmarkStyle, OverlayRenderer  # noqa: E402
+
+FIELDS = ('elapsed_s', 'frames', 'fps', 'rss_mb', 'traced_mb', 'traced_peak_mb', 'buffers')
+UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+def parse_duration(text):
+    """
+    Returns:
+        Float: Durée en secondes ('90', '90s', '30m', '4h')
+    """
+    unit = UNITS.get(text[-1:].lower())
+    try:
+        return float(text[:-1] if unit else text) * (unit or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Durée invalide: {text!r} (par exemple 90s, 30m, 4h)")
+
+
+def rss_bytes():
+    """
+    Returns:
+        Int: Mémoire résidente du processus (pic depuis le démarrage hors Linux, sans psutil)
+    """
+    try:
+        import psutil  # Facultatif
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource  # Unix uniquement
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Replay:
+    """
+    Boucle de l'application sans fenêtre sur un clip relu sans fin
+    """
+    def __init__(self, clip, mode, allocating=False):
+        self.clip = clip
+        self.mode = mode
+        self.allocating = allocating
+        self.cap = cv2.VideoCapture(clip)
+        if not self.cap.isOpened():
+            raise SystemExit(f"Impossible de lire {clip}")
+        self.detectors = DetectorSet(mode)
+        self.preprocessor = FramePreprocessor()
+        self.renderer = OverlayRenderer()
+        solutions = mediapipe_solutions()
+        drawing = solutions.drawing_utils
+        face_spec = drawing.DrawingSpec(thickness=1, circle_radius=1, color=(0, 255, 0))
+        self.face_style = LandmarkStyle.from_drawing_specs(solutions.face_mesh.FACEMESH_TESSELATION,
+                                                           face_spec, face_spec)
+        self.hand_style = LandmarkStyle.from_drawing_specs(solutions.hands.HAND_CONNECTIONS,
+                                                           drawing.DrawingSpec(color=(0, 0, 255)),
+                                                           drawing.DrawingSpec())
+        self.frame_buffer = None
+        self.frames = 0
+
+    def step(self):
+        """
+        Traite une image, comme DetectionApp.process_frame puis render_frame
+        """
+        success, img = self.cap.read(None if self.allocating else self.frame_buffer)
+        if not success:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Relire le clip depuis le début
+            success, img = self.cap.read(None if self.allocating else self.frame_buffer)
+            if not success:
+                raise SystemExit(f"Impossible de relire {self.clip}")
+        if self.allocating:
+            img = cv2.flip(img, 1)
+            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        else:
+            self.frame_buffer = img
+            img, img_rgb = self.preprocessor.process(img)
+        detections = self.detectors.detect(img_rgb)
+        expressions = classify_faces(detections.faces, img.shape) if len(detections.faces) else []
+        known = [i for i, hand_type in enumerate(detections.handedness) if hand_type is not None]
+        gestures = classify_hands(detections.hands[known], [detections.handedness[i] for i in known]) if known else []
+
+        renderer = self.renderer
+        renderer.begin(img)
+        for face in detections.faces:
+            renderer.draw_landmarks(face, self.face_style)
+        for hand in detections.hands:
+            renderer.draw_landmarks(hand, self.hand_style)
+        combined_img = renderer.blend(img)
+        texts = [label for label in list(expressions) + list(gestures) if label]
+        for i, text in enumerate(texts[-2:]):
+            renderer.put_text(combined_img, text, (50, 100 + 80 * i), 2, (0, 255, 0), 4)
+        self.frames += 1
+
+    def close(self):
+        self.cap.release()
+        self.detectors.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('clip', help="Clip vidéo rejoué en boucle")
+    parser.add_argument('--duration', type=parse_duration, default=parse_duration('1h'),
+                        help="Durée du test (90s, 30m, 4h ; défaut: 1h)")
+    parser.add_argument('--interval', type=parse_duration, default=60.0,
+                        help="Intervalle entre deux relevés (défaut: 60s)")
+    parser.add_argument('--warmup', type=parse_duration, default=120.0,
+                        help="Relevés ignorés pour la pente au début du test (défaut: 120s)")
+    parser.add_argument('--mode', choices=DETECTION_MODES, default='both', help="Mode de détection")
+    parser.add_argument('--allocating', action='store_true', help="Prétraitement d'origine (une image allouée par étape)")
+    parser.add_argument('--tolerance-mb', type=float, default=20.0,
+                        help="Hausse de la RSS tolérée sur la durée du test (défaut: 20 Mo)")
+    parser.add_argument('--top', type=int, default=0,
+                        help="Afficher les N lieux d'allocation dont la mémoire a le plus augmenté")
+    parser.add_argument('-o', '--output', help="Fichier CSV des relevés")
+    args = parser.parse_args()
+
+    tracemalloc.start(8 if args.top else 1)
+    replay = Replay(args.clip, args.mode, args.allocating)
+    output = open(args.output, 'w', newline='') if args.output else None
+    writer = csv.writer(output) if output else None
+    if writer:
+        writer.writerow(FIELDS)
+    print(' '.join(f"{field:>14}" for field in FIELDS))
+
+    samples = []
+    baseline = None  # Instantané tracemalloc à la fin de la mise en température
+    start = last_time = time.perf_counter()
+    last_frames = 0
+    next_sample = start + args.interval
+    try:
+        while True:
+            replay.step()
+            now = time.perf_counter()
+            if now < next_sample:
+                continue
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()  # Pic de l'intervalle suivant
+            elapsed = now - start
+            sample = (round(elapsed, 1), replay.frames, round((replay.frames - last_frames) / (now - last_time), 1),
+                      round(rss_bytes() / 2 ** 20, 1), round(current / 2 ** 20, 2), round(peak / 2 ** 20, 2),
+                      replay.preprocessor.allocations)
+            samples.append(sample)
+            print(' '.join(f"{value:>14}" for value in sample), flush=True)
+            if writer:
+                writer.writerow(sample)
+                output.flush()
+            if args.top and baseline is None and elapsed >= args.warmup:
+                baseline = tracemalloc.take_snapshot()
+            last_time, last_frames = now, replay.frames
+            next_sample += args.interval
+            if elapsed >= args.duration:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        replay.close()
+        if output:
+            output.close()
+
+    # Pente de la RSS après la mise en température (moindres carrés), ramenée à la durée du test
+    steady = np.array([(sample[0], sample[3]) for sample in samples if sample[0] >= args.warmup])
+    if len(steady) < 2:
+        print("Pas assez de relevés après la mise en température pour conclure")
+        return
+    slope = np.polyfit(steady[:, 0], steady[:, 1], 1)[0]  # Mo par seconde
+    growth = slope * (steady[-1, 0] - steady[0, 0])
+    peaks = [sample[5] for sample in samples if sample[0] >= args.warmup]
+    print(f"RSS : {steady[0, 1]:.1f} -> {steady[-1, 1]:.1f} Mo, pente {3600 * slope:+.1f} Mo/h "
+          f"({growth:+.1f} Mo sur le test) ; pic tracemalloc max {max(peaks):.1f} Mo")
+    if baseline is not None:
+        print("Plus fortes hausses depuis la mise en température :")
+        for stat in tracemalloc.take_snapshot().compare_to(baseline, 'lineno')[:args.top]:
+            print(f"  {stat}")
+    if growth > args.tolerance_mb:
+        print(f"Mémoire non stable : hausse supérieure à {args.tolerance_mb:.0f} Mo")
+        sys.exit(1)
+    print("Mémoire stable")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+"""
+Suite de mesures reproductible, sans caméra ni fenêtre : débit et distribution
+des latences de la détection dans chaque mode (face, hand, both), fonctions de
+classification seules, rendu seul et démarrage (imports, création des
+détecteurs, première image, dans un nouvel interpréteur Python).
+
+Les images viennent d'un clip (--clip) ou d'un clip synthétique généré avec une
+graine fixe ; les points de repère d'un enregistrement (--landmarks, voir
+recording.py) ou des points synthétiques de bench_renderer. Les résultats sont
+écrits en JSON avec la configuration de la machine, et comparés à une
+référence (--baseline) : toute médiane ou p95 plus lente de plus de
+--threshold % est signalée (code de sortie 1).
+
+Un clip synthétique ne contient ni visage ni main : il mesure le chemin sans
+détection (détecteurs relancés à chaque image). Un clip enregistré avec un
+visage et des mains mesure aussi le suivi.
+
+Utilisation :
+    python benchmarks/suite.py -o baseline.json
+    python benchmarks/suite.py --clip clip.mp4 --landmarks session/ --baseline baseline.json --threshold 10
+"""
+import time  # Pour mesurer le temps d'exécution (avant tout autre import)
+
+START = time.perf_counter()
+
+import argparse  # noqa: E402  Pour les options de la ligne de commande
+import importlib  # noqa: E402  Pour importer les modules de l'application par leur nom
+import json  # noqa: E402  Pour les résultats et la référence
+import os  # noqa: E402  Pour localiser les modules de l'application
+import platform  # noqa: E402  Pour décrire la machine
+import subprocess  # noqa: E402  Pour le démarrage dans un nouvel interpréteur
+import sys  # noqa: E402  Pour modifier le chemin d'import
+import tempfile  # noqa: E402  Pour le clip synthétique
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SECTIONS = ('detection', 'classification', 'rendering', 'startup')
+METRICS = ('p50_ms', 'p95_ms')  # Comparées à la référence
+COMPARABLE = ('processor', 'cpus', 'python', 'numpy', 'opencv', 'mediapipe', 'clip', 'landmarks',
+              'frames', 'repeat')  # Paramètres qui doivent être identiques entre deux résultats comparés
+APP_MODULES = ('cv2', 'numpy', 'mediapipe', 'classification', 'detectors', 'instrumentation',
+               'preprocess', 'renderer')  # Modules importés avant la création des détecteurs
+
+
+def distribution(durations, elapsed=None):
+    """
+    Args:
+        durations: Durées de chaque itération en secondes
+        elapsed: Durée totale en secondes (défaut: somme des durées)
+
+    Returns:
+        Dict: {'samples', 'per_s', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'}
+    """
+    import numpy as np
+
+    values = 1000 * np.asarray(durations, dtype=float)
+    elapsed = values.sum() / 1000 if elapsed is None else elapsed
+    p50, p95, p99 = np.percentile(values, (50, 95, 99))
+    return {'samples': int(values.size), 'per_s': values.size / elapsed if elapsed > 0 else 0.0,
+            'mean_ms': float(values.mean()), 'p50_ms': float(p50), 'p95_ms': float(p95),
+            'p99_ms': float(p99), 'max_ms': float(values.max())}
+
+
+def synthetic_clip(path, frames, size, seed=0):
+    """
+    Écrit un clip reproductible : fond bruité et formes qui se déplacent
+
+    Args:
+        path: Fichier .avi créé (MJPG)
+        frames: Nombre d'images
+        size: (largeur, hauteur)
+        seed: Graine du générateur
+    """
+    import cv2
+    import numpy as np
+
+    width, height = size
+    rng = np.random.default_rng(seed)
+    background = rng.integers(40, 200, (height // 8, width // 8, 3), dtype=np.uint8)
+    background = cv2.resize(background, size, interpolation=cv2.INTER_LINEAR)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, size)
+    if not writer.isOpened():
+        raise SystemExit(f"Impossible d'écrire le clip synthétique {path}")
+    shapes = rng.uniform(0, 1, (6, 4))  # Position, phase et rayon de chaque forme
+    colors = rng.integers(0, 256, (6, 3)).tolist()
+    for i in range(frames):
+        img = background.copy()
+        for (x, y, phase, radius), color in zip(shapes, colors):
+            center = (int(width * (0.1 + 0.8 * (x + 0.1 * np.sin(i / 10 + 6 * phase)) % 1)),
+                      int(height * (0.1 + 0.8 * (y + 0.1 * np.cos(i / 12 + 6 * phase)) % 1)))
+            cv2.circle(img, center, int(20 + 0.1 * height * radius), color, -1)
+        writer.write(img)
+    writer.release()
+
+
+def load_frames(clip, count):
+    """
+    Lit les images du clip en mémoire (relu depuis le début s'il est trop court),
+    pour que le décodage ne fasse pas partie des mesures
+
+    Returns:
+        List: Images BGR
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(clip)
+    frames = []
+    while len(frames) < count:
+        success, img = cap.read()
+        if not success:
+            if not frames:
+                raise SystemExit(f"Impossible de lire {clip}")
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            continue
+        frames.append(img)
+    cap.release()
+    return frames
+
+
+def load_landmarks(path, count, seed=0):
+    """
+    Points de repère des mesures de classification et de rendu
+
+    Args:
+        path: Enregistrement (recording.py) ou None pour des points synthétiques
+        count: Nombre maximal d'images
+
+    Returns:
+        List: Tuples ((hauteur, largeur), visages (F, 468, 3), mains (M, 21, 3), latéralités)
+    """
+    if path is None:
+        from bench_renderer import make_landmarks
+        return [((720, 1280), faces, hands, ["Left", "Right"]) for faces, hands in make_landmarks(count, seed)]
+    from recording import Recording
+    samples = []
+    for _, frame_size, faces, hands, handedness in Recording(path).iter_frames():
+        samples.append((frame_size, faces, hands, handedness))
+        if len(samples) == count:
+            break
+    if not samples:
+        raise SystemExit(f"Enregistrement vide: {path}")
+    return samples
+
+
+def bench_detection(frames, modes, warmup):
+    """
+    Boucle de l'application sans affichage : prétraitement, détecteurs et règles
+
+    Returns:
+        Dict: 'detection.<mode>' -> distribution de l'image complète, avec la médiane de chaque étape
+    """
+    from classification import classify_faces, classify_hands
+    from detectors import DetectorSet
+    from instrumentation import NULL_PROFILER, TOTAL_STAGE, StageProfiler
+    from preprocess import FramePreprocessor
+
+    results = {}
+    for mode in modes:
+        detectors = DetectorSet(mode)
+        preprocessor = FramePreprocessor()
+        profiler = StageProfiler(window=len(frames))
+        durations = []
+        try:
+            for i, frame in enumerate(frames[:warmup] + frames):
+                measured = i >= warmup
+                if measured:
+                    profiler.start_frame()
+                img, img_rgb = preprocessor.process(frame, profiler=profiler if measured else NULL_PROFILER)
+                detections = detectors.detect(img_rgb, profiler if measured else None)
+                if len(detections.faces):
+                    classify_faces(detections.faces, img.shape)
+                known = [j for j, hand_type in enumerate(detections.handedness) if hand_type is not None]
+                if known:
+                    classify_hands(detections.hands[known], [detections.handedness[j] for j in known])
+                if measured:
+                    profiler.mark('classification')
+                    durations.append(profiler.end_frame()[TOTAL_STAGE])
+        finally:
+            detectors.close()
+        result = distribution(durations)
+        result['stages_p50_ms'] = {stage: stats['p50_ms'] for stage, stats in profiler.summary()['stages'].items()
+                                   if stage != TOTAL_STAGE}
+        results[f'detection.{mode}'] = result
+    return results
+
+
+def _timed(calls, repeat):
+    """
+    Returns:
+        List: Durée de chaque appel, sur repeat passages de la liste
+    """
+    durations = []
+    for _ in range(repeat):
+        for call, args in calls:
+            begin = time.perf_counter()
+            call(*args)
+            durations.append(time.perf_counter() - begin)
+    return durations
+
+
+def bench_classification(samples, repeat):
+    """
+    Returns:
+        Dict: 'classification.faces' et 'classification.hands' -> distribution par appel
+    """
+    from classification import classify_faces, classify_hands
+
+    face_calls = [(classify_faces, (faces, size + (3,))) for size, faces, _, _ in samples if len(faces)]
+    hand_calls = [(classify_hands, (hands, handedness)) for _, _, hands, handedness in samples if len(hands)]
+    results = {}
+    if face_calls:
+        results['classification.faces'] = distribution(_timed(face_calls, repeat))
+    if hand_calls:
+        results['classification.hands'] = distribution(_timed(hand_calls, repeat))
+    return results
+
+
+def bench_rendering(samples, repeat):
+    """
+    Rendu d'une image de l'application (maillage, mains, mélange et textes) par l'OverlayRenderer
+
+    Returns:
+        Dict: 'rendering' -> distribution par image
+    """
+    import numpy as np
+    from detectors import mediapipe_solutions
+    from renderer import LandmarkStyle, OverlayRenderer
+
+    solutions = mediapipe_solutions()
+    drawing = solutions.drawing_utils
+    face_spec = drawing.DrawingSpec(thickness=1, circle_radius=1, color=(0, 255, 0))
+    face_style = LandmarkStyle.from_drawing_specs(solutions.face_mesh.FACEMESH_TESSELATION, face_spec, face_spec)
+    hand_style = LandmarkStyle.from_drawing_specs(solutions.hands.HAND_CONNECTIONS,
+                                                  drawing.DrawingSpec(color=(0, 0, 255)), drawing.DrawingSpec())
+    renderer = OverlayRenderer()
+    images = {}
+
+    def render(size, faces, hands):
+        img = images.get(size)
+        if img is None:
+            img = images[size] = np.random.default_rng(0).integers(0, 256, size + (3,), dtype=np.uint8)
+        renderer.begin(img)
+        for face in faces:
+            renderer.draw_landmarks(face, face_style)
+        for hand in hands:
+            renderer.draw_landmarks(hand, hand_style)
+        combined_img = renderer.blend(img)
+        renderer.put_text(combined_img, "Mode: Détection Combinée (Visage et Mains)", (20, 30), 0.8, (255, 255, 255), 2)
+        renderer.put_text(combined_img, "SOURIRE :)", (50, 100), 2, (0, 255, 0), 4)
+        renderer.put_text(combined_img, "LIKE", (50, 180), 2, (0, 255, 255), 4)
+
+    calls = [(render, (size, faces, hands)) for size, faces, hands, _ in samples]
+    _timed(calls[:10], 1)  # Tampons et cache des textes
+    return {'rendering': distribution(_timed(calls, repeat))}
+
+
+def run_startup(clip, mode):
+    """
+    Démarrage mesuré dans le processus enfant
+
+    Returns:
+        Dict: Durées en secondes des imports, de la création des détecteurs et de la première image
+    """
+    for name in APP_MODULES:
+        importlib.import_module(name)
+    imported = time.perf_counter()
+    from detectors import DetectorSet
+    from preprocess import FramePreprocessor
+    detectors = DetectorSet(mode)
+    created = time.perf_counter()
+    _, img_rgb = FramePreprocessor().process(load_frames(clip, 1)[0], display=False)
+    loaded = time.perf_counter()
+    detectors.detect(img_rgb)
+    first = time.perf_counter()
+    detectors.close()
+    return {'import': imported - START, 'detectors': created - imported, 'first_frame': first - loaded}
+
+
+def bench_startup(clip, mode, runs):
+    """
+    Returns:
+        Dict: 'startup.<étape>' -> distribution sur runs nouveaux interpréteurs
+    """
+    timings = {}
+    for _ in range(runs):
+        command = [sys.executable, os.path.abspath(__file__), '--child-startup', mode, '--clip', clip]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        for step, duration in json.loads(output.strip().splitlines()[-1]).items():
+            timings.setdefault(step, []).append(duration)
+    return {f'startup.{step}': distribution(durations) for step, durations in timings.items()}
+
+
+def environment(args):
+    """
+    Returns:
+        Dict: Machine, versions et paramètres, pour juger si deux résultats sont comparables
+    """
+    import cv2
+    import mediapipe
+    import numpy as np
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit,
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(), 'cpus': os.cpu_count(),
+            'numpy': np.__version__, 'opencv': cv2.__version__, 'mediapipe': mediapipe.__version__,
+            'clip': args.clip or f"synthétique {args.size[0]}x{args.size[1]} (graine {args.seed})",
+            'landmarks': args.landmarks or f"synthétiques (graine {args.seed})",
+            'frames': args.frames, 'warmup': args.warmup, 'repeat': args.repeat}
+
+
+def compare(results, baseline, threshold, metrics=METRICS):
+    """
+    Compare les résultats à une référence
+
+    Args:
+        results: Dict nom -> distribution
+        baseline: Dict nom -> distribution de la référence
+        threshold: Hausse tolérée en pourcentage
+        metrics: Durées comparées
+
+    Returns:
+        List: Tuples (nom, mesure, référence, actuel, écart en %, régression) des mesures communes
+    """
+    rows = []
+    for name in sorted(set(results) & set(baseline)):
+        for metric in metrics:
+            before, after = baseline[name].get(metric), results[name].get(metric)
+            if not before or after is None:
+                continue
+            change = 100 * (after - before) / before
+            rows.append((name, metric, before, after, change, change > threshold))
+    return rows
+
+
+def print_results(results, stream=sys.stdout):
+    stream.write(f"{'mesure':<24}{'n':>7}{'/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}\n")
+    for name, stats in results.items():
+        stream.write(f"{name:<24}{stats['samples']:>7}{stats['per_s']:>10.1f}{stats['p50_ms']:>10.3f}"
+                     f"{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clip', help="Clip vidéo (défaut: clip synthétique généré)")
+    parser.add_argument('--landmarks', help="Enregistrement de points (défaut: points synthétiques)")
+    parser.add_argument('--only', default=','.join(SECTIONS),
+                        help=f"Mesures à exécuter, séparées par des virgules (défaut: {','.join(SECTIONS)})")
+    parser.add_argument('--modes', default='face,hand,both', help="Modes de détection mesurés (défaut: tous)")
+    parser.add_argument('--frames', type=int, default=150, help="Images mesurées par mode (défaut: 150)")
+    parser.add_argument('--warmup', type=int, default=20, help="Images ignorées au début de chaque mode (défaut: 20)")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Passages sur les points pour la classification et le rendu (défaut: 5)")
+    parser.add_argument('--startup-runs', type=int, default=3, help="Démarrages mesurés (défaut: 3)")
+    parser.add_argument('--size', default='1280x720', help="Résolution du clip synthétique (défaut: 1280x720)")
+    parser.add_argument('--seed', type=int, default=0, help="Graine du clip et des points synthétiques (défaut: 0)")
+    parser.add_argument('-o', '--output', help="Fichier JSON des résultats")
+    parser.add_argument('--baseline', help="Résultats JSON de référence")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Hausse tolérée de la médiane et du p95 par rapport à la référence, en %% (défaut: 10)")
+    parser.add_argument('--child-startup', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_startup:
+        print(json.dumps(run_startup(args.clip, args.child_startup)))
+        return
+
+    from capture import parse_size
+    from detectors import DETECTION_MODES
+    sections = [section.strip() for section in args.only.split(',') if section.strip()]
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    for name, allowed in ((sections, SECTIONS), (modes, DETECTION_MODES)):
+        unknown = sorted(set(name) - set(allowed))
+        if unknown:
+            raise SystemExit(f"Valeur inconnue: {', '.join(unknown)} (choix: {', '.join(allowed)})")
+    try:
+        args.size = parse_size(args.size)
+    except ValueError as error:
+        raise SystemExit(str(error))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as stream:
+            baseline = json.load(stream)
+
+    with tempfile.TemporaryDirectory() as directory:
+        clip = args.clip
+        if clip is None and {'detection', 'startup'} & set(sections):
+            clip = os.path.join(directory, 'synthetique.avi')
+            synthetic_clip(clip, min(args.frames, 300), args.size, args.seed)
+        results = {}
+        if 'detection' in sections:
+            results.update(bench_detection(load_frames(clip, args.frames), modes, args.warmup))
+        if 'classification' in sections or 'rendering' in sections:
+            samples = load_landmarks(args.landmarks, args.frames, args.seed)
+            if 'classification' in sections:
+                results.update(bench_classification(samples, args.repeat))
+            if 'rendering' in sections:
+                results.update(bench_rendering(samples, args.repeat))
+        if 'startup' in sections:
+            results.update(bench_startup(clip, modes[-1], args.startup_runs))
+
+    print_results(results)
+    report = {'environment': environment(args), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as stream:
+            json.dump(report, stream, indent=2, ensure_ascii=False)
+    if baseline is None:
+        return
+    rows = compare(results, baseline['results'], args.threshold)
+    print(f"\nComparaison avec {args.baseline} (commit {baseline['environment'].get('commit')}, "
+          f"seuil {args.threshold:g} %)")
+    for key in COMPARABLE:
+        if baseline['environment'].get(key) != report['environment'][key]:
+            print(f"Attention : {key} différent de la référence ({baseline['environment'].get(key)} "
+                  f"-> {report['environment'][key]})")
+    for name, metric, before, after, change, regression in rows:
+        print(f"{name:<24}{metric:>8}{before:>10.3f}{after:>10.3f}{change:>+9.1f} %{'  RÉGRESSION' if regression else ''}")
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        raise SystemExit(f"{len(regressions)} régression(s) au-delà de {args.threshold:g} %")
+    print("Aucune régression")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+"""
+Configuration de la capture vidéo : format, résolution, cadence et tampon.
+
+Sans configuration, beaucoup de webcams USB livrent du YUYV non compressé, ce
+qui limite la cadence en 1280x720 (souvent 10 img/s), et le pilote garde
+plusieurs images en tampon (autant de latence en plus). configure_capture()
+demande un format (FOURCC, par exemple MJPG), une résolution, une cadence et
+une taille de tampon dans l'ordre attendu par les pilotes V4L2/DirectShow, puis
+relit ce que la caméra a réellement accepté. probe_modes() essaie les
+résolutions courantes pour connaître les modes disponibles.
+
+Pendant la détection, un ResolutionTuner compare le temps de traitement de
+chaque image au budget de la cadence visée : quand il est dépassé, la
+résolution d'inférence (image réduite transmise aux détecteurs, les points
+restant normalisés) baisse d'abord, puis la résolution de capture ; elles
+remontent dans l'ordre inverse quand la marge redevient suffisante.
+
+FakeCapture remplace cv2.VideoCapture pour les essais sans caméra : elle
+n'accepte que certains modes (comme un vrai pilote, une demande est ramenée au
+mode le plus proche), respecte la cadence du mode et peut lire ses images
+dans un fichier vidéo.
+
+Utilisation :
+    python capture.py 0 --probe                      # Modes acceptés par la webcam
+    python capture.py 0 --fourcc MJPG --size 1280x720 --buffer-size 1
+    python capture.py fake --probe                   # Caméra simulée
+"""
+import argparse  # Pour les options de la ligne de commande
+import collections  # Pour les tuples nommés
+import time  # Pour la cadence simulée et les mesures
+
+import cv2  # Bibliothèque OpenCV pour la capture vidéo
+import numpy as np  # Pour les images simulées
+
+from pipeline import open_capture
+
+CaptureMode = collections.namedtuple('CaptureMode', 'width height fps fourcc')
+
+# Résolutions essayées par probe_modes(), de la plus grande à la plus petite
+COMMON_SIZES = ((1920, 1080), (1280, 720), (960, 540), (800, 600), (640, 480), (640, 360), (424, 240), (320, 240))
+COMMON_FOURCCS = ('MJPG', 'YUYV')
+INFERENCE_SCALES = (1.0, 0.75, 0.5, 0.375, 0.25)  # Échelles d'inférence essayées par le ResolutionTuner
+
+# Modes d'une webcam USB typique : le MJPG tient 30 img/s en HD, le YUYV non
+FAKE_MODES = (
+    CaptureMode(1920, 1080, 30.0, 'MJPG'),
+    CaptureMode(1280, 720, 30.0, 'MJPG'),
+    CaptureMode(640, 480, 30.0, 'MJPG'),
+    CaptureMode(1280, 720, 10.0, 'YUYV'),
+    CaptureMode(640, 480, 30.0, 'YUYV'),
+    CaptureMode(320, 240, 30.0, 'YUYV'),
+)
+
+
+def fourcc_code(text):
+    """
+    Returns:
+        Int: Code OpenCV du format (par exemple 'MJPG')
+    """
+    if len(text) != 4:
+        raise ValueError(f"Un FOURCC fait 4 caractères: {text!r}")
+    return cv2.VideoWriter_fourcc(*text)
+
+
+def fourcc_text(code):
+    """
+    Returns:
+        Str: Format lu dans CAP_PROP_FOURCC, ou None s'il est inconnu
+    """
+    code = int(code)
+    if code <= 0:
+        return None
+    text = ''.join(chr((code >> 8 * i) & 0xFF) for i in range(4))
+    return text if text.isprintable() else None
+
+
+def parse_size(text):
+    """
+    Args:
+        text: Résolution 'LARGEURxHAUTEUR' (par exemple '1280x720')
+
+    Returns:
+        Tuple: (largeur, hauteur)
+    """
+    width, separator, height = text.lower().partition('x')
+    if not separator or not width.isdigit() or not height.isdigit():
+        raise ValueError(f"Résolution invalide: {text!r} (LARGEURxHAUTEUR)")
+    return int(width), int(height)
+
+
+def current_mode(cap):
+    """
+    Returns:
+        CaptureMode: Résolution, cadence et format annoncés par la capture
+    """
+    return CaptureMode(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                       float(cap.get(cv2.CAP_PROP_FPS)), fourcc_text(cap.get(cv2.CAP_PROP_FOURCC)))
+
+
+def describe_mode(mode):
+    return f"{mode.width}x{mode.height} {mode.fourcc or '?'} {mode.fps:.0f} img/s"
+
+
+def configure_capture(cap, width=None, height=None, fps=None, fourcc=None, buffer_size=None):
+    """
+    Demande un mode de capture (None = réglage laissé tel quel)
+
+    Le format est demandé avant la résolution (les pilotes V4L2 choisissent les
+    résolutions disponibles selon le format), puis la cadence et le tampon.
+
+    Args:
+        cap: Capture OpenCV (ou substitut exposant get() et set())
+        width, height: Résolution demandée
+        fps: Cadence demandée
+        fourcc: Format demandé ('MJPG', 'YUYV', 'H264'...)
+        buffer_size: Nombre d'images gardées en tampon par le pilote (1 = latence minimale)
+
+    Returns:
+        CaptureMode: Mode réellement obtenu (la caméra peut arrondir ou refuser une demande)
+    """
+    if fourcc is not None:
+        cap.set(cv2.CAP_PROP_FOURCC, fourcc_code(fourcc))
+    if width is not None:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    if height is not None:
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if fps is not None:
+        cap.set(cv2.CAP_PROP_FPS, fps)
+    if buffer_size is not None:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+    return current_mode(cap)
+
+
+def measure_fps(cap, frames=30):
+    """
+    Mesure la cadence réelle de la capture (la première image, souvent lente, est ignorée)
+
+    Returns:
+        Float: Images par seconde (0 si la capture ne livre pas d'image)
+    """
+    if not cap.read()[0]:
+        return 0.0
+    start = time.perf_counter()
+    for count in range(frames):
+        if not cap.read()[0]:
+            break
+    else:
+        count = frames
+    elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed > 0 else 0.0
+
+
+def probe_modes(cap, sizes=COMMON_SIZES, fourccs=COMMON_FOURCCS, measure_frames=0):
+    """
+    Essaie chaque format et chaque résolution, puis rétablit le mode d'origine
+    (format, résolution, cadence et tampon : un changement de format ou de
+    résolution réinitialise la cadence sur les pilotes V4L2)
+
+    Args:
+        cap: Capture OpenCV (ou substitut)
+        sizes: Résolutions (largeur, hauteur) essayées
+        fourccs: Formats essayés (None dans la liste = format courant)
+        measure_frames: Images lues pour mesurer la cadence réelle de chaque mode (0 = cadence annoncée)
+
+    Returns:
+        List: CaptureMode acceptés, du plus grand au plus petit
+    """
+    original = current_mode(cap)
+    buffer_size = int(cap.get(cv2.CAP_PROP_BUFFERSIZE))
+    modes = []
+    for fourcc in fourccs:
+        for width, height in sizes:
+            mode = configure_capture(cap, width, height, fourcc=fourcc)
+            if (mode.width, mode.height) != (width, height) or (fourcc is not None and mode.fourcc != fourcc):
+                continue  # Mode refusé ou arrondi par la caméra
+            if measure_frames:
+                mode = mode._replace(fps=measure_fps(cap, measure_frames))
+            if mode not in modes:
+                modes.append(mode)
+    configure_capture(cap, original.width, original.height, fps=original.fps or None, fourcc=original.fourcc,
+                      buffer_size=buffer_size if buffer_size > 0 else None)
+    return sorted(modes, key=lambda mode: (-mode.width * mode.height, -mode.fps))
+
+
+class ResolutionTuner:
+    """
+    Ajuste les résolutions d'inférence et de capture pour tenir une cadence visée
+    """
+    def __init__(self, target_fps, cap=None, capture_sizes=(), inference_scales=INFERENCE_SCALES,
+                 inference_scale=1.0, headroom=0.7, patience=15, cooldown=30, smoothing=0.1):
+        """
+        Args:
+            target_fps: Cadence visée (budget par image = 1 / target_fps)
+            cap: Capture à reconfigurer (None = seule la résolution d'inférence est ajustée,
+                 par exemple quand la capture tourne dans un autre thread)
+            capture_sizes: Résolutions de capture utilisables (voir probe_modes())
+            inference_scales: Échelles de l'image transmise aux détecteurs
+            inference_scale: Échelle d'inférence de départ
+            headroom: Fraction du budget en dessous de laquelle une résolution remonte
+            patience: Images consécutives hors budget avant une baisse (quatre fois plus avant une hausse)
+            cooldown: Images ignorées après un changement (le temps que la mesure se stabilise)
+            smoothing: Poids de la dernière image dans la moyenne glissante du temps par image
+        """
+        if target_fps <= 0:
+            raise ValueError("La cadence visée doit être positive")
+        self.budget = 1.0 / target_fps
+        self.cap = cap
+        self.headroom = headroom
+        self.patience = patience
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.inference_scales = sorted(set(inference_scales) | {inference_scale}, reverse=True)
+        self.scale_index = self.inference_scales.index(inference_scale)
+        self.capture_mode = current_mode(cap) if cap is not None else None
+        self.capture_sizes = []
+        self.size_index = 0
+        if cap is not None:
+            current = (self.capture_mode.width, self.capture_mode.height)
+            # Jamais au-dessus de la résolution demandée au départ
+            self.capture_sizes = sorted({size for size in capture_sizes if size[0] * size[1] <= current[0] * current[1]}
+                                        | {current}, key=lambda size: -size[0] * size[1])
+            self.size_index = self.capture_sizes.index(current)
+        self.frame_time = None  # Moyenne glissante du temps de traitement par image (secondes)
+        self.changes = 0  # Nombre d'ajustements
+        self._slow = self._fast = 0
+        self._wait = cooldown
+
+    @property
+    def inference_scale(self):
+        return self.inference_scales[self.scale_index]
+
+    def update(self, frame_time):
+        """
+        Args:
+            frame_time: Temps de traitement de la dernière image en secondes (attente de la caméra exclue)
+
+        Returns:
+            Bool: True si une résolution a changé
+        """
+        if self.frame_time is None:
+            self.frame_time = frame_time
+        else:
+            self.frame_time += self.smoothing * (frame_time - self.frame_time)
+        if self._wait:
+            self._wait -= 1
+            return False
+        if self.frame_time > self.budget:
+            self._slow, self._fast = self._slow + 1, 0
+        elif self.frame_time < self.headroom * self.budget:
+            self._slow, self._fast = 0, self._fast + 1
+        else:
+            self._slow = self._fast = 0
+        if self._slow >= self.patience:
+            return self._step(down=True)
+        if self._fast >= 4 * self.patience:
+            return self._step(down=False)
+        return False
+
+    def _step(self, down):
+        self._slow = self._fast = 0
+        # Baisse : inférence puis capture ; hausse : capture puis inférence
+        if down and self.scale_index < len(self.inference_scales) - 1:
+            self.scale_index += 1
+        elif down and self.size_index < len(self.capture_sizes) - 1:
+            self._set_capture_size(self.size_index + 1)
+        elif not down and self.size_index > 0:
+            self._set_capture_size(self.size_index - 1)
+        elif not down and self.scale_index > 0:
+            self.scale_index -= 1
+        else:
+            return False
+        self.changes += 1
+        self.frame_time = None
+        self._wait = self.cooldown
+        return True
+
+    def _set_capture_size(self, index):
+        self.size_index = index
+        width, height = self.capture_sizes[index]
+        # La cadence est redemandée : le changement de résolution la réinitialise sur les pilotes V4L2
+        self.capture_mode = configure_capture(self.cap, width, height, fps=self.capture_mode.fps or None)
+
+    def describe(self):
+        """
+        Returns:
+            Str: Résolutions en cours, pour l'affichage
+        """
+        capture = f"capture {self.capture_mode.width}x{self.capture_mode.height}, " if self.capture_mode else ""
+        frame_time = f", {1000 * self.frame_time:.0f} ms/image" if self.frame_time is not None else ""
+        return (f"{capture}inférence {100 * self.inference_scale:.0f}% "
+                f"(budget {1000 * self.budget:.0f} ms{frame_time})")
+
+
+class FakeCapture:
+    """
+    Substitut de cv2.VideoCapture simulant une webcam (modes acceptés, format, cadence, tampon)
+    """
+    def __init__(self, modes=FAKE_MODES, initial=None, source=None, realtime=True):
+        """
+        Args:
+            modes: CaptureMode acceptés par la caméra simulée
+            initial: Mode au démarrage (défaut: le plus petit YUYV 640x480, ou le premier mode)
+            source: Fichier vidéo dont les images sont redimensionnées au mode courant et relues
+                    sans fin (None = images synthétiques numérotées)
+            realtime: True pour livrer les images à la cadence du mode, comme une caméra
+        """
+        self.modes = list(modes)
+        default = next((mode for mode in self.modes if (mode.width, mode.height, mode.fourcc) == (640, 480, 'YUYV')),
+                       self.modes[0])
+        self.mode = initial or default
+        self.fps = self.mode.fps
+        self.buffer_size = 4  # Images gardées par le pilote simulé
+        self.realtime = realtime
+        self.frame_count = 0
+        self._requested = (self.mode.width, self.mode.height)
+        self._source = cv2.VideoCapture(source) if source is not None else None
+        self._next_time = None
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def _select(self, fourcc, width, height):
+        """
+        Mode accepté le plus proche de la demande, comme un pilote V4L2
+        """
+        candidates = [mode for mode in self.modes if mode.fourcc == fourcc]
+        mode = min(candidates, key=lambda mode: abs(mode.width - width) + abs(mode.height - height))
+        if mode != self.mode:
+            self.mode = mode
+            self.fps = mode.fps
+            self._next_time = None
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FOURCC:
+            fourcc = fourcc_text(value)
+            if not any(mode.fourcc == fourcc for mode in self.modes):
+                return False
+            self._select(fourcc, *self._requested)
+        elif prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            width, height = self._requested
+            self._requested = (int(value), height) if prop == cv2.CAP_PROP_FRAME_WIDTH else (width, int(value))
+            self._select(self.mode.fourcc, *self._requested)
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = min(float(value), self.mode.fps) if value > 0 else self.mode.fps
+        elif prop == cv2.CAP_PROP_BUFFERSIZE:
+            self.buffer_size = max(1, int(value))
+        else:
+            return False
+        return True
+
+    def get(self, prop):
+        values = {
+            cv2.CAP_PROP_FRAME_WIDTH: self.mode.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.mode.height,
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FOURCC: fourcc_code(self.mode.fourcc),
+            cv2.CAP_PROP_BUFFERSIZE: self.buffer_size,
+        }
+        return float(values.get(prop, 0.0))
+
+    @property
+    def latency(self):
+        """
+        Âge simulé de l'image livrée (images en tampon dans le pilote), en secondes
+        """
+        return self.buffer_size / self.fps
+
+    def _frame(self):
+        size = (self.mode.width, self.mode.height)
+        if self._source is not None:
+            success, frame = self._source.read()
+            if not success:
+                self._source.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Relire le fichier depuis le début
+                success, frame = self._source.read()
+            if success:
+                return frame if frame.shape[1::-1] == size else cv2.resize(frame, size)
+        # Image synthétique : dégradé et carré qui se déplace d'une image à l'autre
+        frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        frame[..., 0] = np.linspace(0, 255, size[0], dtype=np.uint8)
+        side = size[1] // 4
+        x = (self.frame_count * 8) % max(1, size[0] - side)
+        frame[side:2 * side, x:x + side] = 255
+        return frame
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        if self.realtime:
+            # Cadence du mode : attendre l'instant de la prochaine image
+            now = time.perf_counter()
+            if self._next_time is None:
+                self._next_time = now
+            delay = self._next_time - now
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time = max(self._next_time, now - 1.0 / self.fps) + 1.0 / self.fps
+        frame = self._frame()
+        self.frame_count += 1
+        if image is not None and image.shape == frame.shape:
+            image[...] = frame  # Écriture dans le tableau fourni, comme cv2.VideoCapture.read
+            return True, image
+        return True, frame
+
+    def release(self):
+        self._opened = False
+        if self._source is not None:
+            self._source.release()
+
+
+def open_source(source, fake_source=None):
+    """
+    Ouvre une source vidéo, 'fake' désignant une FakeCapture
+
+    Args:
+        source: 'fake', ou source acceptée par open_capture()
+        fake_source: Fichier vidéo lu par la FakeCapture (None = images synthétiques)
+    """
+    if source == 'fake':
+        return FakeCapture(source=fake_source)
+    return open_capture(source)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Liste les modes d'une caméra ou mesure un mode de capture")
+    parser.add_argument('source', nargs='?', default='0', help="Caméra, fichier vidéo, ou 'fake' (défaut: 0)")
+    parser.add_argument('--fake-source', help="Fichier vidéo lu par la caméra simulée")
+    parser.add_argument('--probe', action='store_true', help="Lister les formats et résolutions acceptés")
+    parser.add_argument('--measure', type=int, default=0, metavar='IMAGES',
+                        help="Avec --probe, mesurer la cadence réelle de chaque mode sur ce nombre d'images")
+    parser.add_argument('--size', type=parse_size, help="Résolution demandée (LARGEURxHAUTEUR)")
+    parser.add_argument('--fps', type=float, help="Cadence demandée")
+    parser.add_argument('--fourcc', help="Format demandé (MJPG, YUYV...)")
+    parser.add_argument('--buffer-size', type=int, help="Images gardées en tampon par le pilote")
+    parser.add_argument('--frames', type=int, default=60, help="Images lues pour mesurer la cadence (défaut: 60)")
+    args = parser.parse_args(argv)
+
+    cap = open_source(args.source, args.fake_source)
+    try:
+        if not cap.isOpened():
+            raise SystemExit(f"Impossible d'ouvrir la source {args.source}")
+        print(f"Mode initial : {describe_mode(current_mode(cap))}")
+        if args.probe:
+            for mode in probe_modes(cap, measure_frames=args.measure):
+                print(f"  {describe_mode(mode)}")
+            return
+        width, height = args.size or (None, None)
+        mode = configure_capture(cap, width, height, args.fps, args.fourcc, args.buffer_size)
+        print(f"Mode obtenu : {describe_mode(mode)}, tampon {cap.get(cv2.CAP_PROP_BUFFERSIZE):.0f}")
+        print(f"Cadence mesurée : {measure_fps(cap, args.frames):.1f} img/s")
+    finally:
+        cap.release()
+
+
+if __name__ == "__main__":
+    main()
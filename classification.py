@@ -0,0 +1,262 @@
+"""
+Classification vectorisée des expressions faciales et des gestes de mains.
+
+Les points clés MediaPipe sont extraits en une fois dans des tableaux NumPy
+float32 de forme (N, 468, 3) pour les visages et (N, 21, 3) pour les mains, puis
+les règles de détection sont évaluées sur tout le lot en une seule passe.
+Seuls les indices réellement utilisés par les règles sont lus ; les étiquettes
+produites sont identiques à celles de DetectionApp.detect_facial_expression et
+DetectionApp.detect_hand_gesture.
+"""
+import numpy as np  # Pour les opérations mathématiques sur les tableaux
+
+FACE_LANDMARK_COUNT = 468  # Nombre de points du maillage facial
+HAND_LANDMARK_COUNT = 21  # Nombre de points d'une main
+
+# Étiquettes produites par les règles
+EXPRESSION_SMILE = "SOURIRE :)"
+EXPRESSION_SURPRISE = "SURPRISE :O"
+EXPRESSION_ANGRY = "FÂCHÉ >:("
+GESTURE_OK = "OK 👌"
+GESTURE_LIKE = "LIKE 👍"
+GESTURE_HEART = "COEUR ❤️"
+GESTURE_ILY = "I LOVE YOU 🤟"
+
+# Indices du maillage facial lus par les règles d'expression
+# (8/168: entre les yeux, 13/14: lèvres, 61/291: coins de la bouche,
+#  66/296: milieu des sourcils, 78/308: largeur de la bouche)
+FACE_RULE_INDICES = np.array([8, 13, 14, 61, 66, 78, 168, 291, 296, 308])
+_F_BETWEEN_EYES, _F_TOP_LIP, _F_BOTTOM_LIP, _F_LEFT_CORNER, _F_LEFT_EYEBROW, \
+    _F_MOUTH_LEFT, _F_NOSE_BRIDGE, _F_RIGHT_CORNER, _F_RIGHT_EYEBROW, _F_MOUTH_RIGHT = range(10)
+
+# Indices des points de la main (mediapipe.solutions.hands.HandLandmark)
+WRIST = 0
+THUMB_IP, THUMB_TIP = 3, 4
+INDEX_FINGER_PIP, INDEX_FINGER_TIP = 6, 8
+MIDDLE_FINGER_PIP, MIDDLE_FINGER_TIP = 10, 12
+RING_FINGER_PIP, RING_FINGER_TIP = 14, 16
+PINKY_PIP, PINKY_TIP = 18, 20
+
+# Codes -> étiquettes (0 = aucune détection)
+EXPRESSION_LABELS = np.array([None, EXPRESSION_SMILE, EXPRESSION_SURPRISE, EXPRESSION_ANGRY], dtype=object)
+GESTURE_LABELS = np.array([None, GESTURE_OK, GESTURE_LIKE, GESTURE_HEART, GESTURE_ILY], dtype=object)
+
+
+def landmarks_to_array(landmark_lists, indices=None):
+    """
+    Convertit des listes de points clés MediaPipe en un tableau NumPy
+
+    Args:
+        landmark_lists: Séquence de NormalizedLandmarkList (ou de séquences de points)
+        indices: Indices des points à extraire (None = tous les points)
+
+    Returns:
+        np.ndarray: Tableau float32 de forme (N, nombre de points, 3) contenant x, y, z
+    """
+    rows = []
+    for landmarks in landmark_lists:
+        points = landmarks.landmark if hasattr(landmarks, 'landmark') else landmarks
+        if indices is not None:
+            points = [points[i] for i in indices]
+        rows.append([(p.x, p.y, p.z) for p in points])
+    if not rows:
+        count = len(indices) if indices is not None else 0
+        return np.empty((0, count, 3), dtype=np.float32)
+    return np.array(rows, dtype=np.float32)
+
+
+def faces_to_array(face_landmarks_list, gather=False):
+    """
+    Args:
+        face_landmarks_list: multi_face_landmarks renvoyé par FaceMesh
+        gather: True pour n'extraire que les points lus par les règles (FACE_RULE_INDICES)
+
+    Returns:
+        np.ndarray: Tableau (N, 468, 3), ou (N, len(FACE_RULE_INDICES), 3) si gather=True
+    """
+    return landmarks_to_array(face_landmarks_list, FACE_RULE_INDICES if gather else None)
+
+
+def hands_to_array(hand_landmarks_list):
+    """
+    Args:
+        hand_landmarks_list: multi_hand_landmarks renvoyé par Hands
+
+    Returns:
+        np.ndarray: Tableau (N, 21, 3)
+    """
+    return landmarks_to_array(hand_landmarks_list)
+
+
+def handedness_labels(multi_handedness):
+    """
+    Args:
+        multi_handedness: multi_handedness renvoyé par Hands
+
+    Returns:
+        List: "Left" ou "Right" pour chaque main détectée
+    """
+    return [handedness.classification[0].label for handedness in multi_handedness or []]
+
+
+def frame_sizes(img_shape, count):
+    """
+    Normalise les dimensions d'image en tableaux (largeur, hauteur) de forme (N,)
+    """
+    shape = np.asarray(img_shape)
+    if shape.ndim == 1:
+        # Une seule dimension (hauteur, largeur[, canaux]) partagée par tout le lot
+        h, w = float(shape[0]), float(shape[1])
+        return np.full(count, w), np.full(count, h)
+    # Une dimension (hauteur, largeur) par élément du lot
+    return shape[:, 1].astype(np.float64), shape[:, 0].astype(np.float64)
+
+
+def expression_codes(faces, img_shape):
+    """
+    Évalue les règles d'expression sur un lot de visages
+
+    Args:
+        faces: Tableau (N, 468, 3) ou déjà réduit aux FACE_RULE_INDICES (N, 10, 3)
+        img_shape: (hauteur, largeur[, canaux]) commun, ou tableau (N, 2) de (hauteur, largeur)
+
+    Returns:
+        np.ndarray: Codes entiers (N,) : 0 = aucune, 1 = sourire, 2 = surprise, 3 = colère
+    """
+    faces = np.asarray(faces)
+    if faces.shape[1] == FACE_LANDMARK_COUNT:
+        faces = faces[:, FACE_RULE_INDICES]
+    elif faces.shape[1] != len(FACE_RULE_INDICES):
+        raise ValueError(f"Forme de visages inattendue: {faces.shape}")
+    w, h = frame_sizes(img_shape, len(faces))
+
+    # Convertir en coordonnées de pixels entières (troncature comme int())
+    xs = np.trunc(faces[:, :, 0].astype(np.float64) * w[:, None])
+    ys = np.trunc(faces[:, :, 1].astype(np.float64) * h[:, None])
+
+    # Ratio hauteur/largeur de la bouche (évite division par zéro)
+    mouth_width = xs[:, _F_MOUTH_LEFT] - xs[:, _F_MOUTH_RIGHT]
+    mouth_height = ys[:, _F_BOTTOM_LIP] - ys[:, _F_TOP_LIP]
+    mouth_aspect_ratio = mouth_height / np.maximum(mouth_width, 1)
+
+    # Distances des sourcils par rapport au point entre les yeux
+    eyebrow_neutral_y = (ys[:, _F_BETWEEN_EYES] + ys[:, _F_NOSE_BRIDGE]) // 2
+    left_eyebrow_dist = eyebrow_neutral_y - ys[:, _F_LEFT_EYEBROW]
+    right_eyebrow_dist = eyebrow_neutral_y - ys[:, _F_RIGHT_EYEBROW]
+
+    # Sourire : bouche large + coins relevés
+    mouth_corner_y_avg = (ys[:, _F_LEFT_CORNER] + ys[:, _F_RIGHT_CORNER]) / 2
+    smile = (mouth_aspect_ratio > 0.2) & (mouth_corner_y_avg < ys[:, _F_BOTTOM_LIP])
+    # Surprise : sourcils levés + bouche ouverte
+    surprise = (left_eyebrow_dist > 25) & (right_eyebrow_dist > 25) & (mouth_aspect_ratio > 0.5)
+    # Colère : sourcils froncés
+    angry = (left_eyebrow_dist < -5) & (right_eyebrow_dist < -5)
+
+    # La première règle satisfaite l'emporte, dans le même ordre que detect_facial_expression
+    return np.select([smile, surprise, angry], [1, 2, 3], 0)
+
+
+def classify_faces(faces, img_shape):
+    """
+    Args:
+        faces: Tableau de visages (voir expression_codes)
+        img_shape: Dimensions d'image (voir expression_codes)
+
+    Returns:
+        np.ndarray: Étiquettes (dtype object) : expression détectée ou None pour chaque visage
+    """
+    return EXPRESSION_LABELS[expression_codes(faces, img_shape)]
+
+
+def gesture_codes(hands, handedness):
+    """
+    Évalue les règles de gestes sur un lot de mains
+
+    Args:
+        hands: Tableau (N, 21, 3)
+        handedness: Séquence (N,) de "Left"/"Right", ou tableau booléen (True = main droite)
+
+    Returns:
+        np.ndarray: Codes entiers (N,) : 0 = aucun, 1 = OK, 2 = Like, 3 = Coeur, 4 = I Love You
+    """
+    hands = np.asarray(hands).astype(np.float64)
+    handedness = np.asarray(handedness)
+    is_right = handedness if handedness.dtype == bool else handedness == "Right"
+    xs, ys, zs = hands[:, :, 0], hands[:, :, 1], hands[:, :, 2]
+
+    # Distance 3D entre le bout du pouce et le bout de l'index
+    thumb_index_distance = np.sqrt(
+        (xs[:, THUMB_TIP] - xs[:, INDEX_FINGER_TIP])**2 +
+        (ys[:, THUMB_TIP] - ys[:, INDEX_FINGER_TIP])**2 +
+        (zs[:, THUMB_TIP] - zs[:, INDEX_FINGER_TIP])**2
+    )
+
+    # Doigts tendus (bout plus haut que l'articulation) ou pliés (bout plus bas)
+    thumb_up = ys[:, THUMB_TIP] < ys[:, THUMB_IP]
+    index_up = ys[:, INDEX_FINGER_TIP] < ys[:, INDEX_FINGER_PIP]
+    index_down = ys[:, INDEX_FINGER_TIP] > ys[:, INDEX_FINGER_PIP]
+    middle_up = ys[:, MIDDLE_FINGER_TIP] < ys[:, MIDDLE_FINGER_PIP]
+    middle_down = ys[:, MIDDLE_FINGER_TIP] > ys[:, MIDDLE_FINGER_PIP]
+    ring_up = ys[:, RING_FINGER_TIP] < ys[:, RING_FINGER_PIP]
+    ring_down = ys[:, RING_FINGER_TIP] > ys[:, RING_FINGER_PIP]
+    pinky_up = ys[:, PINKY_TIP] < ys[:, PINKY_PIP]
+    pinky_down = ys[:, PINKY_TIP] > ys[:, PINKY_PIP]
+
+    # OK : pouce et index formant un cercle, autres doigts tendus
+    ok = (thumb_index_distance < 0.05) & middle_up & ring_up & pinky_up
+
+    # Like : pouce levé vers l'extérieur selon la main, autres doigts fermés
+    thumb_direction = xs[:, THUMB_TIP] - xs[:, WRIST]
+    is_thumb_up = np.where(is_right, thumb_direction < 0, thumb_direction > 0) & thumb_up
+    fingers_closed = index_down & middle_down & ring_down & pinky_down
+    like = is_thumb_up & fingers_closed
+
+    # Coeur : pouce et index tendus, autres doigts pliés, distance pouce-index intermédiaire
+    heart = (thumb_up & index_up & middle_down & ring_down & pinky_down &
+             (thumb_index_distance > 0.1) & (thumb_index_distance < 0.25))
+
+    # I Love You : pouce, index et auriculaire tendus, majeur et annulaire pliés
+    ily = thumb_up & index_up & middle_down & ring_down & pinky_up
+
+    # La première règle satisfaite l'emporte, dans le même ordre que detect_hand_gesture
+    return np.select([ok, like, heart, ily], [1, 2, 3, 4], 0)
+
+
+def classify_hands(hands, handedness):
+    """
+    Args:
+        hands: Tableau (N, 21, 3)
+        handedness: Latéralité de chaque main (voir gesture_codes)
+
+    Returns:
+        np.ndarray: Étiquettes (dtype object) : geste détecté ou None pour chaque main
+    """
+    return GESTURE_LABELS[gesture_codes(hands, handedness)]
+
+
+def classify_face(face_landmarks, img_shape):
+    """
+    Classe un seul visage en n'extrayant que les points lus par les règles
+
+    Args:
+        face_landmarks: Points clés du visage détectés par MediaPipe
+        img_shape: Dimensions de l'image (hauteur, largeur)
+
+    Returns:
+        String: L'expression détectée ou None si aucune n'est reconnue
+    """
+    return classify_faces(faces_to_array([face_landmarks], gather=True), img_shape)[0]
+
+
+def classify_hand(hand_landmarks, hand_type):
+    """
+    Classe une seule main
+
+    Args:
+        hand_landmarks: Points clés de la main détectés par MediaPipe
+        hand_type: "Left" ou "Right" selon la main détectée
+
+    Returns:
+        String: Le geste détecté ou None si aucun n'est reconnu
+    """
+    return classify_hands(hands_to_array([hand_landmarks]), [hand_type])[0]
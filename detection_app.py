@@ -1,33 +1,185 @@
+import argparse  # Pour les options de la ligne de commande
+import sys  # Pour l'affichage des statistiques de publication
+import threading  # Pour charger les modèles pendant l'affichage de l'écran d'accueil
 import cv2  # Bibliothèque OpenCV pour traitement d'images et vidéos
-import mediapipe as mp  # Bibliothèque Google pour la détection des points clés du visage et des mains
 import numpy as np  # Pour les opérations mathématiques sur les tableaux
 import tkinter as tk  # Bibliothèque pour l'interface graphique
 from tkinter import font as tkfont  # Pour gérer les polices d'affichage
 from PIL import Image, ImageTk  # Pour la manipulation d'images (non utilisé dans ce code)
 
+from capture import ResolutionTuner, configure_capture, describe_mode, open_source, parse_size, probe_modes  # Mode de capture
+from classification import classify_face, classify_faces, classify_hand, classify_hands  # Règles d'expressions et de gestes
+from detectors import DetectorPool, mediapipe_solutions  # Détecteurs MediaPipe (visage et mains), import différé
+from events import EventHub, frame_event, label_event, print_summary  # Diffusion des détections aux autres programmes
+from incremental import face_classifier, hand_classifier  # Classification avec état (vote et hystérésis)
+from instrumentation import NULL_PROFILER, StageProfiler, StatsExporter, draw_stats_overlay  # Latence par étape
+from pipeline import DetectionPipeline  # Pipeline threadé capture / inférence / rendu
+from preprocess import FramePreprocessor  # Miroir, réduction et conversion RGB dans des tampons réutilisés
+from recording import LandmarkRecorder  # Enregistrement des points pour la relecture sans inférence
+from renderer import LandmarkStyle, OverlayRenderer  # Rendu des points et textes sans allocation
+from roi import RegionDetector  # Inférence sur région d'intérêt
+from rules import RuleBook  # Règles déclaratives rechargées à chaud
+from scheduler import AdaptiveDetector, KeyframeScheduler  # Inférence sur images clés et suivi entre deux
+
 class DetectionApp:
     """
     Application de détection d'expressions faciales et de gestes de mains
     utilisant la webcam et les bibliothèques MediaPipe et OpenCV.
     """
-    def __init__(self):
+    def __init__(self, source=0, use_pipeline=False, parallel_inference=False,
+                 show_stats=False, stats_export=None, stats_interval=10.0,
+                 adaptive=False, frame_budget_ms=20.0, roi=False, roi_max_size=None,
+                 record=None, record_dtype='float16', stable_labels=False, rules=None, events=None,
+                 capture_size=(1280, 720), capture_fps=None, fourcc=None, buffer_size=None,
+                 target_fps=None, inference_scale=1.0):
+        """
+        Args:
+            source: Index de la caméra, chemin d'un fichier vidéo ou URL de flux
+            use_pipeline: True pour exécuter capture, inférence et rendu dans des threads séparés
+            parallel_inference: True pour exécuter visage et mains en parallèle en mode 'both'
+            show_stats: True pour incruster la latence par étape et les FPS dans l'image
+            stats_export: Fichier d'export périodique des statistiques (.csv ou .prom)
+            stats_interval: Intervalle entre deux exports en secondes
+            adaptive: True pour n'exécuter l'inférence que sur des images clés et suivre les points entre deux
+            frame_budget_ms: Temps de détection visé par image en mode adaptatif
+            roi: True pour exécuter les détecteurs sur une région autour de la cible précédente
+            roi_max_size: Côté maximal de la région transmise aux détecteurs (None = pas de réduction)
+            record: Dossier où enregistrer les points et les résultats de chaque image (None = pas d'enregistrement)
+            record_dtype: Précision des points enregistrés ('float16' ou 'float32')
+            stable_labels: True pour stabiliser les étiquettes (vote sur les dernières images, hystérésis)
+                           et ne réévaluer les règles que lorsque les points bougent
+            rules: Fichier de règles JSON ou YAML (voir rules.py) remplaçant les règles intégrées,
+                   rechargé dès qu'il est modifié (None = règles de classification.py)
+            events: Adresse ('hôte:port' ou 'unix:/chemin') où publier les détections de chaque image
+                    (voir events.py ; None = pas de publication)
+            capture_size: Résolution de capture demandée (largeur, hauteur)
+            capture_fps: Cadence de capture demandée (None = celle de la caméra)
+            fourcc: Format de capture demandé, par exemple 'MJPG' (None = celui de la caméra)
+            buffer_size: Images gardées en tampon par le pilote (1 = latence minimale, None = défaut)
+            target_fps: Cadence visée : les résolutions d'inférence puis de capture baissent
+                        quand elle n'est pas tenue (None = pas d'ajustement)
+            inference_scale: Échelle de l'image transmise aux détecteurs (1.0 = résolution de capture)
+        """
+        if not 0 < inference_scale <= 1:
+            raise ValueError("inference_scale doit être compris entre 0 et 1")
+        
         # Initialiser les variables de base
         self.is_running = False  # État de l'application
         self.cap = None  # Capture vidéo (sera initialisée plus tard)
         self.detection_mode = None  # Mode de détection: 'face', 'hand', ou 'both'
-        
-        # Configuration de MediaPipe pour la détection du visage
-        self.mp_face_mesh = mp.solutions.face_mesh  # Module pour le maillage facial
+        self.source = source  # Source vidéo (0 = webcam par défaut)
+        self.use_pipeline = use_pipeline  # Mode pipeline threadé
+        self.parallel_inference = parallel_inference  # Visage et mains en parallèle
+        self.detectors = None  # Détecteurs MediaPipe (initialisés selon le mode choisi)
+        self.adaptive = adaptive  # Inférence sur images clés uniquement
+        self.frame_budget_ms = frame_budget_ms  # Budget de détection par image
+        self.adaptive_detector = None  # Planificateur d'images clés (mode adaptatif)
+        self.roi = roi  # Inférence sur région d'intérêt
+        self.roi_max_size = roi_max_size  # Réduction de la région d'intérêt
+        self.region_detector = None  # Détection sur région d'intérêt
+        self.recorder = LandmarkRecorder(record, dtype=record_dtype) if record else None  # Enregistrement des points
+        self.stable_labels = stable_labels  # Classification incrémentale et stabilisée
+        self.face_classifier = None  # Pistes des visages (réinitialisées à chaque session)
+        self.hand_classifier = None  # Pistes des mains
+        self.rule_book = RuleBook(rules) if rules else None  # Règles déclaratives (None = règles intégrées)
+        self.event_hub = EventHub(events).start() if events else None  # Publication des détections
+        self.frame_index = 0  # Numéro de l'image en cours (identifie les événements publiés)
+        self.capture_size = capture_size  # Mode de capture demandé
+        self.capture_fps = capture_fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.target_fps = target_fps  # Cadence visée par l'ajustement des résolutions
+        self.inference_scale = inference_scale  # Réduction de l'image avant les détecteurs
+        self.tuner = None  # Ajustement des résolutions (créé à chaque session si target_fps)
+        self.preprocessor = FramePreprocessor()  # Tampons de l'image miroir et de l'image des détecteurs
+        self.frame_buffer = None  # Tampon de capture réutilisé par la boucle principale
+        
+        # Mesure de la latence par étape (assez légère pour rester toujours active)
+        self.profiler = StageProfiler()
+        self.show_stats = show_stats  # Incrustation des statistiques dans l'image
+        self.stats_exporter = StatsExporter(self.profiler, stats_export, stats_interval) if stats_export else None
+        
+        # Modules MediaPipe : importés en arrière-plan par load_models (import coûteux)
+        self.mp_face_mesh = None  # Module pour le maillage facial
         self.face_mesh = None  # L'objet FaceMesh sera initialisé selon le mode choisi
-        self.mp_drawing = mp.solutions.drawing_utils  # Utilitaires pour dessiner les points clés
-        self.drawing_spec = self.mp_drawing.DrawingSpec(thickness=1, circle_radius=1, color=(0, 255, 0))  # Style de dessin
-        
-        # Configuration de MediaPipe pour la détection des mains
-        self.mp_hands = mp.solutions.hands  # Module pour la détection des mains
+        self.mp_drawing = None  # Utilitaires pour dessiner les points clés
+        self.drawing_spec = None  # Style de dessin du maillage facial
+        self.mp_hands = None  # Module pour la détection des mains
         self.hands = None  # L'objet Hands sera initialisé selon le mode choisi
         
-        # Créer l'écran d'accueil
-        self.create_welcome_screen()
+        # Rendu réutilisant ses tampons (styles créés par load_models)
+        self.renderer = OverlayRenderer()
+        self.face_style = None
+        self.hand_style = None
+        
+        # Détecteurs conservés d'une session à l'autre, préchauffés pendant l'affichage de l'écran d'accueil
+        self.detector_pool = DetectorPool()
+        self.models_error = None  # Exception levée par load_models (None = chargement réussi ou en cours)
+        # Détecteurs sans suivi pour les recadrages de --roi (leur géométrie change à chaque image)
+        self.crop_detector_pool = DetectorPool(static_image_mode=True) if roi else None
+        self.next_mode = None  # Mode choisi sur l'écran d'accueil (None = quitter)
+        self.models_thread = threading.Thread(target=self.load_models, name="load-models", daemon=True)
+        self.models_thread.start()
+        
+        # Afficher l'écran d'accueil ; chaque session de détection y revient après 'q'
+        self.run()
+    
+    def load_models(self):
+        """
+        Importe MediaPipe, prépare les styles de dessin et préchauffe les détecteurs
+        sur une image factice (exécuté dans un thread pendant l'écran d'accueil)
+        
+        Les styles ne sont publiés qu'une fois tout chargé ; en cas d'échec, l'erreur est
+        conservée dans models_error, affichée sur l'écran d'accueil et levée par start_detection
+        """
+        try:
+            solutions = mediapipe_solutions()
+            drawing = solutions.drawing_utils
+            drawing_spec = drawing.DrawingSpec(thickness=1, circle_radius=1, color=(0, 255, 0))
+            
+            # Mêmes styles que mp_drawing.draw_landmarks
+            face_style = LandmarkStyle.from_drawing_specs(
+                solutions.face_mesh.FACEMESH_TESSELATION, drawing_spec, drawing_spec)
+            hand_style = LandmarkStyle.from_drawing_specs(
+                solutions.hands.HAND_CONNECTIONS, drawing.DrawingSpec(color=(0, 0, 255)), drawing.DrawingSpec())
+            
+            # Construire les graphes et payer leur initialisation avant le premier clic
+            self.detector_pool.warm_up('both')
+            if self.crop_detector_pool is not None:
+                self.crop_detector_pool.warm_up('both', shape=(256, 256, 3))
+        except Exception as error:
+            self.models_error = error
+            raise  # Trace complète dans la console (threading.excepthook)
+        
+        self.mp_face_mesh = solutions.face_mesh
+        self.mp_drawing = drawing
+        self.mp_hands = solutions.hands
+        self.drawing_spec = drawing_spec
+        self.face_style = face_style
+        self.hand_style = hand_style
+    
+    def run(self):
+        """
+        Alterne écran d'accueil et sessions de détection jusqu'à ce que
+        l'utilisateur quitte l'application
+        """
+        while True:
+            self.next_mode = None
+            self.create_welcome_screen()  # Rend la main quand la fenêtre d'accueil est fermée
+            if self.next_mode is None:
+                break
+            self.start_detection(self.next_mode)
+        
+        # Libérer les détecteurs partagés et terminer l'enregistrement
+        self.models_thread.join()
+        self.detector_pool.close()
+        if self.crop_detector_pool is not None:
+            self.crop_detector_pool.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.event_hub is not None:
+            print_summary(self.event_hub.summary(), sys.stdout)
+            self.event_hub.close()
         
     def create_welcome_screen(self):
         """
@@ -80,7 +232,7 @@ class DetectionApp:
         face_button = tk.Button(button_frame, text="Détection du Visage", 
                               font=button_font, bg="#4285F4", fg="white",
                               width=button_width, height=button_height,
-                              command=lambda: self.start_detection('face'))
+                              command=lambda: self.select_mode('face'))
         face_button.grid(row=0, column=0, padx=20, pady=20)
         
         # Texte explicatif sous le bouton visage
@@ -92,7 +244,7 @@ class DetectionApp:
         hand_button = tk.Button(button_frame, text="Détection des Mains", 
                               font=button_font, bg="#0F9D58", fg="white",
                               width=button_width, height=button_height,
-                              command=lambda: self.start_detection('hand'))
+                              command=lambda: self.select_mode('hand'))
         hand_button.grid(row=0, column=1, padx=20, pady=20)
         
         # Texte explicatif sous le bouton main
@@ -104,7 +256,7 @@ class DetectionApp:
         both_button = tk.Button(button_frame, text="Les Deux", 
                               font=button_font, bg="#DB4437", fg="white",
                               width=button_width, height=button_height,
-                              command=lambda: self.start_detection('both'))
+                              command=lambda: self.select_mode('both'))
         both_button.grid(row=0, column=2, padx=20, pady=20)
         
         # Texte explicatif sous le bouton combiné
@@ -112,12 +264,17 @@ class DetectionApp:
                            font=desc_font, bg="#121212", fg="#e0e0e0", justify="center")
         both_desc.grid(row=1, column=2, padx=20)
         
-        # Instructions pour quitter l'application
+        # Instructions pour revenir à l'écran d'accueil
         quit_instructions = tk.Label(self.root, 
-                                   text="Pour quitter l'application à tout moment, appuyez sur la touche 'Q'",
+                                   text="Pendant la détection, appuyez sur la touche 'Q' pour revenir à cet écran",
                                    font=desc_font, bg="#121212", fg="#e0e0e0")
         quit_instructions.pack(pady=40)
         
+        # État du chargement des modèles (effectué en arrière-plan)
+        models_status = tk.Label(self.root, text="", font=desc_font, bg="#121212", fg="#9e9e9e")
+        models_status.pack()
+        self.update_models_status(models_status)
+        
         # Bouton de sortie en bas de l'écran (rouge)
         exit_font = tkfont.Font(family="Helvetica", size=14)
         exit_button = tk.Button(self.root, text="Quitter", font=exit_font,
@@ -128,6 +285,28 @@ class DetectionApp:
         # Lancer la boucle principale de l'interface
         self.root.mainloop()
     
+    def update_models_status(self, label):
+        """
+        Affiche l'état du préchauffage des détecteurs et se replanifie tant qu'il n'est pas terminé
+        """
+        if self.models_error is not None:
+            label.config(text=f"Échec du chargement des modèles : {self.models_error}", fg="#f44336")
+        elif self.detector_pool.ready:
+            label.config(text="Modèles prêts")
+        else:
+            label.config(text="Chargement des modèles...")
+            self.root.after(200, self.update_models_status, label)
+    
+    def select_mode(self, mode):
+        """
+        Ferme l'écran d'accueil ; la détection démarre ensuite dans run()
+        
+        Args:
+            mode: 'face', 'hand', ou 'both' pour le type de détection à effectuer
+        """
+        self.next_mode = mode
+        self.root.destroy()
+    
     def exit_application(self):
         """
         Ferme proprement l'application en libérant les ressources
@@ -151,57 +330,8 @@ class DetectionApp:
         Returns:
             String: L'expression détectée ou None si aucune n'est reconnue
         """
-        # Obtenir les dimensions de l'image pour convertir les coordonnées relatives
-        h, w = img_shape[:2]
-        
-        # Convertir les points de repère en coordonnées de pixels (x,y)
-        landmarks = []
-        for landmark in face_landmarks.landmark:
-            x, y = int(landmark.x * w), int(landmark.y * h)
-            landmarks.append((x, y))
-        
-        # Définir les points clés du visage (indices simplifiés du maillage facial MediaPipe)
-        # Sourcils
-        left_eyebrow = [landmarks[65], landmarks[66], landmarks[67]]  # Points du sourcil gauche
-        right_eyebrow = [landmarks[295], landmarks[296], landmarks[297]]  # Points du sourcil droit
-        
-        # Points de la bouche
-        top_lip = landmarks[13]  # Point supérieur de la lèvre
-        bottom_lip = landmarks[14]  # Point inférieur de la lèvre
-        mouth_width = landmarks[78][0] - landmarks[308][0]  # Largeur de la bouche
-        mouth_height = bottom_lip[1] - top_lip[1]  # Hauteur de la bouche
-        mouth_aspect_ratio = mouth_height / max(mouth_width, 1)  # Ratio hauteur/largeur (évite division par zéro)
-        
-        # Coins de la bouche
-        left_mouth_corner = landmarks[61]  # Coin gauche
-        right_mouth_corner = landmarks[291]  # Coin droit
-        
-        # Calculer les distances des sourcils par rapport à un point neutre
-        eyebrow_neutral_y = (landmarks[8][1] + landmarks[168][1]) // 2  # Point entre les yeux
-        left_eyebrow_dist = eyebrow_neutral_y - left_eyebrow[1][1]  # Distance sourcil gauche
-        right_eyebrow_dist = eyebrow_neutral_y - right_eyebrow[1][1]  # Distance sourcil droit
-        
-        # Détecter un sourire (bouche large + coins relevés)
-        smile_threshold = 0.2  # Seuil pour le ratio bouche
-        mouth_corner_y_avg = (left_mouth_corner[1] + right_mouth_corner[1]) / 2  # Position moyenne des coins
-        if mouth_aspect_ratio > smile_threshold and mouth_corner_y_avg < bottom_lip[1]:
-            return "SOURIRE :)"
-        
-        # Détecter la surprise (sourcils levés + bouche ouverte)
-        surprise_eyebrow_threshold = 25  # Seuil pour la hauteur des sourcils
-        surprise_mouth_threshold = 0.5  # Seuil pour l'ouverture de la bouche
-        if (left_eyebrow_dist > surprise_eyebrow_threshold and 
-            right_eyebrow_dist > surprise_eyebrow_threshold and 
-            mouth_aspect_ratio > surprise_mouth_threshold):
-            return "SURPRISE :O"
-        
-        # Détecter le froncement de sourcils (colère)
-        frown_threshold = -5  # Valeur négative car les sourcils descendent
-        if left_eyebrow_dist < frown_threshold and right_eyebrow_dist < frown_threshold:
-            return "FÂCHÉ >:("
-        
-        # Si aucune expression n'est détectée
-        return None
+        # Seuls les points lus par les règles sont extraits (voir classification.py)
+        return classify_face(face_landmarks, img_shape)
     
     def detect_hand_gesture(self, hand_landmarks, hand_type):
         """
@@ -214,85 +344,253 @@ class DetectionApp:
         Returns:
             String: Le geste détecté ou None si aucun n'est reconnu
         """
-        # Obtenir les coordonnées des points clés
-        landmarks = hand_landmarks.landmark
-        
-        # Définir les points importants pour la détection des gestes
-        # Points des bouts des doigts
-        thumb_tip = landmarks[mp.solutions.hands.HandLandmark.THUMB_TIP]  # Bout du pouce
-        index_tip = landmarks[mp.solutions.hands.HandLandmark.INDEX_FINGER_TIP]  # Bout de l'index
-        middle_tip = landmarks[mp.solutions.hands.HandLandmark.MIDDLE_FINGER_TIP]  # Bout du majeur
-        ring_tip = landmarks[mp.solutions.hands.HandLandmark.RING_FINGER_TIP]  # Bout de l'annulaire
-        pinky_tip = landmarks[mp.solutions.hands.HandLandmark.PINKY_TIP]  # Bout de l'auriculaire
-        
-        # Points intermédiaires des doigts
-        thumb_ip = landmarks[mp.solutions.hands.HandLandmark.THUMB_IP]  # Articulation intermédiaire du pouce
-        index_pip = landmarks[mp.solutions.hands.HandLandmark.INDEX_FINGER_PIP]  # Articulation médiane de l'index
-        middle_pip = landmarks[mp.solutions.hands.HandLandmark.MIDDLE_FINGER_PIP]  # Articulation médiane du majeur
-        ring_pip = landmarks[mp.solutions.hands.HandLandmark.RING_FINGER_PIP]  # Articulation médiane de l'annulaire
-        pinky_pip = landmarks[mp.solutions.hands.HandLandmark.PINKY_PIP]  # Articulation médiane de l'auriculaire
-        
-        # Point du poignet
-        wrist = landmarks[mp.solutions.hands.HandLandmark.WRIST]
-        
-        # Calculer la distance entre le pouce et l'index en 3D
-        thumb_index_distance = np.sqrt(
-            (thumb_tip.x - index_tip.x)**2 + 
-            (thumb_tip.y - index_tip.y)**2 + 
-            (thumb_tip.z - index_tip.z)**2
-        )
-        
-        # Détection du geste "OK" (pouce et index formant un cercle)
-        if thumb_index_distance < 0.05:  # Seuil de proximité pour le cercle
-            # Vérifier que les autres doigts sont tendus
-            if middle_tip.y < middle_pip.y and ring_tip.y < ring_pip.y and pinky_tip.y < pinky_pip.y:
-                return "OK 👌"
-        
-        # Détection du geste "Like" (pouce levé, autres doigts fermés)
-        # Le traitement diffère selon qu'il s'agit de la main droite ou gauche
-        if hand_type == "Right":
-            # Pour la main droite, le pouce doit pointer vers la gauche (x plus petit que le poignet)
-            thumb_direction = thumb_tip.x - wrist.x
-            is_thumb_up = thumb_direction < 0 and thumb_tip.y < thumb_ip.y
+        # Règles évaluées sur le tableau NumPy des points clés (voir classification.py)
+        return classify_hand(hand_landmarks, hand_type)
+    
+    def init_detectors(self, mode):
+        """
+        Initialise les détecteurs MediaPipe nécessaires au mode choisi
+        
+        Args:
+            mode: 'face', 'hand', ou 'both' pour le type de détection à effectuer
+        """
+        # Détecteurs du visage et/ou des mains pris dans le pool (exécutés en parallèle si demandé)
+        self.detectors = self.detector_pool.detector_set(mode, parallel=self.parallel_inference)
+        self.face_mesh = self.detectors.face_mesh
+        self.hands = self.detectors.hands
+        
+        # Région d'intérêt : détecteurs exécutés sur un recadrage autour de la cible précédente
+        if self.roi:
+            crop_detectors = self.crop_detector_pool.detector_set(mode, parallel=self.parallel_inference)
+            self.region_detector = RegionDetector(self.detectors, crop_detectors, max_size=self.roi_max_size)
+        
+        # Mode adaptatif : inférence sur les images clés, flux optique entre deux
+        if self.adaptive:
+            self.adaptive_detector = AdaptiveDetector(
+                self.region_detector or self.detectors, KeyframeScheduler(budget_ms=self.frame_budget_ms))
+        
+        # Étiquettes stabilisées : nouvelles pistes pour chaque session
+        if self.stable_labels:
+            self.create_label_classifiers()
+    
+    def create_label_classifiers(self):
+        """
+        Crée les classifieurs incrémentaux avec les règles en vigueur
+        """
+        rule_book = self.rule_book
+        self.face_classifier = face_classifier(rules=rule_book.expressions if rule_book else None)
+        self.hand_classifier = hand_classifier(rules=rule_book.gestures if rule_book else None)
+    
+    def refresh_rules(self):
+        """
+        Recharge le fichier de règles s'il a été modifié et signale le résultat
+        """
+        version, error = self.rule_book.version, self.rule_book.error
+        self.rule_book.reload_if_changed()
+        if self.rule_book.version != version:
+            print(f"Règles rechargées depuis {self.rule_book.path}")
+            if self.stable_labels:
+                self.create_label_classifiers()  # Les étiquettes ont pu changer
+        elif self.rule_book.error and self.rule_book.error != error:
+            print(f"Règles conservées, fichier invalide : {self.rule_book.error}")
+    
+    def process_frame(self, img, profiler=NULL_PROFILER):
+        """
+        Applique l'effet miroir, exécute les détecteurs et classe les points de repère
+        
+        Args:
+            img: Image BGR capturée
+            profiler: StageProfiler recevant la durée de chaque étape
+            
+        Returns:
+            Tuple: (image miroir, Detections, expression faciale ou None, geste de main ou None)
+        """
+        # Image miroir à afficher, et image RGB miroir pour MediaPipe (qui n'accepte pas le BGR d'OpenCV),
+        # réduite si demandé (les points sont normalisés, l'affichage garde la pleine résolution)
+        scale = self.tuner.inference_scale if self.tuner is not None else self.inference_scale
+        img, img_rgb = self.preprocessor.process(img, scale, profiler=profiler)
+        self.frame_index += 1
+        
+        # Variables pour stocker les textes à afficher
+        face_text = None  # Expression faciale détectée
+        hand_text = None  # Geste de main détecté
+        
+        # Détecter (ou suivre entre deux images clés) les visages et/ou les mains
+        detections = self.detect(img, img_rgb, profiler)
+        
+        # Les points sont dessinés par render_frame ; ici, seule la classification
+        # (un appel vectorisé pour tous les visages, un pour toutes les mains)
+        if self.rule_book is not None:
+            self.refresh_rules()
+        expression_rules = self.rule_book.expressions if self.rule_book else None
+        gesture_rules = self.rule_book.gestures if self.rule_book else None
+        expressions = raw_expressions = []  # Expression affichée de chaque visage (ou None) et résultat brut des règles
+        gestures = raw_gestures = []  # Geste affiché de chaque main (ou None) et résultat brut des règles
+        # Avec les étiquettes stabilisées, update() est appelé à chaque image, même sans visage ni main,
+        # pour que les pistes disparues soient oubliées et que leur étiquette repasse à None
+        if self.detection_mode in ['face', 'both'] and (self.face_classifier is not None or len(detections.faces)):
+            if self.face_classifier is not None:
+                sizes = np.tile(img.shape[:2], (len(detections.faces), 1))
+                labels, events = self.face_classifier.update(detections.faces, sizes)
+                self.handle_label_events(events)
+                raw_expressions = list(self.face_classifier.labels[self.face_classifier.last_codes])
+                expressions = list(labels)
+            elif expression_rules is not None:
+                expressions = raw_expressions = list(expression_rules.classify(detections.faces, img.shape))
+            else:
+                expressions = raw_expressions = list(classify_faces(detections.faces, img.shape))
+            # Comme la boucle d'origine : la dernière expression reconnue l'emporte
+            face_text = next((e for e in reversed(expressions) if e), None)
+            profiler.mark('classify')
+        
+        if self.detection_mode in ['hand', 'both'] and (self.hand_classifier is not None or len(detections.hands)):
+            # Seules les mains dont le type (gauche ou droite) est connu sont classées
+            gestures = [None] * len(detections.hands)
+            raw_gestures = [None] * len(detections.hands)
+            known = [i for i, hand_type in enumerate(detections.handedness) if hand_type is not None]
+            if self.hand_classifier is not None:
+                # Appelé même sans main connue pour que les pistes disparues soient oubliées
+                is_right = np.array([detections.handedness[i] == "Right" for i in known], dtype=bool)
+                labels, events = self.hand_classifier.update(detections.hands[known], is_right, groups=is_right)
+                self.handle_label_events(events)
+                for i, gesture, raw in zip(known, labels, self.hand_classifier.labels[self.hand_classifier.last_codes]):
+                    gestures[i] = gesture
+                    raw_gestures[i] = raw
+            elif known:
+                handedness = [detections.handedness[i] for i in known]
+                if gesture_rules is not None:
+                    labels = gesture_rules.classify(detections.hands[known], handedness)
+                else:
+                    labels = classify_hands(detections.hands[known], handedness)
+                for i, gesture in zip(known, labels):
+                    gestures[i] = raw_gestures[i] = gesture
+            hand_text = next((g for g in reversed(gestures) if g), None)
+            profiler.mark('classify')
+        
+        # Enregistrer ce que les détecteurs ont vu pour pouvoir le reclasser plus tard
+        if self.recorder is not None:
+            self.recorder.append(detections, img.shape, raw_expressions, raw_gestures)
+            profiler.mark('record')
+        
+        # Publier les étiquettes (et les points) de l'image, seulement si un programme est abonné
+        if self.event_hub is not None and self.event_hub.active:
+            self.event_hub.publish(frame_event(
+                self.frame_index, expressions, gestures, detections.handedness if gestures else (),
+                detections.faces if expressions else None, detections.hands if gestures else None))
+            profiler.mark('publish')
+        
+        return img, detections, face_text, hand_text
+    
+    def handle_label_events(self, events):
+        """
+        Signale les changements d'étiquette stable (un message par changement)
+        
+        Args:
+            events: Liste de LabelEvent émis par les classifieurs incrémentaux
+        """
+        for event in events:
+            kind = "Visage" if event.kind == 'face' else "Main"
+            print(f"{kind} {event.track}: {event.previous or '-'} -> {event.label or '-'}")
+            if self.event_hub is not None:
+                self.event_hub.publish(label_event(self.frame_index, event))
+    
+    def detect(self, img, img_rgb, profiler=NULL_PROFILER):
+        """
+        Exécute les détecteurs, ou suit les points de l'image précédente si le
+        mode adaptatif est actif et qu'aucune image clé n'est nécessaire
+        
+        Args:
+            img: Image BGR miroir
+            img_rgb: La même image en RGB
+            profiler: StageProfiler recevant la durée de chaque étape
+            
+        Returns:
+            Detections: Visages et mains de l'image
+        """
+        if self.adaptive_detector is not None:
+            return self.adaptive_detector.process(img, img_rgb, profiler)
+        if self.region_detector is not None:
+            return self.region_detector.detect(img_rgb, profiler)
+        return self.detectors.detect(img_rgb, profiler)
+    
+    def stats_lines(self):
+        """
+        Returns:
+            List: Lignes de statistiques propres aux modes actifs (région d'intérêt, images clés)
+        """
+        lines = []
+        if self.region_detector is not None:
+            lines.append(f"ROI: {100 * self.region_detector.last_saving:.0f}% de pixels économisés "
+                         f"({100 * self.region_detector.saving:.0f}% en moyenne)")
+        if self.adaptive_detector is not None:
+            lines.append(f"Images clés: {100 * self.adaptive_detector.keyframe_ratio:.0f}% "
+                         f"(intervalle {self.adaptive_detector.scheduler.interval})")
+        if self.tuner is not None:
+            lines.append(f"Résolution: {self.tuner.describe()}")
+        if self.face_classifier is not None:
+            items = self.face_classifier.items + self.hand_classifier.items
+            evaluations = self.face_classifier.evaluations + self.hand_classifier.evaluations
+            lines.append(f"Règles: {100 * (1 - evaluations / items) if items else 0:.0f}% d'évaluations évitées")
+        return lines
+    
+    def render_frame(self, img, detections, face_text, hand_text, profiler=NULL_PROFILER):
+        """
+        Compose l'image finale : points de repère semi-transparents et textes
+        
+        Args:
+            img: Image miroir renvoyée par process_frame
+            detections: Detections renvoyées par process_frame
+            face_text: Expression faciale détectée ou None
+            hand_text: Geste de main détecté ou None
+            profiler: StageProfiler recevant la durée de chaque étape
+            
+        Returns:
+            Image BGR prête à être affichée (tampon du renderer, réécrit à l'image suivante)
+        """
+        # Dessiner les points de repère sur le calque du renderer (aucune image allouée)
+        renderer = self.renderer
+        renderer.begin(img)
+        if self.detection_mode in ['face', 'both']:
+            for face in detections.faces:
+                renderer.draw_landmarks(face, self.face_style)  # Maillage facial complet
+        if self.detection_mode in ['hand', 'both']:
+            for hand in detections.hands:
+                renderer.draw_landmarks(hand, self.hand_style)  # Points clés et connexions de la main
+        profiler.mark('draw_landmarks')
+        
+        # Fusionner l'image originale avec le calque des points de repère (semi-transparent)
+        combined_img = renderer.blend(img)
+        profiler.mark('addWeighted')
+        
+        # Afficher le titre du mode actif en haut de l'écran
+        mode_title = ""
+        if self.detection_mode == 'face':
+            mode_title = "Mode: Détection d'Expressions Faciales"
+        elif self.detection_mode == 'hand':
+            mode_title = "Mode: Détection de Gestes des Mains"
         else:
-            # Pour la main gauche, le pouce doit pointer vers la droite (x plus grand que le poignet)
-            thumb_direction = thumb_tip.x - wrist.x
-            is_thumb_up = thumb_direction > 0 and thumb_tip.y < thumb_ip.y
-        
-        # Vérifier si les autres doigts sont fermés (y plus grand = position plus basse)
-        fingers_closed = (
-            index_tip.y > index_pip.y and
-            middle_tip.y > middle_pip.y and
-            ring_tip.y > ring_pip.y and
-            pinky_tip.y > pinky_pip.y
-        )
-        
-        # Si pouce levé et autres doigts fermés = Like
-        if is_thumb_up and fingers_closed:
-            return "LIKE 👍"
-        
-        # Détection du geste "Coeur" (pouce et index formant un coeur)
-        # Le pouce et l'index sont tendus, les autres doigts sont fermés
-        if (thumb_tip.y < thumb_ip.y and  # Pouce levé
-            index_tip.y < index_pip.y and  # Index tendu
-            middle_tip.y > middle_pip.y and  # Majeur plié
-            ring_tip.y > ring_pip.y and  # Annulaire plié
-            pinky_tip.y > pinky_pip.y):  # Auriculaire plié
+            mode_title = "Mode: Détection Combinée (Visage et Mains)"
             
-            # Vérifier la distance spécifique entre pouce et index pour le coeur
-            if 0.1 < thumb_index_distance < 0.25:
-                return "COEUR ❤️"
-        
-        # Détection du geste "I Love You" (pouce, index et auriculaire levés)
-        if (thumb_tip.y < thumb_ip.y and  # Pouce levé
-            index_tip.y < index_pip.y and  # Index tendu
-            middle_tip.y > middle_pip.y and  # Majeur plié
-            ring_tip.y > ring_pip.y and  # Annulaire plié
-            pinky_tip.y < pinky_pip.y):  # Auriculaire tendu
-            return "I LOVE YOU 🤟"
-        
-        # Si aucun geste n'est détecté
-        return None
+        # Ajouter le titre du mode sur l'image
+        renderer.put_text(combined_img, mode_title, (20, 30), 0.8, (255, 255, 255), 2)
+        
+        # Afficher les textes de détection en grand sur l'écran
+        y_position = 100  # Position verticale initiale
+        if face_text:
+            # Afficher l'expression faciale détectée
+            renderer.put_text(combined_img, face_text, (50, y_position), 2, (0, 255, 0), 4)
+            y_position += 80  # Décaler pour le prochain texte
+            
+        if hand_text:
+            # Afficher le geste de main détecté
+            renderer.put_text(combined_img, hand_text, (50, y_position), 2, (0, 255, 255), 4)
+        
+        # Afficher l'instruction pour quitter en bas de l'écran
+        renderer.put_text(combined_img, "Appuyez sur 'Q' pour revenir au menu", 
+                          (20, img.shape[0] - 20), 0.8, (255, 255, 255), 2)
+        profiler.mark('putText')
+        
+        return combined_img
     
     def start_detection(self, mode):
         """
@@ -304,148 +602,209 @@ class DetectionApp:
         # Enregistrer le mode de détection choisi
         self.detection_mode = mode
         
-        # Fermer la fenêtre d'accueil Tkinter
-        self.root.destroy()
+        # Attendre la fin du chargement des modèles (en général déjà terminé)
+        self.models_thread.join()
+        if self.models_error is not None:
+            raise RuntimeError(f"Chargement des modèles MediaPipe impossible : {self.models_error}") from self.models_error
+        
+        # Graphes du pool redémarrés : pas de visage ni de main suivi depuis la session précédente
+        self.detector_pool.reset()
         
         # Initialiser les détecteurs MediaPipe selon le mode choisi
-        if mode == 'face' or mode == 'both':
-            # Initialiser le détecteur de visage
-            self.face_mesh = self.mp_face_mesh.FaceMesh(
-                max_num_faces=1,  # Limiter à un seul visage
-                min_detection_confidence=0.5,  # Seuil de confiance pour la détection
-                min_tracking_confidence=0.5  # Seuil de confiance pour le suivi
-            )
-        
-        if mode == 'hand' or mode == 'both':
-            # Initialiser le détecteur de main
-            self.hands = self.mp_hands.Hands(
-                min_detection_confidence=0.7,  # Seuil de confiance pour la détection
-                min_tracking_confidence=0.5,  # Seuil de confiance pour le suivi
-                max_num_hands=2  # Limiter à deux mains maximum
-            )
-        
-        # Initialiser la capture vidéo depuis la webcam (0 = webcam par défaut)
-        self.cap = cv2.VideoCapture(0)
-        # Définir une résolution HD pour la capture
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)  # Largeur
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)  # Hauteur
+        self.init_detectors(mode)
+        
+        # Initialiser la capture vidéo (0 = webcam par défaut, fichier vidéo, ou 'fake' pour une caméra simulée)
+        self.cap = open_source(self.source)
+        # Demander le mode de capture (format, résolution HD par défaut, tampon) ; la caméra peut l'arrondir
+        capture_mode = configure_capture(self.cap, *self.capture_size, fps=self.capture_fps,
+                                         fourcc=self.fourcc, buffer_size=self.buffer_size)
+        print(f"Capture : {describe_mode(capture_mode)}")
+        
+        # Ajustement des résolutions à la cadence visée (capture reconfigurée seulement hors pipeline,
+        # où elle est lue par un autre thread)
+        self.tuner = None
+        if self.target_fps:
+            cap = None if self.use_pipeline else self.cap
+            sizes = [(m.width, m.height) for m in probe_modes(self.cap, fourccs=(capture_mode.fourcc,))] if cap else []
+            self.tuner = ResolutionTuner(self.target_fps, cap, sizes, inference_scale=self.inference_scale)
         
         # Créer une fenêtre OpenCV pour afficher le flux vidéo
         window_name = "Détection Interactive"
         cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
         cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
         
+        if self.use_pipeline:
+            # Mode pipeline : capture, inférence et rendu dans des étages séparés
+            self.run_pipeline(window_name)
+            self.finish_session()
+            return
+        
         # Boucle principale de traitement des images
+        profiler = self.profiler
         while True:
-            # Capturer une image depuis la webcam
-            success, img = self.cap.read()
+            profiler.start_frame()
+            
+            # Capturer une image depuis la webcam (dans le tampon de l'image précédente)
+            success, img = self.cap.read(self.frame_buffer)
+            profiler.mark('capture')
             if not success:
                 print("Échec de la capture d'image")
                 break
+            self.frame_buffer = img  # Réalloué par OpenCV si la résolution change
             
-            # Inverser l'image horizontalement pour créer un effet miroir
-            img = cv2.flip(img, 1)
-            
-            # Convertir l'image en RGB pour MediaPipe (qui n'accepte pas le BGR d'OpenCV)
-            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            
-            # Créer une image de fond noir pour dessiner les points de détection
-            black_img = np.zeros_like(img)
-            
-            # Variables pour stocker les textes à afficher
-            face_text = None  # Expression faciale détectée
-            hand_text = None  # Geste de main détecté
+            # Détecter puis composer l'image finale
+            img, detections, face_text, hand_text = self.process_frame(img, profiler)
+            combined_img = self.render_frame(img, detections, face_text, hand_text, profiler)
             
-            # Traitement selon le mode choisi
-            if self.detection_mode in ['face', 'both']:
-                # Détecter les visages avec MediaPipe
-                face_results = self.face_mesh.process(img_rgb)
-                
-                # Si des visages sont détectés
-                if face_results.multi_face_landmarks:
-                    for face_landmarks in face_results.multi_face_landmarks:
-                        # Dessiner le maillage facial sur l'image noire
-                        self.mp_drawing.draw_landmarks(
-                            image=black_img,
-                            landmark_list=face_landmarks,
-                            connections=self.mp_face_mesh.FACEMESH_TESSELATION,  # Tous les points reliés
-                            landmark_drawing_spec=self.drawing_spec,
-                            connection_drawing_spec=self.drawing_spec
-                        )
-                        
-                        # Analyser l'expression faciale
-                        expression = self.detect_facial_expression(face_landmarks, img.shape)
-                        if expression:
-                            face_text = expression
-            
-            if self.detection_mode in ['hand', 'both']:
-                # Détecter les mains avec MediaPipe
-                hand_results = self.hands.process(img_rgb)
-                
-                # Si des mains sont détectées
-                if hand_results.multi_hand_landmarks:
-                    for i, hand_landmarks in enumerate(hand_results.multi_hand_landmarks):
-                        # Dessiner les points clés et connexions de la main
-                        self.mp_drawing.draw_landmarks(
-                            black_img, 
-                            hand_landmarks, 
-                            self.mp_hands.HAND_CONNECTIONS
-                        )
-                        
-                        # Obtenir le type de main (gauche ou droite)
-                        if hand_results.multi_handedness:
-                            hand_type = hand_results.multi_handedness[i].classification[0].label
-                            
-                            # Analyser le geste de la main
-                            gesture = self.detect_hand_gesture(hand_landmarks, hand_type)
-                            if gesture:
-                                hand_text = gesture
-            
-            # Fusionner l'image originale avec l'image des points de repère (semi-transparente)
-            combined_img = cv2.addWeighted(img, 0.7, black_img, 0.3, 0)
-            
-            # Afficher le titre du mode actif en haut de l'écran
-            mode_title = ""
-            if self.detection_mode == 'face':
-                mode_title = "Mode: Détection d'Expressions Faciales"
-            elif self.detection_mode == 'hand':
-                mode_title = "Mode: Détection de Gestes des Mains"
-            else:
-                mode_title = "Mode: Détection Combinée (Visage et Mains)"
-                
-            # Ajouter le titre du mode sur l'image
-            cv2.putText(combined_img, mode_title, (20, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-            
-            # Afficher les textes de détection en grand sur l'écran
-            y_position = 100  # Position verticale initiale
-            if face_text:
-                # Afficher l'expression faciale détectée
-                cv2.putText(combined_img, face_text, (50, y_position), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 0), 4)
-                y_position += 80  # Décaler pour le prochain texte
-                
-            if hand_text:
-                # Afficher le geste de main détecté
-                cv2.putText(combined_img, hand_text, (50, y_position), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 255), 4)
-            
-            # Afficher l'instruction pour quitter en bas de l'écran
-            cv2.putText(combined_img, "Appuyez sur 'Q' pour quitter", 
-                        (20, img.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 
-                        0.8, (255, 255, 255), 2)
+            # Incruster les statistiques (recalculées au plus deux fois par seconde)
+            if self.show_stats:
+                draw_stats_overlay(combined_img, profiler.summary(max_age=0.5), extra_lines=self.stats_lines())
+                profiler.mark('overlay')
             
             # Afficher l'image finale
             cv2.imshow(window_name, combined_img)
+            key = cv2.waitKey(1)
+            profiler.mark('imshow')
+            timings = profiler.end_frame()
+            
+            # Ajuster les résolutions selon le temps de traitement (attente de la caméra exclue)
+            if self.tuner is not None and self.tuner.update(timings['total'] - timings.get('capture', 0.0)):
+                self.resolution_changed()
+            
+            # Exporter périodiquement les statistiques
+            if self.stats_exporter is not None:
+                self.stats_exporter.maybe_export()
             
             # Quitter la boucle si la touche 'q' est pressée
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if key & 0xFF == ord('q'):
                 break
         
+        # Exporter les dernières statistiques
+        if self.stats_exporter is not None:
+            self.stats_exporter.export()
+        
         # Nettoyer les ressources à la fin
         self.cap.release()  # Libérer la caméra
         cv2.destroyAllWindows()  # Fermer toutes les fenêtres OpenCV
+        self.finish_session()
+    
+    def resolution_changed(self):
+        """
+        Signale un ajustement du ResolutionTuner et oublie l'état lié à l'ancienne résolution
+        (image précédente du flux optique, régions d'intérêt)
+        """
+        print(f"Résolution ajustée : {self.tuner.describe()}")
+        if self.adaptive_detector is not None:
+            self.adaptive_detector.reset()
+        if self.region_detector is not None:
+            self.region_detector.reset()
+    
+    def finish_session(self):
+        """
+        Termine une session de détection avant le retour à l'écran d'accueil
+        """
+        self.detectors.close()  # Les graphes restent dans le pool pour la session suivante
+        if self.region_detector is not None:
+            self.region_detector.close()
+        if self.recorder is not None:
+            self.recorder.flush()  # Écrire le paquet en cours
+    
+    def run_pipeline(self, window_name):
+        """
+        Exécute la détection avec le pipeline threadé : la capture et l'inférence
+        tournent en arrière-plan et seule l'image la plus récente est affichée
+        
+        Args:
+            window_name: Nom de la fenêtre OpenCV d'affichage
+        """
+        profiler = self.profiler
+        
+        def infer(img):
+            # Seul l'étage d'inférence est mesuré étape par étape (il tourne dans son propre thread)
+            profiler.start_frame()
+            result = self.process_frame(img, profiler)
+            timings = profiler.end_frame()
+            if self.tuner is not None and self.tuner.update(timings['total']):
+                self.resolution_changed()
+            return result
+        
+        def render(packet):
+            # Composer l'image finale à partir du résultat de l'inférence
+            combined_img = self.render_frame(*packet.result)
+            if self.show_stats:
+                draw_stats_overlay(combined_img, profiler.summary(max_age=0.5), extra_lines=self.stats_lines())
+            if self.stats_exporter is not None:
+                self.stats_exporter.maybe_export()
+            # Afficher la latence de l'image précédente (capture -> affichage)
+            if pipeline.latencies:
+                cv2.putText(combined_img, f"Latence: {1000 * pipeline.latencies[-1]:.0f} ms",
+                            (combined_img.shape[1] - 260, 30), cv2.FONT_HERSHEY_SIMPLEX,
+                            0.8, (255, 255, 255), 2)
+            cv2.imshow(window_name, combined_img)
+            # Renvoyer False pour arrêter le pipeline si la touche 'q' est pressée
+            return not (cv2.waitKey(1) & 0xFF == ord('q'))
+        
+        # L'image miroir passe au thread de rendu pendant que l'image suivante est préparée :
+        # elle ne peut pas être réécrite dans le même tampon
+        self.preprocessor = FramePreprocessor(reuse_display=False)
+        pipeline = DetectionPipeline(self.cap, infer, render)
+        stats = pipeline.run()  # Libère la caméra à la fin
+        print(f"Pipeline: {stats['frames_rendered']} images affichées, "
+              f"{stats['dropped_before_inference']} jetées avant l'inférence, "
+              f"latence moyenne {stats['latency_mean_ms'] or 0:.1f} ms")
+        cv2.destroyAllWindows()  # Fermer toutes les fenêtres OpenCV
 
 # Point d'entrée du programme
 if __name__ == "__main__":
-    app = DetectionApp()  # Créer et lancer l'application
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Application de Détection Interactive")
+    parser.add_argument('--source', default='0',
+                        help="Index de la caméra, chemin d'un fichier vidéo, ou 'fake' pour une caméra simulée (défaut: 0)")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Capture, inférence et rendu dans des threads séparés")
+    parser.add_argument('--parallel', action='store_true',
+                        help="En mode 'Les Deux', exécuter visage et mains en parallèle")
+    parser.add_argument('--stats', action='store_true',
+                        help="Incruster la latence par étape (p50/p95/p99) et les FPS dans l'image")
+    parser.add_argument('--stats-export', metavar='FICHIER',
+                        help="Exporter périodiquement les statistiques (.csv ou .prom pour Prometheus)")
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                        help="Intervalle entre deux exports en secondes (défaut: 10)")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Inférence sur des images clés seulement, points suivis par flux optique entre deux")
+    parser.add_argument('--frame-budget-ms', type=float, default=20.0,
+                        help="Temps de détection visé par image en mode adaptatif (défaut: 20 ms)")
+    parser.add_argument('--roi', action='store_true',
+                        help="Exécuter les détecteurs sur une région autour de la cible de l'image précédente")
+    parser.add_argument('--roi-max-size', type=int, metavar='PIXELS',
+                        help="Réduire la région d'intérêt à ce côté maximal avant l'inférence")
+    parser.add_argument('--record', metavar='DOSSIER',
+                        help="Enregistrer les points et les résultats de chaque image (relecture: python recording.py DOSSIER)")
+    parser.add_argument('--record-dtype', choices=('float16', 'float32'), default='float16',
+                        help="Précision des points enregistrés (défaut: float16)")
+    parser.add_argument('--rules', metavar='FICHIER',
+                        help="Règles d'expressions et de gestes en JSON ou YAML, rechargées dès que le fichier change")
+    parser.add_argument('--stable-labels', action='store_true',
+                        help="Stabiliser les étiquettes (vote et hystérésis) et ne réévaluer les règles que si les points bougent")
+    parser.add_argument('--events', nargs='?', const='127.0.0.1:8765', metavar='ADRESSE',
+                        help="Publier les détections de chaque image (JSON Lines) sur hôte:port ou unix:/chemin "
+                             "(défaut: 127.0.0.1:8765 ; abonné : python events.py)")
+    parser.add_argument('--capture-size', type=parse_size, default=(1280, 720), metavar='LxH',
+                        help="Résolution de capture demandée (défaut: 1280x720)")
+    parser.add_argument('--capture-fps', type=float, help="Cadence de capture demandée (défaut: celle de la caméra)")
+    parser.add_argument('--fourcc', help="Format de capture, par exemple MJPG (liste: python capture.py --probe)")
+    parser.add_argument('--buffer-size', type=int, help="Images gardées en tampon par la caméra (1 = latence minimale)")
+    parser.add_argument('--target-fps', type=float,
+                        help="Cadence visée : baisser les résolutions d'inférence puis de capture si elle n'est pas tenue")
+    parser.add_argument('--inference-scale', type=float, default=1.0,
+                        help="Échelle de l'image transmise aux détecteurs (défaut: 1.0)")
+    args = parser.parse_args()
+    app = DetectionApp(source=args.source, use_pipeline=args.pipeline,
+                       parallel_inference=args.parallel, show_stats=args.stats,
+                       stats_export=args.stats_export, stats_interval=args.stats_interval,
+                       adaptive=args.adaptive, frame_budget_ms=args.frame_budget_ms,
+                       roi=args.roi, roi_max_size=args.roi_max_size,
+                       record=args.record, record_dtype=args.record_dtype,
+                       stable_labels=args.stable_labels, rules=args.rules, events=args.events,
+                       capture_size=args.capture_size, capture_fps=args.capture_fps, fourcc=args.fourcc,
+                       buffer_size=args.buffer_size, target_fps=args.target_fps,
+                       inference_scale=args.inference_scale)  # Créer et lancer l'application
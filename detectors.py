@@ -0,0 +1,401 @@
+"""
+Création et exécution des détecteurs MediaPipe (maillage facial et mains).
+
+Le DetectorSet regroupe les détecteurs nécessaires à un mode de détection et
+permet, en mode 'both', d'exécuter le visage et les mains en parallèle.
+Detections présente les résultats d'une image indifféremment sous forme de
+listes de points MediaPipe ou de tableaux NumPy. Le DetectorPool conserve les
+graphes MediaPipe d'une session à l'autre et peut les préchauffer en arrière-plan.
+
+L'import de MediaPipe (environ une seconde) n'a lieu qu'à la création du
+premier détecteur.
+"""
+import threading  # Pour le préchauffage en arrière-plan
+import time  # Pour mesurer la durée du préchauffage
+from concurrent.futures import ThreadPoolExecutor  # Pour exécuter les deux détecteurs en parallèle
+
+import numpy as np  # Pour les opérations mathématiques sur les tableaux
+
+from classification import FACE_LANDMARK_COUNT, HAND_LANDMARK_COUNT, handedness_labels, landmarks_to_array
+
+DETECTION_MODES = ('face', 'hand', 'both')
+
+
+def mediapipe_solutions():
+    """
+    Importe MediaPipe à la première utilisation (import coûteux)
+
+    Returns:
+        Module: mediapipe.solutions
+    """
+    import mediapipe as mp  # Bibliothèque Google pour la détection des points clés du visage et des mains
+    return mp.solutions
+
+
+def create_face_mesh(static_image_mode=False):
+    """
+    Args:
+        static_image_mode: True pour des images indépendantes (pas de suivi entre images)
+
+    Returns:
+        FaceMesh: Détecteur de maillage facial configuré comme dans l'application
+    """
+    return mediapipe_solutions().face_mesh.FaceMesh(
+        static_image_mode=static_image_mode,
+        max_num_faces=1,  # Limiter à un seul visage
+        min_detection_confidence=0.5,  # Seuil de confiance pour la détection
+        min_tracking_confidence=0.5  # Seuil de confiance pour le suivi
+    )
+
+
+def create_hands(static_image_mode=False):
+    """
+    Args:
+        static_image_mode: True pour des images indépendantes (pas de suivi entre images)
+
+    Returns:
+        Hands: Détecteur de mains configuré comme dans l'application
+    """
+    return mediapipe_solutions().hands.Hands(
+        static_image_mode=static_image_mode,
+        min_detection_confidence=0.7,  # Seuil de confiance pour la détection
+        min_tracking_confidence=0.5,  # Seuil de confiance pour le suivi
+        max_num_hands=2  # Limiter à deux mains maximum
+    )
+
+
+def array_to_landmark_list(points):
+    """
+    Args:
+        points: Tableau (nombre de points, 3) de coordonnées normalisées x, y, z
+
+    Returns:
+        NormalizedLandmarkList: Liste de points utilisable par mp.solutions.drawing_utils
+    """
+    from mediapipe.framework.formats import landmark_pb2  # Import différé (voir mediapipe_solutions)
+    return landmark_pb2.NormalizedLandmarkList(landmark=[
+        landmark_pb2.NormalizedLandmark(x=x, y=y, z=z) for x, y, z in points.tolist()
+    ])
+
+
+class Detections:
+    """
+    Visages et mains détectés (ou suivis) sur une image.
+
+    Les points sont disponibles sous forme de listes MediaPipe (pour le dessin)
+    et de tableaux NumPy (pour la classification par lot et le suivi) ; chaque
+    représentation n'est construite qu'à la première demande.
+    """
+    def __init__(self, faces=None, hands=None, handedness=None,
+                 face_lists=None, hand_lists=None, keyframe=True):
+        """
+        Args:
+            faces: Tableau (N, 468, 3) des visages, ou None si face_lists est fourni
+            hands: Tableau (M, 21, 3) des mains, ou None si hand_lists est fourni
+            handedness: "Left"/"Right" (ou None si inconnu) pour chaque main
+            face_lists: Listes de points MediaPipe des visages
+            hand_lists: Listes de points MediaPipe des mains
+            keyframe: True si les points viennent de l'inférence, False s'ils ont été suivis
+        """
+        self._faces = faces
+        self._hands = hands
+        self._face_lists = face_lists
+        self._hand_lists = hand_lists
+        self.handedness = list(handedness or [])
+        self.keyframe = keyframe
+
+    @classmethod
+    def from_results(cls, face_results, hand_results):
+        """
+        Args:
+            face_results: Résultats de FaceMesh.process (ou None)
+            hand_results: Résultats de Hands.process (ou None)
+
+        Returns:
+            Detections: Résultats de l'inférence
+        """
+        face_lists = list(face_results.multi_face_landmarks or []) if face_results is not None else []
+        hand_lists = list(hand_results.multi_hand_landmarks or []) if hand_results is not None else []
+        handedness = handedness_labels(hand_results.multi_handedness) if hand_lists else []
+        # Latéralité inconnue pour les mains sans classification
+        handedness += [None] * (len(hand_lists) - len(handedness))
+        return cls(face_lists=face_lists, hand_lists=hand_lists, handedness=handedness)
+
+    @property
+    def faces(self):
+        """
+        np.ndarray: Tableau float32 (N, 468, 3) des visages
+        """
+        if self._faces is None:
+            self._faces = (landmarks_to_array(self._face_lists) if self._face_lists
+                           else np.empty((0, FACE_LANDMARK_COUNT, 3), dtype=np.float32))
+        return self._faces
+
+    @property
+    def hands(self):
+        """
+        np.ndarray: Tableau float32 (M, 21, 3) des mains
+        """
+        if self._hands is None:
+            self._hands = (landmarks_to_array(self._hand_lists) if self._hand_lists
+                           else np.empty((0, HAND_LANDMARK_COUNT, 3), dtype=np.float32))
+        return self._hands
+
+    def face_landmark_lists(self):
+        """
+        Returns:
+            List: NormalizedLandmarkList de chaque visage
+        """
+        if self._face_lists is None:
+            self._face_lists = [array_to_landmark_list(face) for face in self._faces]
+        return self._face_lists
+
+    def hand_landmark_lists(self):
+        """
+        Returns:
+            List: NormalizedLandmarkList de chaque main
+        """
+        if self._hand_lists is None:
+            self._hand_lists = [array_to_landmark_list(hand) for hand in self._hands]
+        return self._hand_lists
+
+    @property
+    def empty(self):
+        """
+        True si aucun visage ni aucune main n'a été détecté
+        """
+        face_count = len(self._face_lists) if self._face_lists is not None else len(self._faces)
+        hand_count = len(self._hand_lists) if self._hand_lists is not None else len(self._hands)
+        return face_count == 0 and hand_count == 0
+
+
+class DetectorSet:
+    """
+    Détecteurs MediaPipe nécessaires à un mode de détection.
+
+    En mode 'both' avec parallel=True, la détection des mains est soumise à un
+    thread de travail pendant que le maillage facial tourne dans le thread
+    appelant : MediaPipe passe l'essentiel de son temps dans du code natif qui
+    relâche le GIL, une image coûte donc environ le temps du détecteur le plus
+    lent au lieu de la somme des deux.
+    """
+    def __init__(self, mode, parallel=False, static_image_mode=False, pool=None):
+        """
+        Args:
+            mode: 'face', 'hand', ou 'both'
+            parallel: True pour exécuter les deux détecteurs en parallèle en mode 'both'
+            static_image_mode: True pour des images indépendantes (dossiers d'images)
+            pool: DetectorPool fournissant des détecteurs déjà créés (None = créer les siens)
+        """
+        if mode not in DETECTION_MODES:
+            raise ValueError(f"Mode de détection inconnu: {mode!r}")
+        self.mode = mode
+        self.pool = pool
+        if pool is not None:
+            # Détecteurs partagés : ils restent ouverts à la fermeture du DetectorSet
+            self.face_mesh = pool.face_mesh() if mode in ('face', 'both') else None
+            self.hands = pool.hands() if mode in ('hand', 'both') else None
+        else:
+            self.face_mesh = create_face_mesh(static_image_mode) if mode in ('face', 'both') else None
+            self.hands = create_hands(static_image_mode) if mode in ('hand', 'both') else None
+        self.parallel = parallel and mode == 'both'
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hands") if self.parallel else None
+
+    def process(self, img_rgb, profiler=None):
+        """
+        Exécute les détecteurs sur une image RGB
+
+        Args:
+            img_rgb: Image RGB (lue seulement par les détecteurs)
+            profiler: StageProfiler optionnel recevant les étapes 'face_mesh' et 'hands'
+                      (en parallèle, 'hands' ne mesure que l'attente restante après le visage)
+
+        Returns:
+            Tuple: (résultats FaceMesh ou None, résultats Hands ou None)
+        """
+        return self.process_images(img_rgb, img_rgb, profiler)
+
+    def process_images(self, face_rgb, hand_rgb, profiler=None):
+        """
+        Exécute chaque détecteur sur sa propre image (par exemple une région recadrée)
+
+        Args:
+            face_rgb: Image RGB pour le maillage facial (None = ne pas l'exécuter)
+            hand_rgb: Image RGB pour les mains (None = ne pas l'exécuter)
+            profiler: StageProfiler optionnel (voir process)
+
+        Returns:
+            Tuple: (résultats FaceMesh ou None, résultats Hands ou None)
+        """
+        face_results = hand_results = None
+        run_face = self.face_mesh is not None and face_rgb is not None
+        run_hands = self.hands is not None and hand_rgb is not None
+        if self._executor is not None and run_face and run_hands:
+            # Lancer les mains en arrière-plan, le visage dans le thread courant, puis joindre
+            hand_future = self._executor.submit(self.hands.process, hand_rgb)
+            face_results = self.face_mesh.process(face_rgb)
+            if profiler is not None:
+                profiler.mark('face_mesh')
+            hand_results = hand_future.result()
+            if profiler is not None:
+                profiler.mark('hands')
+            return face_results, hand_results
+
+        if run_face:
+            face_results = self.face_mesh.process(face_rgb)
+            if profiler is not None:
+                profiler.mark('face_mesh')
+        if run_hands:
+            hand_results = self.hands.process(hand_rgb)
+            if profiler is not None:
+                profiler.mark('hands')
+        return face_results, hand_results
+
+    def detect(self, img_rgb, profiler=None):
+        """
+        Exécute les détecteurs et regroupe leurs résultats
+
+        Args:
+            img_rgb: Image RGB
+            profiler: StageProfiler optionnel (voir process)
+
+        Returns:
+            Detections: Visages et mains détectés
+        """
+        return Detections.from_results(*self.process(img_rgb, profiler))
+
+    def close(self):
+        """
+        Libère le thread de travail et les graphes MediaPipe (sauf ceux du DetectorPool)
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.pool is not None:
+            return
+        if self.face_mesh is not None:
+            self.face_mesh.close()
+        if self.hands is not None:
+            self.hands.close()
+
+
+class DetectorPool:
+    """
+    Détecteurs MediaPipe créés une seule fois et réutilisés d'une session à
+    l'autre (changement de mode, retour à l'écran d'accueil).
+
+    warm_up() importe MediaPipe, construit les graphes et les exécute sur une
+    image noire : la première image réelle ne paie plus l'initialisation. Il
+    est prévu pour tourner dans un thread pendant que l'écran d'accueil est
+    affiché (start_warm_up) ; les accès aux détecteurs attendent sa fin.
+    """
+    def __init__(self, static_image_mode=False):
+        """
+        Args:
+            static_image_mode: True pour des images indépendantes (pas de suivi entre images)
+        """
+        self.static_image_mode = static_image_mode
+        self._face_mesh = None
+        self._hands = None
+        self._lock = threading.Lock()  # Un seul thread crée ou préchauffe les détecteurs
+        self._thread = None
+        self.warm_up_time = None  # Durée du préchauffage en secondes (None = pas encore fait)
+
+    def face_mesh(self):
+        """
+        Returns:
+            FaceMesh: Détecteur de maillage facial partagé (créé au premier appel)
+        """
+        with self._lock:
+            if self._face_mesh is None:
+                self._face_mesh = create_face_mesh(self.static_image_mode)
+            return self._face_mesh
+
+    def hands(self):
+        """
+        Returns:
+            Hands: Détecteur de mains partagé (créé au premier appel)
+        """
+        with self._lock:
+            if self._hands is None:
+                self._hands = create_hands(self.static_image_mode)
+            return self._hands
+
+    def detector_set(self, mode, parallel=False):
+        """
+        Returns:
+            DetectorSet: Détecteurs du mode demandé, pris dans le pool (après la fin du préchauffage)
+        """
+        self.wait()
+        return DetectorSet(mode, parallel=parallel, pool=self)
+
+    def warm_up(self, mode='both', shape=(720, 1280, 3)):
+        """
+        Crée les détecteurs du mode et les exécute une fois sur une image noire
+
+        Args:
+            mode: 'face', 'hand', ou 'both'
+            shape: Dimensions de l'image factice (celles de la caméra de préférence)
+        """
+        start = time.perf_counter()
+        dummy = np.zeros(shape, dtype=np.uint8)
+        if mode in ('face', 'both'):
+            self.face_mesh().process(dummy)
+        if mode in ('hand', 'both'):
+            self.hands().process(dummy)
+        self.warm_up_time = time.perf_counter() - start
+
+    def start_warm_up(self, mode='both', shape=(720, 1280, 3)):
+        """
+        Lance warm_up() dans un thread d'arrière-plan
+
+        Returns:
+            threading.Thread: Thread de préchauffage
+        """
+        self._thread = threading.Thread(target=self.warm_up, args=(mode, shape),
+                                        name="warm-up", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def wait(self, timeout=None):
+        """
+        Attend la fin du préchauffage éventuellement en cours
+
+        Returns:
+            Bool: True si aucun préchauffage n'est en cours
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    @property
+    def ready(self):
+        """
+        True une fois le préchauffage terminé
+        """
+        return self.warm_up_time is not None
+
+    def reset(self):
+        """
+        Redémarre les graphes déjà créés pour oublier les visages et les mains suivis
+        à la session précédente (quelques millisecondes, les modèles restent chargés)
+        """
+        self.wait()
+        with self._lock:
+            for detector in (self._face_mesh, self._hands):
+                if detector is not None:
+                    detector.reset()
+
+    def close(self):
+        """
+        Libère les graphes MediaPipe
+        """
+        self.wait()
+        with self._lock:
+            if self._face_mesh is not None:
+                self._face_mesh.close()
+                self._face_mesh = None
+            if self._hands is not None:
+                self._hands.close()
+                self._hands = None
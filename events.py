@@ -0,0 +1,461 @@
+"""
+Diffusion des détections vers d'autres programmes (publication / abonnement).
+
+L'EventHub fait tourner une boucle asyncio dans un thread à part et écoute sur
+une socket locale (TCP, par défaut 127.0.0.1:8765, ou Unix avec
+'unix:/chemin/socket'). La boucle de détection publie un événement par image
+sans jamais attendre les abonnés : publish() ne fait que confier l'événement à
+la boucle asyncio, et ne fait rien du tout tant que personne n'est abonné.
+
+Protocole : une ligne JSON par événement (JSON Lines).
+    {"type": "frame", "frame": 12, "time": 1712345678.123,
+     "faces": [{"label": "SOURIRE :)"}], "hands": [{"label": null, "handedness": "Right"}]}
+    {"type": "label", "frame": 12, "time": 1712345678.123,
+     "kind": "face", "track": 3, "previous": null, "label": "SOURIRE :)"}
+'time' est l'heure de l'image (time.time()). Un abonné qui envoie la ligne
+{"landmarks": true} reçoit aussi les points (x, y, z normalisés, 4 décimales)
+de chaque visage et de chaque main des événements 'frame'.
+
+Chaque abonné a sa propre file bornée : un abonné lent ne ralentit ni la
+détection ni les autres abonnés. Dans sa file, un événement 'frame' remplace
+l'événement 'frame' encore en attente (seul l'état le plus récent compte) ;
+si la file reste pleine, les événements les plus anciens sont jetés. La
+latence de remise (publication -> écriture dans la socket) est mesurée par
+abonné.
+
+Utilisation (abonné en ligne de commande) :
+    python events.py 127.0.0.1:8765 --landmarks
+"""
+import argparse  # Pour les options de la ligne de commande
+import asyncio  # Pour le serveur et les abonnés
+import collections  # Pour la file à double entrée (deque)
+import json  # Pour l'encodage des événements
+import os  # Pour la suppression de la socket Unix
+import threading  # Pour la boucle asyncio en arrière-plan
+import time  # Pour les horodatages et les latences
+
+import numpy as np  # Pour l'arrondi des points
+
+from instrumentation import StageProfiler
+
+DEFAULT_ADDRESS = '127.0.0.1:8765'
+DELIVERY_STAGE = 'delivery'  # Latence de remise (publication -> écriture dans la socket)
+FRAME_KEY = 'frame'  # Événements fusionnés dans la file d'un abonné
+LANDMARK_DECIMALS = 4
+LINE_LIMIT = 2 ** 20  # Longueur maximale d'une ligne lue (événements avec points)
+
+
+def parse_address(address):
+    """
+    Args:
+        address: 'hôte:port' ou 'unix:/chemin/socket'
+
+    Returns:
+        Tuple: ('tcp', (hôte, port)) ou ('unix', chemin)
+    """
+    if address.startswith('unix:'):
+        return 'unix', address[len('unix:'):]
+    host, separator, port = address.rpartition(':')
+    if not separator or not port.isdigit():
+        raise ValueError(f"Adresse invalide: {address!r} (hôte:port ou unix:/chemin)")
+    return 'tcp', (host or '127.0.0.1', int(port))
+
+
+def _points(landmarks):
+    return np.round(np.asarray(landmarks, dtype=np.float64), LANDMARK_DECIMALS).tolist()
+
+
+class Event:
+    """
+    Événement publié, encodé au plus une fois avec et une fois sans les points
+    """
+    __slots__ = ('payload', 'faces', 'hands', 'key', 'published', '_lines')
+
+    def __init__(self, payload, faces=None, hands=None, key=None):
+        """
+        Args:
+            payload: Dictionnaire JSON de l'événement (sans les points)
+            faces: Tableau (N, 468, 3) des points des visages de payload['faces'], ou None
+            hands: Tableau (M, 21, 3) des points des mains de payload['hands'], ou None
+            key: Clé de fusion (un événement remplace celui de même clé en attente), ou None
+        """
+        self.payload = payload
+        self.faces = faces
+        self.hands = hands
+        self.key = key
+        self.published = time.perf_counter()
+        self._lines = {}
+
+    def encode(self, landmarks=False):
+        """
+        Returns:
+            Bytes: Ligne JSON terminée par un saut de ligne
+        """
+        landmarks = landmarks and (self.faces is not None or self.hands is not None)
+        line = self._lines.get(landmarks)
+        if line is None:
+            payload = self.payload
+            if landmarks:
+                # Les points ne sont convertis que si un abonné les a demandés
+                payload = dict(payload)
+                for field, points in (('faces', self.faces), ('hands', self.hands)):
+                    if points is not None:
+                        payload[field] = [dict(item, landmarks=_points(item_points))
+                                          for item, item_points in zip(payload[field], points)]
+            line = self._lines[landmarks] = (
+                json.dumps(payload, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+        return line
+
+
+def frame_event(frame_id, expressions=(), gestures=(), handedness=(), faces=None, hands=None, timestamp=None):
+    """
+    Événement 'frame' : étiquettes de tous les visages et de toutes les mains d'une image
+
+    Args:
+        frame_id: Numéro de l'image
+        expressions: Expression (ou None) de chaque visage
+        gestures: Geste (ou None) de chaque main
+        handedness: "Left"/"Right" (ou None) de chaque main
+        faces: Points (N, 468, 3) des visages, ou None
+        hands: Points (M, 21, 3) des mains, ou None
+        timestamp: Heure de l'image (défaut: time.time())
+    """
+    payload = {
+        'type': 'frame',
+        'frame': int(frame_id),
+        'time': time.time() if timestamp is None else timestamp,
+        'faces': [{'label': label} for label in expressions],
+        'hands': [{'label': label, 'handedness': hand_type} for label, hand_type in zip(gestures, handedness)],
+    }
+    # Copies : les tableaux des détecteurs peuvent être réutilisés avant l'encodage
+    faces = None if faces is None else np.array(faces)
+    hands = None if hands is None else np.array(hands)
+    return Event(payload, faces, hands, key=FRAME_KEY)
+
+
+def label_event(frame_id, event, timestamp=None):
+    """
+    Événement 'label' : changement d'étiquette stable d'une piste
+
+    Args:
+        frame_id: Numéro de l'image
+        event: LabelEvent émis par un IncrementalClassifier
+        timestamp: Heure de l'image (défaut: time.time())
+    """
+    payload = {
+        'type': 'label',
+        'frame': int(frame_id),
+        'time': time.time() if timestamp is None else timestamp,
+        'kind': event.kind,
+        'track': int(event.track),
+        'previous': event.previous,
+        'label': event.label,
+    }
+    return Event(payload)
+
+
+class _Subscriber:
+    """
+    Abonné connecté : file bornée avec fusion, options et statistiques
+    """
+    def __init__(self, name, writer, queue_size, stats_window):
+        self.name = name
+        self.writer = writer
+        self.queue_size = queue_size
+        self.landmarks = False  # Points demandés par l'abonné
+        self.pending = collections.deque()
+        self.ready = asyncio.Event()
+        self.profiler = StageProfiler(window=stats_window)
+        self.delivered = 0  # Événements écrits dans la socket
+        self.coalesced = 0  # Événements 'frame' remplacés par un plus récent avant l'envoi
+        self.dropped = 0  # Événements jetés, file pleine
+        self.tasks = []  # Envoi et lecture des options
+
+    def push(self, event):
+        """
+        Ajoute un événement à la file (boucle asyncio uniquement)
+        """
+        pending = self.pending
+        if event.key is not None:
+            index = next((i for i, queued in enumerate(pending) if queued.key == event.key), None)
+            if index is not None:
+                del pending[index]
+                self.coalesced += 1
+        if len(pending) >= self.queue_size:
+            # Jeter de préférence un état d'image plutôt qu'un changement d'étiquette
+            index = next((i for i, queued in enumerate(pending) if queued.key is not None), 0)
+            del pending[index]
+            self.dropped += 1
+        pending.append(event)
+        self.ready.set()
+
+    async def send_loop(self):
+        writer = self.writer
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            while self.pending:
+                event = self.pending.popleft()
+                writer.write(event.encode(self.landmarks))
+                await writer.drain()  # Attend seulement si la socket de cet abonné est saturée
+                now = time.perf_counter()
+                self.profiler.record({DELIVERY_STAGE: now - event.published}, now)
+                self.delivered += 1
+
+    async def read_loop(self, reader):
+        """
+        Lit les options envoyées par l'abonné jusqu'à sa déconnexion
+        """
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                options = json.loads(line)
+            except ValueError:
+                continue  # Ligne illisible ignorée
+            if isinstance(options, dict) and 'landmarks' in options:
+                self.landmarks = bool(options['landmarks'])
+
+    def summary(self):
+        """
+        Returns:
+            Dict: Compteurs et latences de remise en millisecondes
+        """
+        latency = self.profiler.summary()['stages'].get(DELIVERY_STAGE, {})
+        return {
+            'delivered': self.delivered,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'pending': len(self.pending),
+            'landmarks': self.landmarks,
+            'latency_p50_ms': latency.get('p50_ms'),
+            'latency_p95_ms': latency.get('p95_ms'),
+            'latency_p99_ms': latency.get('p99_ms'),
+        }
+
+
+class EventHub:
+    """
+    Serveur de publication des détections (boucle asyncio dans un thread d'arrière-plan)
+    """
+    def __init__(self, address=DEFAULT_ADDRESS, queue_size=16, stats_window=1000, write_buffer=16384):
+        """
+        Args:
+            address: 'hôte:port' (port 0 = choisi par le système) ou 'unix:/chemin/socket'
+            queue_size: Événements en attente par abonné
+            stats_window: Nombre de remises conservées pour les latences de chaque abonné
+            write_buffer: Octets en attente dans la socket d'un abonné au-delà desquels ses
+                          événements restent dans sa file (où ils peuvent être fusionnés)
+        """
+        if queue_size < 1:
+            raise ValueError("queue_size doit être supérieur ou égal à 1")
+        self.kind, self.target = parse_address(address)
+        self.queue_size = queue_size
+        self.stats_window = stats_window
+        self.write_buffer = write_buffer
+        self.address = address  # Adresse effective une fois le serveur démarré
+        self.published = 0  # Événements publiés alors qu'au moins un abonné était connecté
+        self.error = None
+        self._subscribers = {}  # Nom -> _Subscriber (modifié par la boucle asyncio uniquement)
+        self._disconnected = {}  # Nom -> statistiques finales des abonnés déconnectés
+        self._loop = None
+        self._stopped = None
+        self._started = threading.Event()
+        self._thread = None
+
+    def start(self, timeout=10.0):
+        """
+        Démarre le serveur et attend qu'il écoute
+
+        Returns:
+            EventHub: self
+        """
+        self._thread = threading.Thread(target=self._run, name="event-hub", daemon=True)
+        self._thread.start()
+        if not self._started.wait(timeout):
+            raise RuntimeError("Serveur d'événements non démarré: délai dépassé")
+        if self.error is not None:
+            raise self.error
+        return self
+
+    @property
+    def active(self):
+        """
+        True si au moins un abonné est connecté
+        """
+        return bool(self._subscribers)
+
+    def publish(self, event):
+        """
+        Publie un événement sans attendre (appelable depuis n'importe quel thread)
+        """
+        if not self._subscribers or self._loop is None:
+            return
+        self.published += 1
+        self._loop.call_soon_threadsafe(self._fanout, event)
+
+    def _fanout(self, event):
+        for subscriber in self._subscribers.values():
+            subscriber.push(event)
+
+    def _run(self):
+        loop = self._loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._serve())
+        except Exception as exc:  # Remonter l'erreur (adresse occupée...) à start()
+            self.error = exc
+            self._started.set()
+        finally:
+            loop.close()
+
+    async def _serve(self):
+        self._stopped = asyncio.Event()
+        if self.kind == 'unix':
+            server = await asyncio.start_unix_server(self._handle, path=self.target, limit=LINE_LIMIT)
+        else:
+            host, port = self.target
+            server = await asyncio.start_server(self._handle, host, port, limit=LINE_LIMIT)
+            self.address = "{}:{}".format(*server.sockets[0].getsockname()[:2])
+        handlers = self._handlers = set()  # Connexions en cours
+        self._started.set()
+        await self._stopped.wait()
+        server.close()
+        # Arrêt : la fin des tâches d'un abonné termine sa connexion
+        for subscriber in self._subscribers.values():
+            for task in subscriber.tasks:
+                task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        """
+        Sert un abonné de sa connexion à sa déconnexion
+        """
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        peer = writer.get_extra_info('peername')
+        name = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else f"unix-{id(writer):x}"
+        writer.transport.set_write_buffer_limits(high=self.write_buffer)
+        subscriber = _Subscriber(name, writer, self.queue_size, self.stats_window)
+        self._subscribers = dict(self._subscribers, **{name: subscriber})  # Copie lue par publish()
+        tasks = subscriber.tasks = [asyncio.ensure_future(subscriber.send_loop()),
+                                    asyncio.ensure_future(subscriber.read_loop(reader))]
+        try:
+            # La connexion se termine à la déconnexion de l'abonné ou à la première erreur d'écriture
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self._subscribers = {key: value for key, value in self._subscribers.items() if key != name}
+            self._disconnected[name] = subscriber.summary()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)  # Erreurs de connexion ignorées
+            writer.close()
+            self._handlers.discard(handler)
+
+    def summary(self):
+        """
+        Returns:
+            Dict: Événements publiés et statistiques de chaque abonné ('connected' = encore connecté)
+        """
+        subscribers = {name: dict(stats, connected=False) for name, stats in self._disconnected.items()}
+        for name, subscriber in list(self._subscribers.items()):
+            subscribers[name] = dict(subscriber.summary(), connected=True)
+        return {'address': self.address, 'published': self.published, 'subscribers': subscribers}
+
+    def close(self, timeout=5.0):
+        """
+        Déconnecte les abonnés et arrête le serveur
+        """
+        if self._thread is None:
+            return
+        if self._loop is not None and self._stopped is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join(timeout)
+        self._thread = None
+        if self.kind == 'unix' and os.path.exists(self.target):
+            os.unlink(self.target)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+async def subscribe(address=DEFAULT_ADDRESS, landmarks=False):
+    """
+    Abonné asyncio (autre programme, ou client de test dans le même processus)
+
+    Utilisation :
+        async for event in subscribe('127.0.0.1:8765'):
+            print(event['type'], event['frame'])
+
+    Args:
+        address: Adresse de l'EventHub
+        landmarks: True pour recevoir les points des visages et des mains
+
+    Yields:
+        Dict: Événement décodé
+    """
+    kind, target = parse_address(address)
+    if kind == 'unix':
+        reader, writer = await asyncio.open_unix_connection(target, limit=LINE_LIMIT)
+    else:
+        reader, writer = await asyncio.open_connection(*target, limit=LINE_LIMIT)
+    try:
+        if landmarks:
+            writer.write(b'{"landmarks": true}\n')
+            await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            yield json.loads(line)
+    finally:
+        writer.close()
+
+
+def print_summary(summary, stream):
+    """
+    Affiche un tableau des statistiques de remise par abonné
+    """
+    print(f"Événements: {summary['published']} publiés sur {summary['address']}", file=stream)
+    for name, stats in summary['subscribers'].items():
+        latencies = [stats[key] for key in ('latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms')]
+        latencies = '/'.join(f"{value:.1f}" if value is not None else '-' for value in latencies)
+        state = "" if stats['connected'] else " (déconnecté)"
+        print(f"  {name}{state}: {stats['delivered']} remis, {stats['coalesced']} fusionnés, "
+              f"{stats['dropped']} jetés, latence p50/p95/p99 {latencies} ms", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Affiche les événements publiés par detection_app.py --events")
+    parser.add_argument('address', nargs='?', default=DEFAULT_ADDRESS,
+                        help=f"Adresse du serveur d'événements (défaut: {DEFAULT_ADDRESS})")
+    parser.add_argument('--landmarks', action='store_true', help="Recevoir aussi les points")
+    parser.add_argument('--count', type=int, help="S'arrêter après ce nombre d'événements")
+    parser.add_argument('--changes', action='store_true', help="N'afficher que les changements d'étiquette")
+    args = parser.parse_args(argv)
+
+    async def listen():
+        received = 0
+        async for event in subscribe(args.address, args.landmarks):
+            received += 1
+            if not args.changes or event['type'] == 'label':
+                # Retard mesuré avec l'heure de l'image (même machine)
+                delay = 1000 * (time.time() - event['time'])
+                print(f"{delay:6.1f} ms {json.dumps(event, ensure_ascii=False)}")
+            if args.count and received >= args.count:
+                return
+
+    try:
+        asyncio.run(listen())
+    except KeyboardInterrupt:
+        pass
+    except OSError as exc:
+        raise SystemExit(f"Connexion impossible à {args.address}: {exc}")
+
+
+if __name__ == "__main__":
+    main()
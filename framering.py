@@ -0,0 +1,178 @@
+"""
+Anneau d'images en mémoire partagée entre la capture et les processus d'inférence.
+
+Transmettre une image 1280x720 par multiprocessing.Queue la sérialise (environ
+2,7 Mo copiés deux fois par image). Le FrameRing réserve à la place un bloc
+multiprocessing.shared_memory découpé en emplacements de taille fixe : la
+capture écrit directement dans un emplacement (cap.read(ring.frame(slot))),
+puis seul le couple (emplacement, numéro de séquence) est transmis ; le
+processus d'inférence lit l'image comme une vue NumPy, sans copie.
+
+Chaque emplacement a un état (libre, en écriture, prêt) et un numéro de
+séquence en mémoire partagée :
+- seul le producteur fait passer un emplacement de libre à en écriture puis à
+  prêt, et il ne réutilise jamais un emplacement qui n'a pas été libéré ;
+- le numéro de séquence est invalidé au début de l'écriture et attribué à la
+  publication : un lecteur qui vérifie le numéro reçu avant et après la lecture
+  ne peut pas utiliser une image partiellement écrite ou déjà remplacée ;
+- le propriétaire de l'image (processus d'inférence, ou producteur si l'image
+  est jetée avant l'inférence) libère l'emplacement quand il a fini.
+"""
+from multiprocessing import shared_memory  # Pour le bloc de mémoire partagé entre processus
+
+import numpy as np  # Pour les vues sur la mémoire partagée
+
+FORMAT_VERSION = 1
+FREE, WRITING, READY = 0, 1, 2  # États d'un emplacement
+_HEADER_FIELDS = 8  # En-tête : version, emplacements, hauteur, largeur, canaux, prochaine séquence
+_ALIGN = 64  # Alignement des images (ligne de cache)
+
+
+def _layout(slots, shape):
+    """
+    Returns:
+        Tuple: (décalage des états, décalage des images, taille d'une image, taille totale) en octets
+    """
+    frame_bytes = int(np.prod(shape))
+    states_offset = 8 * (_HEADER_FIELDS + slots)
+    frames_offset = -(-(states_offset + slots) // _ALIGN) * _ALIGN
+    frame_stride = -(-frame_bytes // _ALIGN) * _ALIGN
+    return states_offset, frames_offset, frame_stride, frames_offset + slots * frame_stride
+
+
+class FrameRing:
+    """
+    Emplacements d'images uint8 de forme fixe en mémoire partagée
+    """
+    def __init__(self, slots, shape, name=None, _shm=None):
+        """
+        Crée un anneau (utiliser FrameRing.attach() pour ouvrir un anneau existant)
+
+        Args:
+            slots: Nombre d'emplacements
+            shape: Forme des images (hauteur, largeur, canaux)
+            name: Nom du bloc partagé (None = nom unique choisi par le système)
+        """
+        if slots < 1:
+            raise ValueError("Il faut au moins un emplacement")
+        self.slots = slots
+        self.shape = tuple(shape)
+        states_offset, frames_offset, self._frame_stride, size = _layout(slots, self.shape)
+        self.owner = _shm is None  # Seul le créateur supprime le bloc
+        self._shm = _shm or shared_memory.SharedMemory(name=name, create=True, size=size)
+        buffer = self._shm.buf
+        self._header = np.ndarray(_HEADER_FIELDS, dtype=np.int64, buffer=buffer)
+        self._sequences = np.ndarray(slots, dtype=np.int64, buffer=buffer, offset=8 * _HEADER_FIELDS)
+        self._states = np.ndarray(slots, dtype=np.int8, buffer=buffer, offset=states_offset)
+        self._frames = [np.ndarray(self.shape, dtype=np.uint8, buffer=buffer,
+                                   offset=frames_offset + slot * self._frame_stride)
+                        for slot in range(slots)]
+        if self.owner:
+            self._header[:6] = (FORMAT_VERSION, slots, *self.shape, 1)
+            self._sequences[:] = -1
+            self._states[:] = FREE
+        self._next_slot = 0
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Ouvre un anneau créé par un autre processus
+
+        Args:
+            name: Nom du bloc partagé (FrameRing.name)
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        header = np.ndarray(_HEADER_FIELDS, dtype=np.int64, buffer=shm.buf)
+        if header[0] != FORMAT_VERSION:
+            version = int(header[0])
+            del header
+            shm.close()
+            raise ValueError(f"Version d'anneau non prise en charge: {version}")
+        slots, shape = int(header[1]), tuple(int(value) for value in header[2:5])
+        del header
+        return cls(slots, shape, _shm=shm)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def frame_bytes(self):
+        return int(np.prod(self.shape))
+
+    def free_slots(self):
+        """
+        Returns:
+            Int: Nombre d'emplacements libres
+        """
+        return int(np.count_nonzero(self._states == FREE))
+
+    def acquire(self):
+        """
+        Réserve un emplacement libre pour y écrire une image (producteur uniquement)
+
+        Returns:
+            Int: Emplacement réservé, ou None si aucun n'est libre
+        """
+        free = np.flatnonzero(self._states == FREE)
+        if not free.size:
+            return None
+        # Emplacements pris à tour de rôle (le plus ancien libéré d'abord en régime établi)
+        slot = int(free[np.searchsorted(free, self._next_slot) % free.size])
+        self._states[slot] = WRITING
+        self._sequences[slot] = -1  # Invalide les lectures en cours d'une ancienne image
+        self._next_slot = slot + 1
+        return slot
+
+    def frame(self, slot):
+        """
+        Returns:
+            np.ndarray: Vue (hauteur, largeur, canaux) sur l'image de l'emplacement (aucune copie)
+        """
+        return self._frames[slot]
+
+    def publish(self, slot):
+        """
+        Rend l'image écrite disponible (producteur uniquement)
+
+        Returns:
+            Int: Numéro de séquence à transmettre au lecteur avec l'emplacement
+        """
+        sequence = int(self._header[5])
+        self._header[5] = sequence + 1
+        self._sequences[slot] = sequence
+        self._states[slot] = READY
+        return sequence
+
+    def is_current(self, slot, sequence):
+        """
+        Returns:
+            Bool: True si l'emplacement contient toujours l'image publiée sous ce numéro
+        """
+        return self._states[slot] == READY and self._sequences[slot] == sequence
+
+    def release(self, slot):
+        """
+        Libère un emplacement (par le propriétaire de l'image)
+        """
+        self._states[slot] = FREE
+
+    def close(self):
+        """
+        Ferme l'accès à l'anneau dans ce processus (et le supprime s'il en est le créateur)
+        """
+        if self._shm is None:
+            return
+        # Les vues doivent disparaître avant la fermeture du bloc
+        self._header = self._sequences = self._states = None
+        self._frames = []
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,326 @@
+"""
+Classification incrémentale et stabilisée des expressions et des gestes.
+
+Les règles de classification.py donnent une étiquette indépendante à chaque
+image : elles sont réévaluées même quand la pose n'a pas bougé, et l'étiquette
+affichée clignote près des seuils. L'IncrementalClassifier ajoute un état :
+- chaque visage ou main est associé à une piste (point moyen le plus proche,
+  et même latéralité pour les mains) qui garde son dernier résultat ;
+- les règles ne sont réévaluées que pour les pistes dont un point a bougé de
+  plus de epsilon depuis la dernière évaluation ;
+- les derniers résultats d'une piste votent dans un tampon circulaire : une
+  nouvelle étiquette n'est adoptée qu'avec enter_votes voix sur window, et
+  l'étiquette courante n'est abandonnée que sous exit_votes voix (hystérésis) ;
+- un LabelEvent n'est émis que lorsque l'étiquette stable d'une piste change.
+
+evaluate() rejoue un enregistrement (voir recording.py) pour mesurer les
+évaluations économisées et la stabilité des étiquettes :
+    python incremental.py session/ --epsilon 0.002 --window 7
+"""
+import argparse  # Pour les options de la ligne de commande
+import collections  # Pour les événements de changement d'étiquette
+import itertools  # Pour numéroter les pistes
+
+import numpy as np  # Pour les opérations mathématiques sur les tableaux
+
+from classification import (EXPRESSION_LABELS, FACE_RULE_INDICES, GESTURE_LABELS,
+                            expression_codes, gesture_codes)
+
+# Changement de l'étiquette stable d'une piste (previous / label : étiquette ou None)
+LabelEvent = collections.namedtuple('LabelEvent', 'frame kind track previous label')
+
+
+class _Track:
+    """
+    État d'un visage ou d'une main suivi d'une image à l'autre
+    """
+    __slots__ = ('track_id', 'group', 'centroid', 'points', 'context', 'code',
+                 'history', 'position', 'stable', 'missed')
+
+    def __init__(self, track_id, group, window):
+        self.track_id = track_id
+        self.group = group  # Latéralité pour les mains (une main gauche ne devient pas droite)
+        self.centroid = None  # Point moyen à la dernière image
+        self.points = None  # Points lors de la dernière évaluation des règles
+        self.context = None  # Contexte (taille d'image, latéralité) lors de la dernière évaluation
+        self.code = 0  # Dernier résultat brut des règles
+        self.history = np.full(window, -1, dtype=np.int16)  # Tampon circulaire des résultats (-1 = vide)
+        self.position = 0
+        self.stable = 0  # Étiquette émise (code)
+        self.missed = 0  # Images consécutives sans correspondance
+
+
+class IncrementalClassifier:
+    """
+    Classification avec état d'un type d'élément (visages ou mains)
+    """
+    def __init__(self, codes_fn, labels, kind, indices=None, epsilon=0.002, window=7,
+                 enter_votes=4, exit_votes=2, max_distance=0.15, max_missed=5):
+        """
+        Args:
+            codes_fn: Règles par lot, (points (N, P, 3), contexte (N, ...)) -> codes (N,)
+            labels: Tableau code -> étiquette (code 0 = aucune détection)
+            kind: Nom du type d'élément repris dans les événements ('face' ou 'hand')
+            indices: Points lus par les règles (les autres sont ignorés), None = tous
+            epsilon: Déplacement maximal d'un point (coordonnées normalisées) sans réévaluation
+            window: Nombre de résultats conservés pour le vote
+            enter_votes: Voix nécessaires pour adopter une nouvelle étiquette
+            exit_votes: Voix en dessous desquelles l'étiquette courante est abandonnée
+            max_distance: Distance maximale entre points moyens pour poursuivre une piste
+            max_missed: Nombre d'images sans correspondance avant de supprimer une piste
+        """
+        if not 0 < exit_votes <= enter_votes <= window:
+            raise ValueError("Il faut 0 < exit_votes <= enter_votes <= window")
+        self.codes_fn = codes_fn
+        self.labels = labels
+        self.kind = kind
+        self.indices = indices
+        self.epsilon = epsilon
+        self.window = window
+        self.enter_votes = enter_votes
+        self.exit_votes = exit_votes
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.tracks = []
+        self.frames = 0  # Nombre d'appels à update()
+        self.items = 0  # Nombre d'éléments reçus
+        self.evaluations = 0  # Nombre d'éléments réellement évalués par les règles
+        self.last_codes = np.zeros(0, dtype=np.int16)  # Résultats bruts de chaque élément du dernier appel
+        self._ids = itertools.count(1)
+
+    def update(self, points, context, groups=None):
+        """
+        Classe les éléments d'une image
+
+        Args:
+            points: Tableau (N, P, 3) de points normalisés
+            context: Contexte par élément transmis aux règles (tableau (N, ...))
+            groups: Groupe de chaque élément (N,) ; seules les pistes du même groupe correspondent
+
+        Returns:
+            Tuple: (étiquettes stables (N,) de dtype object, liste des LabelEvent émis)
+        """
+        self.frames += 1
+        points = np.asarray(points, dtype=np.float32)
+        if self.indices is not None and len(points) and points.shape[1] != len(self.indices):
+            points = points[:, self.indices]
+        context = np.asarray(context)
+        count = len(points)
+        groups = np.zeros(count, dtype=np.int8) if groups is None else np.asarray(groups)
+        self.items += count
+
+        tracks = self._match(points, groups)
+
+        # Réévaluer seulement les éléments dont la pose ou le contexte a changé
+        stale = [i for i, track in enumerate(tracks)
+                 if track.points is None
+                 or np.abs(points[i] - track.points).max() > self.epsilon
+                 or not np.array_equal(context[i], track.context)]
+        if stale:
+            codes = self.codes_fn(points[stale], context[stale])
+            self.evaluations += len(stale)
+            for i, code in zip(stale, codes):
+                track = tracks[i]
+                track.points = points[i].copy()
+                track.context = context[i].copy()
+                track.code = int(code)
+
+        events = []
+        labels = np.empty(count, dtype=object)
+        self.last_codes = np.array([track.code for track in tracks], dtype=np.int16)
+        for i, track in enumerate(tracks):
+            previous = track.stable
+            self._vote(track)
+            if track.stable != previous:
+                events.append(LabelEvent(self.frames, self.kind, track.track_id,
+                                         self.labels[previous], self.labels[track.stable]))
+            labels[i] = self.labels[track.stable]
+
+        # Pistes perdues : supprimées après max_missed images (l'étiquette repasse à None)
+        kept = []
+        for track in self.tracks:
+            if track.missed > self.max_missed:
+                if track.stable:
+                    events.append(LabelEvent(self.frames, self.kind, track.track_id,
+                                             self.labels[track.stable], None))
+            else:
+                kept.append(track)
+        self.tracks = kept
+        return labels, events
+
+    def _match(self, points, groups):
+        """
+        Associe chaque élément à une piste existante (la plus proche) ou nouvelle
+
+        Returns:
+            List: Piste de chaque élément
+        """
+        centroids = points[:, :, :2].mean(axis=1) if len(points) else np.empty((0, 2), dtype=np.float32)
+        matched = [None] * len(points)
+        free = list(self.tracks)
+        if free and len(points):
+            # Appariement glouton par distance croissante entre points moyens
+            track_centroids = np.array([track.centroid for track in free])
+            distances = np.linalg.norm(centroids[:, None] - track_centroids[None], axis=2)
+            distances[groups[:, None] != np.array([track.group for track in free])[None]] = np.inf
+            for flat in np.argsort(distances, axis=None):
+                i, j = divmod(int(flat), len(free))
+                if distances[i, j] > self.max_distance:
+                    break
+                if matched[i] is None and free[j] is not None:
+                    matched[i], free[j] = free[j], None
+        for track in free:
+            if track is not None:
+                track.missed += 1
+        for i, track in enumerate(matched):
+            if track is None:
+                track = _Track(next(self._ids), groups[i], self.window)
+                self.tracks.append(track)
+                matched[i] = track
+            track.centroid = centroids[i]
+            track.missed = 0
+        return matched
+
+    def _vote(self, track):
+        """
+        Ajoute le dernier résultat au tampon circulaire et applique l'hystérésis
+        """
+        track.history[track.position] = track.code
+        track.position = (track.position + 1) % self.window
+        votes = np.bincount(track.history[track.history >= 0], minlength=len(self.labels))
+        # Seules les étiquettes entrent par enter_votes : l'absence d'étiquette (code 0) ne
+        # remplace l'étiquette courante que lorsque celle-ci passe sous exit_votes
+        candidate = int(votes[1:].argmax()) + 1
+        if candidate != track.stable and votes[candidate] >= self.enter_votes:
+            track.stable = candidate
+        elif votes[track.stable] < self.exit_votes:
+            # Étiquette courante trop peu soutenue et aucune autre majoritaire : aucune détection
+            track.stable = 0
+
+    @property
+    def saved_ratio(self):
+        """
+        Proportion des éléments dont l'évaluation des règles a été évitée
+        """
+        return 1 - self.evaluations / self.items if self.items else 0.0
+
+    def reset(self):
+        """
+        Oublie toutes les pistes (les compteurs sont conservés)
+        """
+        self.tracks = []
+
+
+def face_classifier(rules=None, **options):
+    """
+    Args:
+        rules: RuleSet des expressions (voir rules.py), None pour les règles de classification.py
+
+    Returns:
+        IncrementalClassifier: Expressions ; contexte = (hauteur, largeur) de l'image de chaque visage
+    """
+    if rules is not None:
+        return IncrementalClassifier(rules.codes, rules.labels, 'face', indices=rules.indices, **options)
+    return IncrementalClassifier(expression_codes, EXPRESSION_LABELS, 'face', indices=FACE_RULE_INDICES, **options)
+
+
+def hand_classifier(rules=None, **options):
+    """
+    Args:
+        rules: RuleSet des gestes (voir rules.py), None pour les règles de classification.py
+
+    Returns:
+        IncrementalClassifier: Gestes ; contexte et groupe = True pour une main droite
+    """
+    if rules is not None:
+        return IncrementalClassifier(rules.codes, rules.labels, 'hand', indices=rules.indices, **options)
+    return IncrementalClassifier(gesture_codes, GESTURE_LABELS, 'hand', **options)
+
+
+def _displayed(labels):
+    """
+    Étiquette affichée par l'application : la dernière non vide
+    """
+    return next((label for label in reversed(list(labels)) if label), None)
+
+
+def evaluate(recording, **options):
+    """
+    Rejoue un enregistrement avec et sans état, et mesure le gain et la stabilité
+
+    Args:
+        recording: Recording (voir recording.py)
+        options: Paramètres des IncrementalClassifier
+
+    Returns:
+        Dict: items (éléments classés), evaluations, saved_ratio, changements de
+              l'étiquette affichée image après image (raw_changes / stable_changes)
+              et par minute, events, agreement (part des images où l'étiquette
+              stable est l'étiquette brute)
+    """
+    faces, hands = face_classifier(**options), hand_classifier(**options)
+    stats = {'frames': 0, 'raw_changes': 0, 'stable_changes': 0, 'events': 0, 'agreement': 0}
+    previous_raw = previous_stable = None
+    first_time = last_time = None
+    for timestamp, frame_size, face_points, hand_points, handedness in recording.iter_frames():
+        first_time = timestamp if first_time is None else first_time
+        last_time = timestamp
+        sizes = np.tile(frame_size, (len(face_points), 1))
+        face_labels, face_events = faces.update(face_points, sizes)
+        # Comme dans l'application, les mains de latéralité inconnue ne sont pas classées
+        known = [i for i, label in enumerate(handedness) if label is not None]
+        is_right = np.array([handedness[i] == "Right" for i in known], dtype=bool)
+        hand_labels, hand_events = hands.update(hand_points[known], is_right, groups=is_right)
+
+        # Référence sans état : toutes les règles réévaluées à chaque image
+        raw = EXPRESSION_LABELS[expression_codes(face_points, sizes)] if len(face_points) else ()
+        raw_gestures = GESTURE_LABELS[gesture_codes(hand_points[known], is_right)] if known else ()
+
+        # Étiquette affichée (expression et geste) image après image
+        raw_display = (_displayed(raw), _displayed(raw_gestures))
+        stable_display = (_displayed(face_labels), _displayed(hand_labels))
+        stats['frames'] += 1
+        stats['raw_changes'] += previous_raw is not None and raw_display != previous_raw
+        stats['stable_changes'] += previous_stable is not None and stable_display != previous_stable
+        stats['agreement'] += raw_display == stable_display
+        stats['events'] += len(face_events) + len(hand_events)
+        previous_raw, previous_stable = raw_display, stable_display
+
+    minutes = (last_time - first_time) / 60 if stats['frames'] > 1 and last_time > first_time else None
+    items = faces.items + hands.items
+    evaluations = faces.evaluations + hands.evaluations
+    stats.update(
+        items=items, evaluations=evaluations,
+        saved_ratio=1 - evaluations / items if items else 0.0,
+        agreement=stats['agreement'] / stats['frames'] if stats['frames'] else 0.0,
+        raw_changes_per_minute=stats['raw_changes'] / minutes if minutes else None,
+        stable_changes_per_minute=stats['stable_changes'] / minutes if minutes else None,
+    )
+    return stats
+
+
+def main(argv=None):
+    from recording import Recording  # Uniquement pour la relecture
+
+    parser = argparse.ArgumentParser(description="Mesure le gain et la stabilité de la classification incrémentale")
+    parser.add_argument('path', help="Dossier d'un enregistrement (python detection_app.py --record DOSSIER)")
+    parser.add_argument('--epsilon', type=float, default=0.002, help="Déplacement sans réévaluation (défaut: 0.002)")
+    parser.add_argument('--window', type=int, default=7, help="Taille du tampon de vote (défaut: 7)")
+    parser.add_argument('--enter-votes', type=int, default=4, help="Voix pour adopter une étiquette (défaut: 4)")
+    parser.add_argument('--exit-votes', type=int, default=2, help="Voix pour conserver une étiquette (défaut: 2)")
+    args = parser.parse_args(argv)
+
+    stats = evaluate(Recording(args.path), epsilon=args.epsilon, window=args.window,
+                     enter_votes=args.enter_votes, exit_votes=args.exit_votes)
+    print(f"{stats['frames']} images, {stats['items']} visages et mains")
+    print(f"Évaluations des règles : {stats['evaluations']} ({100 * stats['saved_ratio']:.1f}% évitées)")
+    print(f"Changements de l'étiquette affichée : {stats['raw_changes']} sans état, "
+          f"{stats['stable_changes']} avec état ({stats['events']} événements)")
+    if stats['raw_changes_per_minute'] is not None:
+        print(f"Par minute : {stats['raw_changes_per_minute']:.1f} sans état, "
+              f"{stats['stable_changes_per_minute']:.1f} avec état")
+    print(f"Images où les deux étiquettes coïncident : {100 * stats['agreement']:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
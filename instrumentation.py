@@ -0,0 +1,290 @@
+"""
+Mesure de la latence par étape de la boucle de détection.
+
+Le StageProfiler découpe chaque image en étapes (capture, flip, cvtColor,
+face_mesh, hands, ...) à l'aide de simples appels à time.perf_counter() : un
+appel à mark() coûte un appel d'horloge et une addition, ce qui permet de le
+laisser actif en production. Les durées sont conservées dans des tampons
+circulaires NumPy préalloués ; les percentiles p50/p95/p99 et le nombre
+d'images par seconde ne sont calculés qu'à la demande.
+"""
+import collections  # Pour l'historique des instants de fin d'image
+import csv  # Pour l'export CSV
+import os  # Pour le remplacement atomique du fichier Prometheus
+import time  # Pour l'horloge haute résolution
+
+import cv2  # Bibliothèque OpenCV pour l'incrustation des statistiques
+import numpy as np  # Pour les tampons circulaires et les percentiles
+
+TOTAL_STAGE = 'total'  # Nom de l'étape regroupant toute l'image
+QUANTILES = (50, 95, 99)  # Percentiles calculés
+
+
+class StageProfiler:
+    """
+    Chronométrage des étapes de traitement de chaque image
+
+    Utilisation :
+        profiler.start_frame()
+        ... capture ...
+        profiler.mark('capture')  # Durée écoulée depuis la marque précédente
+        ... traitement ...
+        profiler.mark('traitement')
+        profiler.end_frame()
+    """
+    def __init__(self, window=300, clock=time.perf_counter):
+        """
+        Args:
+            window: Nombre d'images conservées pour les statistiques glissantes
+            clock: Horloge en secondes (remplaçable pour les tests)
+        """
+        self.window = window
+        self.clock = clock
+        self.frame_count = 0  # Nombre total d'images mesurées
+        self._buffers = {}  # Étape -> tampon circulaire des durées (en secondes, NaN = étape absente)
+        self._totals = {}  # Étape -> [somme des durées en secondes, nombre d'images] depuis le début
+        self._current = {}  # Durées accumulées pour l'image en cours
+        self._frame_start = None
+        self._last = None
+        self._end_times = collections.deque(maxlen=window)  # Instants de fin d'image (pour les FPS)
+        self._summary = None  # Dernières statistiques calculées
+        self._summary_time = None
+
+    def start_frame(self):
+        """
+        Commence la mesure d'une nouvelle image
+        """
+        self._current = {}
+        self._frame_start = self._last = self.clock()
+
+    def mark(self, stage):
+        """
+        Attribue à l'étape le temps écoulé depuis la marque précédente (les durées
+        d'une même étape marquée plusieurs fois dans une image s'additionnent)
+        """
+        now = self.clock()
+        self._current[stage] = self._current.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def end_frame(self):
+        """
+        Termine la mesure de l'image en cours
+
+        Returns:
+            Dict: Durée de chaque étape de l'image (en secondes), y compris 'total'
+        """
+        if self._frame_start is None:
+            return {}
+        now = self.clock()
+        timings = self._current
+        timings[TOTAL_STAGE] = now - self._frame_start
+        self._frame_start = None
+        self.record(timings, now)
+        return timings
+
+    def record(self, timings, end_time=None):
+        """
+        Ajoute les durées d'une image mesurée ailleurs (par exemple dans un autre processus)
+
+        Args:
+            timings: Dict étape -> durée en secondes
+            end_time: Instant de fin de l'image (défaut: maintenant)
+        """
+        slot = self.frame_count % self.window
+        for stage, buffer in self._buffers.items():
+            buffer[slot] = timings.get(stage, np.nan)
+        for stage, duration in timings.items():
+            total = self._totals.setdefault(stage, [0.0, 0])
+            total[0] += duration
+            total[1] += 1
+        for stage, duration in timings.items():
+            if stage not in self._buffers:
+                # Nouvelle étape : tampon rempli de NaN pour les images précédentes
+                buffer = np.full(self.window, np.nan)
+                buffer[slot] = duration
+                self._buffers[stage] = buffer
+        self.frame_count += 1
+        self._end_times.append(self.clock() if end_time is None else end_time)
+
+    @property
+    def fps(self):
+        """
+        Images par seconde sur la fenêtre glissante
+        """
+        if len(self._end_times) < 2:
+            return 0.0
+        elapsed = self._end_times[-1] - self._end_times[0]
+        return (len(self._end_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def totals(self):
+        """
+        Returns:
+            Dict: Étape -> (somme des durées en secondes, nombre d'images) depuis le début
+        """
+        return {stage: tuple(total) for stage, total in list(self._totals.items())}
+
+    def summary(self, max_age=None):
+        """
+        Calcule les statistiques glissantes
+
+        Args:
+            max_age: Réutiliser le dernier résultat s'il date de moins de max_age secondes
+
+        Returns:
+            Dict: {'fps': float, 'frames': int, 'stages': {étape: {'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'}}}
+        """
+        now = self.clock()
+        if max_age is not None and self._summary is not None and now - self._summary_time < max_age:
+            return self._summary
+        count = min(self.frame_count, self.window)
+        stages = {}
+        # Copie de la liste : record() peut ajouter une étape depuis un autre thread
+        for stage, buffer in list(self._buffers.items()):
+            values = buffer[:count]
+            values = values[~np.isnan(values)] * 1000
+            if values.size == 0:
+                continue
+            p50, p95, p99 = np.percentile(values, QUANTILES)
+            stages[stage] = {'mean_ms': float(values.mean()), 'p50_ms': float(p50),
+                             'p95_ms': float(p95), 'p99_ms': float(p99)}
+        self._summary = {'fps': self.fps, 'frames': self.frame_count, 'stages': stages}
+        self._summary_time = now
+        return self._summary
+
+
+class NullProfiler:
+    """
+    Profiler sans effet, utilisé quand la mesure est désactivée
+    """
+    frame_count = 0
+    fps = 0.0
+
+    def start_frame(self):
+        pass
+
+    def mark(self, stage):
+        pass
+
+    def end_frame(self):
+        return {}
+
+    def record(self, timings, end_time=None):
+        pass
+
+    def totals(self):
+        return {}
+
+    def summary(self, max_age=None):
+        return {'fps': 0.0, 'frames': 0, 'stages': {}}
+
+
+NULL_PROFILER = NullProfiler()  # Instance partagée utilisée comme valeur par défaut
+
+
+def draw_stats_overlay(img, summary, origin=None, extra_lines=()):
+    """
+    Incruste les statistiques de latence dans l'image
+
+    Args:
+        img: Image BGR modifiée sur place
+        summary: Résultat de StageProfiler.summary()
+        origin: Coin supérieur gauche du bloc de texte (défaut: en haut à droite)
+        extra_lines: Lignes supplémentaires affichées sous les statistiques
+    """
+    lines = [f"FPS: {summary['fps']:.1f}"]
+    for stage, stats in summary['stages'].items():
+        lines.append(f"{stage:<14} p50 {stats['p50_ms']:6.1f}  p95 {stats['p95_ms']:6.1f}  "
+                     f"p99 {stats['p99_ms']:6.1f} ms")
+    lines.extend(extra_lines)
+    x, y = origin if origin is not None else (max(img.shape[1] - 560, 0), 60)
+    for line in lines:
+        cv2.putText(img, line, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.1, (255, 255, 255), 1)
+        y += 20
+
+
+class StatsExporter:
+    """
+    Export périodique des statistiques vers un fichier CSV (une ligne par étape
+    et par export, ajoutée en fin de fichier) ou un fichier texte Prometheus
+    (réécrit de façon atomique, compatible avec le textfile collector de node_exporter)
+    """
+    CSV_FIELDS = ('timestamp', 'stage', 'frames', 'fps', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms')
+
+    def __init__(self, profiler, path, interval=10.0, fmt=None):
+        """
+        Args:
+            profiler: StageProfiler à exporter
+            path: Fichier de destination
+            interval: Intervalle minimal entre deux exports en secondes
+            fmt: 'csv' ou 'prometheus' (défaut: 'prometheus' pour les fichiers .prom, sinon 'csv')
+        """
+        self.profiler = profiler
+        self.path = path
+        self.interval = interval
+        self.fmt = fmt or ('prometheus' if path.endswith('.prom') else 'csv')
+        if self.fmt not in ('csv', 'prometheus'):
+            raise ValueError(f"Format d'export inconnu: {self.fmt!r}")
+        self._last_export = time.monotonic()
+
+    def maybe_export(self):
+        """
+        Exporte si l'intervalle est écoulé (à appeler à chaque image)
+
+        Returns:
+            Bool: True si un export a eu lieu
+        """
+        if time.monotonic() - self._last_export < self.interval:
+            return False
+        self.export()
+        return True
+
+    def export(self):
+        """
+        Exporte immédiatement les statistiques courantes
+        """
+        self._last_export = time.monotonic()
+        summary = self.profiler.summary()
+        if self.fmt == 'csv':
+            self._export_csv(summary)
+        else:
+            self._export_prometheus(summary)
+
+    def _export_csv(self, summary):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        timestamp = time.time()
+        with open(self.path, 'a', newline='') as stream:
+            writer = csv.DictWriter(stream, fieldnames=self.CSV_FIELDS)
+            if new_file:
+                writer.writeheader()
+            for stage, stats in summary['stages'].items():
+                row = {key: f"{value:.4f}" for key, value in stats.items()}
+                writer.writerow(dict(row, timestamp=f"{timestamp:.3f}", stage=stage,
+                                     frames=summary['frames'], fps=f"{summary['fps']:.2f}"))
+
+    def _export_prometheus(self, summary):
+        # Résumé Prometheus en secondes : quantiles sur la fenêtre glissante, somme et nombre depuis le début
+        lines = [
+            "# HELP detection_stage_latency_seconds Latence par étape de traitement.",
+            "# TYPE detection_stage_latency_seconds summary",
+        ]
+        totals = self.profiler.totals()
+        for stage, stats in summary['stages'].items():
+            for quantile in QUANTILES:
+                lines.append(f'detection_stage_latency_seconds{{stage="{stage}",quantile="{quantile / 100}"}} '
+                             f"{stats[f'p{quantile}_ms'] / 1000:.7f}")
+            total, count = totals.get(stage, (0.0, 0))
+            lines.append(f'detection_stage_latency_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'detection_stage_latency_seconds_count{{stage="{stage}"}} {count}')
+        lines += [
+            "# HELP detection_fps Images traitées par seconde.",
+            "# TYPE detection_fps gauge",
+            f"detection_fps {summary['fps']:.3f}",
+            "# HELP detection_frames_total Nombre total d'images traitées.",
+            "# TYPE detection_frames_total counter",
+            f"detection_frames_total {summary['frames']}",
+        ]
+        # Écriture dans un fichier temporaire puis remplacement atomique
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as stream:
+            stream.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
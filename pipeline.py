@@ -0,0 +1,268 @@
+"""
+Pipeline threadé capture / inférence / rendu.
+
+La capture, l'inférence et le rendu tournent dans des étages séparés reliés par
+des files bornées qui jettent l'image la plus ancienne lorsqu'elles sont pleines :
+l'application travaille ainsi toujours sur l'image la plus récente au lieu
+d'accumuler du retard quand l'inférence est plus lente que la caméra.
+"""
+import collections  # Pour la file à double entrée (deque)
+import threading  # Pour les étages de capture et d'inférence
+import time  # Pour mesurer la latence de bout en bout
+
+import cv2  # Bibliothèque OpenCV pour la capture vidéo
+
+
+def open_capture(source):
+    """
+    Ouvre une source vidéo OpenCV
+
+    Args:
+        source: Index de caméra (0 = webcam par défaut), chemin d'un fichier vidéo,
+                URL de flux, ou objet déjà ouvert exposant read() et release()
+
+    Returns:
+        Objet de capture exposant read() et release()
+    """
+    # Un objet de capture déjà construit (ou un substitut de test) est utilisé tel quel
+    if hasattr(source, 'read'):
+        return source
+    # Une chaîne purement numérique désigne un index de caméra
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    return cv2.VideoCapture(source)
+
+
+class FramePacket:
+    """
+    Image circulant dans le pipeline avec ses métadonnées
+    """
+    __slots__ = ('frame_id', 'capture_time', 'frame', 'result', 'latency')
+
+    def __init__(self, frame_id, capture_time, frame):
+        self.frame_id = frame_id  # Numéro de l'image dans la source
+        self.capture_time = capture_time  # Instant de capture (time.perf_counter)
+        self.frame = frame  # Image BGR capturée
+        self.result = None  # Résultat de l'inférence (rempli par l'étage d'inférence)
+        self.latency = None  # Latence de bout en bout en secondes (remplie après le rendu)
+
+
+class LatestFrameQueue:
+    """
+    File bornée qui jette l'élément le plus ancien lorsqu'elle est pleine.
+
+    Contrairement à queue.Queue, put() ne bloque jamais : le producteur (la caméra)
+    n'est jamais ralenti et le consommateur reçoit toujours les images les plus récentes.
+    """
+    def __init__(self, maxsize=1):
+        if maxsize < 1:
+            raise ValueError("maxsize doit être supérieur ou égal à 1")
+        self.maxsize = maxsize
+        self.dropped = 0  # Nombre d'éléments jetés faute de place
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, item):
+        """
+        Ajoute un élément en jetant le plus ancien si la file est pleine
+
+        Returns:
+            L'élément jeté, ou None si aucun ne l'a été
+        """
+        dropped = None
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+        return dropped
+
+    def get(self, timeout=None):
+        """
+        Retire l'élément le plus ancien encore présent
+
+        Args:
+            timeout: Attente maximale en secondes (None = attente illimitée)
+
+        Returns:
+            L'élément, ou None si la file est fermée et vide ou si le délai a expiré
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def close(self):
+        """
+        Ferme la file : les consommateurs en attente sont réveillés
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class DetectionPipeline:
+    """
+    Pipeline à trois étages : un thread de capture, un thread d'inférence et un
+    étage de rendu exécuté dans le thread appelant (cv2.imshow doit rester dans
+    le thread principal sur la plupart des plateformes).
+    """
+    def __init__(self, source, infer_fn, render_fn=None, queue_size=1,
+                 max_frames=None, pace_fps=None, latency_history=1000):
+        """
+        Args:
+            source: Source vidéo acceptée par open_capture()
+            infer_fn: Fonction appelée avec l'image BGR, renvoie le résultat d'inférence
+            render_fn: Fonction appelée avec le FramePacket inféré ; renvoyer False arrête le pipeline
+            queue_size: Taille des files entre les étages
+            max_frames: Nombre maximal d'images à capturer (None = jusqu'à la fin de la source)
+            pace_fps: Cadence imposée à la capture (utile pour simuler une caméra avec un fichier)
+            latency_history: Nombre de latences conservées pour les statistiques
+        """
+        self.cap = open_capture(source)
+        self.infer_fn = infer_fn
+        self.render_fn = render_fn
+        self.max_frames = max_frames
+        self.pace_fps = pace_fps
+
+        # Files entre les étages (capture -> inférence -> rendu)
+        self.capture_queue = LatestFrameQueue(queue_size)
+        self.render_queue = LatestFrameQueue(queue_size)
+
+        # Statistiques
+        self.frames_captured = 0
+        self.frames_inferred = 0
+        self.frames_rendered = 0
+        self.latencies = collections.deque(maxlen=latency_history)
+        self.error = None  # Exception levée par un étage en arrière-plan
+
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def _capture_loop(self):
+        """
+        Étage de capture : lit les images aussi vite que la source les fournit
+        """
+        interval = 1.0 / self.pace_fps if self.pace_fps else 0.0
+        next_time = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                if self.max_frames is not None and self.frames_captured >= self.max_frames:
+                    break
+                if interval:
+                    # Simuler la cadence d'une caméra
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_time += interval
+                success, frame = self.cap.read()
+                if not success:
+                    break
+                packet = FramePacket(self.frames_captured, time.perf_counter(), frame)
+                self.frames_captured += 1
+                self.capture_queue.put(packet)
+        except Exception as exc:  # Remonter l'erreur au thread principal
+            self.error = exc
+        finally:
+            self.capture_queue.close()
+
+    def _inference_loop(self):
+        """
+        Étage d'inférence : traite toujours l'image capturée la plus récente
+        """
+        try:
+            while not self._stop_event.is_set():
+                packet = self.capture_queue.get()
+                if packet is None:
+                    break
+                packet.result = self.infer_fn(packet.frame)
+                self.frames_inferred += 1
+                self.render_queue.put(packet)
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.render_queue.close()
+
+    def start(self):
+        """
+        Démarre les threads de capture et d'inférence
+        """
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Arrête les étages et libère la source vidéo
+        """
+        self._stop_event.set()
+        self.capture_queue.close()
+        self.render_queue.close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.cap.release()
+
+    def run(self):
+        """
+        Exécute le pipeline jusqu'à la fin de la source ou jusqu'à ce que
+        render_fn renvoie False. L'étage de rendu tourne dans le thread appelant.
+
+        Returns:
+            Dict: Statistiques du pipeline (voir summary())
+        """
+        self.start()
+        try:
+            while True:
+                packet = self.render_queue.get()
+                if packet is None:
+                    break
+                keep_going = self.render_fn(packet) if self.render_fn else True
+                # Latence de bout en bout : de la capture jusqu'à la fin du rendu
+                packet.latency = time.perf_counter() - packet.capture_time
+                self.latencies.append(packet.latency)
+                self.frames_rendered += 1
+                if keep_going is False:
+                    break
+        finally:
+            self.stop()
+        if self.error is not None:
+            raise self.error
+        return self.summary()
+
+    def summary(self):
+        """
+        Returns:
+            Dict: Compteurs d'images par étage, images jetées et latences (en millisecondes)
+        """
+        latencies = sorted(self.latencies)
+        stats = {
+            'frames_captured': self.frames_captured,
+            'frames_inferred': self.frames_inferred,
+            'frames_rendered': self.frames_rendered,
+            'dropped_before_inference': self.capture_queue.dropped,
+            'dropped_before_render': self.render_queue.dropped,
+            'latency_mean_ms': None,
+            'latency_p50_ms': None,
+            'latency_max_ms': None,
+        }
+        if latencies:
+            stats['latency_mean_ms'] = 1000 * sum(latencies) / len(latencies)
+            stats['latency_p50_ms'] = 1000 * latencies[len(latencies) // 2]
+            stats['latency_max_ms'] = 1000 * latencies[-1]
+        return stats
@@ -0,0 +1,98 @@
+"""
+Prétraitement des images sans allocation par image.
+
+Avant la détection, chaque image était retournée (cv2.flip), éventuellement
+réduite puis convertie en RGB (cv2.cvtColor) : trois images pleine taille
+allouées puis libérées à chaque passage, soit plusieurs dizaines de Mo par
+seconde à 30-60 img/s. Le FramePreprocessor écrit ces images dans des tampons
+préalloués (paramètre dst= d'OpenCV), réalloués seulement si la taille change.
+
+L'effet miroir et la conversion BGR -> RGB sont faits en un seul passage : vue
+comme une image d'un seul canal de largeur 3 x largeur, une ligne BGR
+retournée horizontalement donne les pixels dans l'ordre inverse et, dans
+chaque pixel, les canaux dans l'ordre inverse (R, G, B). cv2.flip sur cette vue
+coûte autant qu'un simple cvtColor : l'image miroir des détecteurs ne coûte
+plus rien de plus que la conversion de couleur.
+"""
+import cv2  # Bibliothèque OpenCV pour le traitement d'images
+import numpy as np  # Pour les tampons
+
+from instrumentation import NULL_PROFILER
+
+
+def mirror_rgb(img, dst=None):
+    """
+    Image miroir convertie en RGB, en un seul passage
+
+    Args:
+        img: Image BGR (hauteur, largeur, 3)
+        dst: Tampon de même forme recevant le résultat (None = nouvelle image)
+
+    Returns:
+        np.ndarray: Image RGB miroir (dst si fourni)
+    """
+    img = np.ascontiguousarray(img)
+    height, width = img.shape[:2]
+    if dst is None:
+        dst = np.empty_like(img)
+    cv2.flip(img.reshape(height, width * 3), 1, dst=dst.reshape(height, width * 3))
+    return dst
+
+
+class FramePreprocessor:
+    """
+    Prépare l'image affichée et l'image des détecteurs dans des tampons réutilisés
+    """
+    def __init__(self, mirror=True, reuse_display=True):
+        """
+        Args:
+            mirror: True pour l'effet miroir de l'application (affichage et détection)
+            reuse_display: False si l'image affichée est transmise à un autre thread (pipeline) :
+                           elle est alors allouée à chaque image, l'image des détecteurs restant
+                           dans un tampon réutilisé
+        """
+        self.mirror = mirror
+        self.reuse_display = reuse_display
+        self.allocations = 0  # Tampons alloués depuis la création (stable en régime établi)
+        self._buffers = {}
+
+    def _buffer(self, name, shape):
+        buffers = self._buffers
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = buffers[name] = np.empty(shape, dtype=np.uint8)
+            self.allocations += 1
+        return buffer
+
+    def process(self, img, scale=1.0, display=True, profiler=NULL_PROFILER):
+        """
+        Args:
+            img: Image BGR capturée
+            scale: Échelle de l'image des détecteurs (les points MediaPipe sont normalisés)
+            display: False si l'image affichée n'est pas nécessaire (traitement par lot)
+            profiler: StageProfiler recevant la durée de chaque étape
+
+        Returns:
+            Tuple: (image BGR affichée, miroir si demandé, ou None si display est False,
+                    image RGB des détecteurs) ; les tampons sont réécrits à l'image suivante
+        """
+        shown = None
+        if display and self.mirror:
+            shown = cv2.flip(img, 1, dst=self._buffer('display', img.shape) if self.reuse_display else None)
+            profiler.mark('flip')
+        elif display:
+            shown = img
+        source = img
+        if scale < 1.0:
+            height, width = img.shape[:2]
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            source = cv2.resize(img, size, dst=self._buffer('small', (size[1], size[0], 3)),
+                                interpolation=cv2.INTER_AREA)
+            profiler.mark('resize')
+        rgb = self._buffer('rgb', source.shape)
+        if self.mirror:
+            mirror_rgb(source, rgb)  # Miroir et conversion en un seul passage
+        else:
+            cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=rgb)
+        profiler.mark('cvtColor')
+        return shown, rgb
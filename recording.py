@@ -0,0 +1,435 @@
+"""
+Enregistrement compact des points détectés et relecture sans inférence.
+
+Le LandmarkRecorder ajoute, pour chaque image, les points des visages et des
+mains, la latéralité, l'horodatage et les résultats de classification dans un
+dossier au format colonne : chaque paquet de chunk_frames images est écrit
+dans un sous-dossier de fichiers .npy (un par colonne), les points en float16
+ou float32. Les visages et les mains d'un paquet sont concaténés ; les
+tableaux *_offsets donnent, pour chaque image, le début et la fin de ses
+visages et de ses mains (format CSR).
+
+La Recording ouvre ces fichiers en mémoire projetée (np.load(mmap_mode='r')) et
+réévalue les règles paquet par paquet : des heures d'enregistrement sont
+reclassées en quelques secondes, sans décodage vidéo ni MediaPipe, avec une
+mémoire limitée à un paquet. Des fonctions de règles modifiées (par exemple
+avec d'autres seuils) peuvent être passées à rescore() pour les comparer aux
+résultats enregistrés.
+
+Utilisation :
+    python detection_app.py --record session/
+    python recording.py session/
+"""
+import argparse  # Pour les options de la ligne de commande
+import json  # Pour les métadonnées de l'enregistrement
+import os  # Pour les dossiers et le renommage atomique des paquets
+import shutil  # Pour supprimer un paquet incomplet
+import sys  # Pour la sortie standard
+import time  # Pour l'horodatage et la mesure du temps de relecture
+
+import numpy as np  # Pour les tableaux et les fichiers .npy
+
+from classification import (EXPRESSION_LABELS, FACE_LANDMARK_COUNT, FACE_RULE_INDICES, GESTURE_LABELS,
+                            HAND_LANDMARK_COUNT, expression_codes, gesture_codes)
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+CHUNK_PREFIX = 'chunk_'
+# Colonnes d'un paquet (une par fichier .npy)
+FRAME_COLUMNS = ('frame', 'timestamp', 'frame_size', 'face_offsets', 'hand_offsets')
+ITEM_COLUMNS = ('faces', 'face_codes', 'hands', 'handedness', 'hand_codes')
+# Latéralité enregistrée : -1 = inconnue, 0 = gauche, 1 = droite
+HANDEDNESS_CODES = {None: -1, "Left": 0, "Right": 1}
+
+MAX_LABELS = 128  # Codes enregistrés en int8
+
+
+class LandmarkRecorder:
+    """
+    Ajoute les détections de chaque image à un enregistrement sur disque.
+
+    Seul le paquet en cours est conservé en mémoire ; il est écrit dans un
+    dossier temporaire puis renommé, de sorte qu'un enregistrement interrompu
+    reste lisible jusqu'au dernier paquet complet.
+    """
+    def __init__(self, path, dtype='float16', chunk_frames=1024, full_mesh=True):
+        """
+        Args:
+            path: Dossier de l'enregistrement (créé si nécessaire, les paquets existants sont conservés)
+            dtype: 'float16' (compact) ou 'float32' (relecture identique aux résultats en direct)
+            chunk_frames: Nombre d'images par paquet
+            full_mesh: True pour les 468 points du visage, False pour les seuls FACE_RULE_INDICES
+        """
+        if np.dtype(dtype) not in (np.float16, np.float32):
+            raise ValueError(f"Type de points non pris en charge: {dtype!r}")
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.chunk_frames = chunk_frames
+        self.face_indices = None if full_mesh else FACE_RULE_INDICES
+        # Tables code -> étiquette, complétées par les étiquettes de règles personnalisées (voir rules.py)
+        self.expression_labels = list(EXPRESSION_LABELS)
+        self.gesture_labels = list(GESTURE_LABELS)
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            # Reprise d'un enregistrement : mêmes paramètres que les paquets existants
+            with open(meta_path, encoding='utf-8') as stream:
+                meta = json.load(stream)
+            self.dtype = np.dtype(meta['dtype'])
+            self.face_indices = None if meta['face_indices'] is None else np.array(meta['face_indices'])
+            self.expression_labels = meta.get('expression_labels', self.expression_labels)
+            self.gesture_labels = meta.get('gesture_labels', self.gesture_labels)
+            self.meta = meta
+        else:
+            self.meta = {
+                'version': FORMAT_VERSION,
+                'dtype': self.dtype.name,
+                'face_indices': None if self.face_indices is None else self.face_indices.tolist(),
+                'created': time.time(),
+            }
+            self._write_meta()
+
+        self._chunk_index = len(_chunk_dirs(path))
+        self.frames = sum(len(np.load(os.path.join(chunk, 'frame.npy'), mmap_mode='r'))
+                          for chunk in _chunk_dirs(path))  # Nombre d'images enregistrées
+        self._reset_buffers()
+
+    def _write_meta(self):
+        self.meta['expression_labels'] = self.expression_labels
+        self.meta['gesture_labels'] = self.gesture_labels
+        meta_path = os.path.join(self.path, META_FILE)
+        with open(meta_path + ".tmp", 'w', encoding='utf-8') as stream:
+            json.dump(self.meta, stream, ensure_ascii=False, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _code(self, labels, label):
+        """
+        Code d'une étiquette dans une table (ajoutée à la fin si elle est nouvelle)
+        """
+        if label not in labels:
+            if len(labels) >= MAX_LABELS:
+                raise ValueError(f"Trop d'étiquettes différentes à enregistrer (maximum {MAX_LABELS})")
+            labels.append(label)
+            self._labels_changed = True
+        return labels.index(label)
+
+    def _reset_buffers(self):
+        self._frame_columns = {name: [] for name in ('frame', 'timestamp', 'frame_size')}
+        self._face_counts = []
+        self._hand_counts = []
+        self._faces = []
+        self._face_codes = []
+        self._hands = []
+        self._handedness = []
+        self._hand_codes = []
+        self._labels_changed = False
+
+    def append(self, detections, img_shape, expressions=(), gestures=(), timestamp=None):
+        """
+        Ajoute une image
+
+        Args:
+            detections: Detections de l'image
+            img_shape: Dimensions de l'image (hauteur, largeur[, canaux])
+            expressions: Expression de chaque visage (étiquette ou None)
+            gestures: Geste de chaque main (étiquette ou None)
+            timestamp: Horodatage en secondes (défaut: heure courante)
+        """
+        faces, hands = detections.faces, detections.hands
+        if self.face_indices is not None and len(faces):
+            faces = faces[:, self.face_indices]
+        columns = self._frame_columns
+        columns['frame'].append(self.frames)
+        columns['timestamp'].append(time.time() if timestamp is None else timestamp)
+        columns['frame_size'].append(img_shape[:2])
+        self._face_counts.append(len(faces))
+        self._hand_counts.append(len(hands))
+        if len(faces):
+            self._faces.append(faces.astype(self.dtype))
+            self._face_codes.extend(self._code(self.expression_labels, label)
+                                    for label in _padded(expressions, len(faces)))
+        if len(hands):
+            self._hands.append(hands.astype(self.dtype))
+            self._handedness.extend(HANDEDNESS_CODES[label] for label in detections.handedness)
+            self._hand_codes.extend(self._code(self.gesture_labels, label) for label in _padded(gestures, len(hands)))
+        self.frames += 1
+        if len(self._face_counts) >= self.chunk_frames:
+            self.flush()
+
+    def flush(self):
+        """
+        Écrit le paquet en cours (s'il n'est pas vide)
+        """
+        if not self._face_counts:
+            return
+        face_points = FACE_LANDMARK_COUNT if self.face_indices is None else len(self.face_indices)
+        arrays = {
+            'frame': np.array(self._frame_columns['frame'], dtype=np.int64),
+            'timestamp': np.array(self._frame_columns['timestamp'], dtype=np.float64),
+            'frame_size': np.array(self._frame_columns['frame_size'], dtype=np.int32).reshape(-1, 2),
+            'face_offsets': np.concatenate([[0], np.cumsum(self._face_counts)]).astype(np.int64),
+            'hand_offsets': np.concatenate([[0], np.cumsum(self._hand_counts)]).astype(np.int64),
+            'faces': (np.concatenate(self._faces) if self._faces
+                      else np.empty((0, face_points, 3), dtype=self.dtype)),
+            'face_codes': np.array(self._face_codes, dtype=np.int8),
+            'hands': (np.concatenate(self._hands) if self._hands
+                      else np.empty((0, HAND_LANDMARK_COUNT, 3), dtype=self.dtype)),
+            'handedness': np.array(self._handedness, dtype=np.int8),
+            'hand_codes': np.array(self._hand_codes, dtype=np.int8),
+        }
+        if self._labels_changed:
+            self._write_meta()  # Nouvelles étiquettes connues avant que le paquet n'apparaisse
+        final_dir = os.path.join(self.path, f"{CHUNK_PREFIX}{self._chunk_index:06d}")
+        tmp_dir = final_dir + ".tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        # Le paquet n'apparaît qu'une fois complet
+        os.replace(tmp_dir, final_dir)
+        self._chunk_index += 1
+        self._reset_buffers()
+
+    def close(self):
+        """
+        Écrit le dernier paquet
+        """
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _padded(labels, count):
+    """
+    Complète une liste d'étiquettes par None jusqu'à count éléments
+    """
+    labels = list(labels)[:count]
+    return labels + [None] * (count - len(labels))
+
+
+def _chunk_dirs(path):
+    """
+    Returns:
+        List: Dossiers des paquets complets, dans l'ordre d'écriture
+    """
+    return sorted(os.path.join(path, name) for name in os.listdir(path)
+                  if name.startswith(CHUNK_PREFIX) and not name.endswith('.tmp'))
+
+
+class RecordedChunk:
+    """
+    Colonnes d'un paquet, projetées en mémoire (lues à la demande)
+
+    Attributs par image : frame, timestamp, frame_size (hauteur, largeur),
+    face_offsets et hand_offsets (N + 1 bornes) ; par visage : faces,
+    face_codes ; par main : hands, handedness, hand_codes.
+    """
+    def __init__(self, path):
+        self.path = path
+        for name in FRAME_COLUMNS + ITEM_COLUMNS:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def face_owner(self):
+        """
+        np.ndarray: Indice (dans le paquet) de l'image de chaque visage
+        """
+        return np.repeat(np.arange(len(self)), np.diff(self.face_offsets))
+
+    @property
+    def hand_owner(self):
+        """
+        np.ndarray: Indice (dans le paquet) de l'image de chaque main
+        """
+        return np.repeat(np.arange(len(self)), np.diff(self.hand_offsets))
+
+    def handedness_labels(self):
+        """
+        Returns:
+            np.ndarray: "Left", "Right" ou None pour chaque main
+        """
+        return np.array([None, "Left", "Right"], dtype=object)[np.asarray(self.handedness) + 1]
+
+
+def last_codes(codes, owner, frame_count):
+    """
+    Code affiché pour chaque image : comme dans l'application, la dernière
+    détection non nulle de l'image l'emporte
+
+    Args:
+        codes: Codes (K,) des visages ou des mains
+        owner: Indice de l'image de chaque élément (K,), croissant
+        frame_count: Nombre d'images
+
+    Returns:
+        np.ndarray: Code (frame_count,) de chaque image (0 = aucune détection)
+    """
+    result = np.zeros(frame_count, dtype=np.int8)
+    codes = np.asarray(codes)
+    detected = np.flatnonzero(codes)
+    if detected.size:
+        owners = owner[detected]
+        # Dernier élément détecté de chaque image (les propriétaires sont triés)
+        last = np.r_[owners[1:] != owners[:-1], True]
+        result[owners[last]] = codes[detected[last]]
+    return result
+
+
+class Recording:
+    """
+    Lecture d'un enregistrement créé par LandmarkRecorder
+    """
+    def __init__(self, path):
+        """
+        Args:
+            path: Dossier de l'enregistrement
+        """
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Aucun enregistrement dans {path!r} ({META_FILE} absent)")
+        with open(meta_path, encoding='utf-8') as stream:
+            self.meta = json.load(stream)
+        if self.meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Version d'enregistrement non prise en charge: {self.meta['version']}")
+        self.path = path
+        # Étiquettes des codes enregistrés
+        self.expression_labels = np.array(self.meta.get('expression_labels', EXPRESSION_LABELS), dtype=object)
+        self.gesture_labels = np.array(self.meta.get('gesture_labels', GESTURE_LABELS), dtype=object)
+        self.chunk_paths = _chunk_dirs(path)
+
+    def chunks(self):
+        """
+        Yields:
+            RecordedChunk: Paquets dans l'ordre d'enregistrement
+        """
+        for chunk_path in self.chunk_paths:
+            yield RecordedChunk(chunk_path)
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.chunks())
+
+    def iter_frames(self):
+        """
+        Relit les images une par une (pour les fonctions de classification par image)
+
+        Yields:
+            Tuple: (horodatage, (hauteur, largeur), visages (F, P, 3), mains (M, 21, 3), latéralités)
+        """
+        for chunk in self.chunks():
+            labels = chunk.handedness_labels()
+            for i in range(len(chunk)):
+                f0, f1 = chunk.face_offsets[i], chunk.face_offsets[i + 1]
+                h0, h1 = chunk.hand_offsets[i], chunk.hand_offsets[i + 1]
+                yield (float(chunk.timestamp[i]), tuple(chunk.frame_size[i]),
+                       np.asarray(chunk.faces[f0:f1], dtype=np.float32),
+                       np.asarray(chunk.hands[h0:h1], dtype=np.float32), list(labels[h0:h1]))
+
+    def rescore(self, expression_fn=expression_codes, gesture_fn=gesture_codes):
+        """
+        Réévalue les règles sur tout l'enregistrement, paquet par paquet
+
+        Args:
+            expression_fn: Règles d'expression par lot, (visages, tailles (N, 2)) -> codes
+            gesture_fn: Règles de gestes par lot, (mains, latéralités) -> codes
+
+        Yields:
+            Tuple: (RecordedChunk, codes par visage, codes par main) ; comme dans
+                   l'application, les mains de latéralité inconnue ne sont pas classées (code 0)
+        """
+        for chunk in self.chunks():
+            face_codes = np.zeros(len(chunk.face_codes), dtype=np.int8)
+            if len(face_codes):
+                face_codes[:] = expression_fn(chunk.faces, np.asarray(chunk.frame_size)[chunk.face_owner])
+            hand_codes = np.zeros(len(chunk.hand_codes), dtype=np.int8)
+            known = np.flatnonzero(np.asarray(chunk.handedness) >= 0)
+            if known.size:
+                hand_codes[known] = gesture_fn(np.asarray(chunk.hands)[known],
+                                               np.asarray(chunk.handedness)[known] == 1)
+            yield chunk, face_codes, hand_codes
+
+    def summary(self, expression_fn=expression_codes, gesture_fn=gesture_codes,
+                expression_labels=EXPRESSION_LABELS, gesture_labels=GESTURE_LABELS):
+        """
+        Reclasse l'enregistrement et compare aux résultats enregistrés
+
+        Args:
+            expression_fn: Règles d'expression par lot (voir rescore)
+            gesture_fn: Règles de gestes par lot (voir rescore)
+            expression_labels: Étiquettes des codes renvoyés par expression_fn
+            gesture_labels: Étiquettes des codes renvoyés par gesture_fn
+
+        Returns:
+            Dict: Nombres d'images, de visages, de mains, d'images dont l'expression ou le
+                  geste affiché change, et nombre d'images par étiquette après reclassement
+        """
+        stats = {'frames': 0, 'faces': 0, 'hands': 0, 'expression_changes': 0, 'gesture_changes': 0,
+                 'expressions': np.zeros(len(expression_labels), dtype=np.int64),
+                 'gestures': np.zeros(len(gesture_labels), dtype=np.int64)}
+        for chunk, face_codes, hand_codes in self.rescore(expression_fn, gesture_fn):
+            count = len(chunk)
+            face_owner, hand_owner = chunk.face_owner, chunk.hand_owner
+            expressions = last_codes(face_codes, face_owner, count)
+            gestures = last_codes(hand_codes, hand_owner, count)
+            stats['frames'] += count
+            stats['faces'] += len(face_codes)
+            stats['hands'] += len(hand_codes)
+            # Comparaison par étiquette : les tables de codes peuvent différer
+            recorded_expressions = self.expression_labels[last_codes(chunk.face_codes, face_owner, count)]
+            recorded_gestures = self.gesture_labels[last_codes(chunk.hand_codes, hand_owner, count)]
+            stats['expression_changes'] += int(np.count_nonzero(
+                np.asarray(expression_labels, dtype=object)[expressions] != recorded_expressions))
+            stats['gesture_changes'] += int(np.count_nonzero(
+                np.asarray(gesture_labels, dtype=object)[gestures] != recorded_gestures))
+            stats['expressions'] += np.bincount(expressions, minlength=len(expression_labels))
+            stats['gestures'] += np.bincount(gestures, minlength=len(gesture_labels))
+        stats['expressions'] = {str(label): int(n) for label, n in zip(expression_labels, stats['expressions'])}
+        stats['gestures'] = {str(label): int(n) for label, n in zip(gesture_labels, stats['gestures'])}
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reclasse un enregistrement de points sans inférence")
+    parser.add_argument('path', help="Dossier de l'enregistrement")
+    parser.add_argument('--rules', metavar='FICHIER',
+                        help="Reclasser avec un fichier de règles JSON ou YAML (voir rules.py) au lieu des règles intégrées")
+    parser.add_argument('--json', action='store_true', help="Afficher le résumé au format JSON")
+    args = parser.parse_args(argv)
+
+    options = {}
+    if args.rules:
+        from rules import load_rules  # Uniquement pour les règles déclaratives
+        rule_sets = load_rules(args.rules)
+        if 'expressions' in rule_sets:
+            options.update(expression_fn=rule_sets['expressions'].codes,
+                           expression_labels=rule_sets['expressions'].labels)
+        if 'gestures' in rule_sets:
+            options.update(gesture_fn=rule_sets['gestures'].codes, gesture_labels=rule_sets['gestures'].labels)
+
+    recording = Recording(args.path)
+    start = time.perf_counter()
+    stats = recording.summary(**options)
+    elapsed = time.perf_counter() - start
+    if args.json:
+        json.dump(dict(stats, seconds=elapsed), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return
+    print(f"{stats['frames']} images ({stats['faces']} visages, {stats['hands']} mains) "
+          f"reclassées en {elapsed:.2f} s ({stats['frames'] / max(elapsed, 1e-9):.0f} img/s)")
+    print(f"Images dont l'expression change : {stats['expression_changes']}, "
+          f"dont le geste change : {stats['gesture_changes']}")
+    for label, count in list(stats['expressions'].items()) + list(stats['gestures'].items()):
+        if label != 'None':
+            print(f"  {label:<16} {count}")
+
+
+if __name__ == "__main__":
+    main()
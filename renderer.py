@@ -0,0 +1,235 @@
+"""
+Rendu des points de repère et des textes sans allocation par image.
+
+L'OverlayRenderer remplace le chemin d'origine (np.zeros_like, appels
+mp_drawing.draw_landmarks arête par arête, cv2.addWeighted sur toute l'image
+et cv2.putText à chaque image) :
+- les tampons de calque et de sortie sont alloués une fois et réutilisés ;
+- le maillage est tracé en un seul appel cv2.polylines à partir des tableaux
+  d'indices d'arêtes précalculés, et les points par tampons vectorisés ;
+- le mélange à 30 % n'est calculé que dans la zone modifiée, le reste de
+  l'image étant simplement assombri (cv2.convertScaleAbs) ;
+- les textes sont rastérisés une seule fois puis mélangés depuis un cache.
+
+Le résultat est identique au chemin d'origine pour les arêtes et le mélange,
+et à une unité d'arrondi près pour les bords lissés des textes ; pour les
+points, tous les contours blancs sont tracés avant tous les remplissages (au
+lieu d'alterner point par point), ce qui ne diffère que là où des points
+voisins se chevauchent.
+"""
+import cv2  # Bibliothèque OpenCV pour le tracé
+import numpy as np  # Pour les opérations mathématiques sur les tableaux
+
+WHITE_COLOR = (224, 224, 224)  # Blanc utilisé par mp.solutions.drawing_utils
+OVERLAY_WEIGHT = 0.3  # Poids du calque des points dans l'image finale
+IMAGE_WEIGHT = 0.7  # Poids de l'image d'origine
+
+
+class LandmarkStyle:
+    """
+    Style de tracé d'un type de points (équivalent à une paire de DrawingSpec MediaPipe)
+    """
+    def __init__(self, connections, line_color, line_thickness, point_color, point_thickness, circle_radius):
+        """
+        Args:
+            connections: Paires d'indices reliés (ex: mp.solutions.face_mesh.FACEMESH_TESSELATION)
+            line_color: Couleur BGR des arêtes
+            line_thickness: Épaisseur des arêtes
+            point_color: Couleur BGR de remplissage des points
+            point_thickness: Épaisseur des cercles des points
+            circle_radius: Rayon des cercles des points
+        """
+        # Chaque arête n'est tracée qu'une fois (FACEMESH_TESSELATION contient les deux sens)
+        self.edges = np.unique(np.sort(np.array(list(connections), dtype=np.intp).reshape(-1, 2), axis=1), axis=0)
+        self.line_color = line_color
+        self.line_thickness = line_thickness
+        self.point_color = point_color
+        # Comme MediaPipe : un contour blanc un peu plus grand sous chaque point
+        border_radius = max(circle_radius + 1, int(circle_radius * 1.2))
+        self.border_stamp = _circle_stamp(border_radius, point_thickness)
+        self.point_stamp = _circle_stamp(circle_radius, point_thickness)
+        # Débordement maximal autour d'un point (pour la zone modifiée)
+        self.extent = max(border_radius + point_thickness, line_thickness) + 1
+
+    @classmethod
+    def from_drawing_specs(cls, connections, landmark_spec, connection_spec):
+        """
+        Construit le style équivalent aux DrawingSpec passés à mp_drawing.draw_landmarks
+
+        Args:
+            connections: Paires d'indices reliés
+            landmark_spec: DrawingSpec des points
+            connection_spec: DrawingSpec des arêtes
+        """
+        return cls(connections, connection_spec.color, connection_spec.thickness,
+                   landmark_spec.color, landmark_spec.thickness, landmark_spec.circle_radius)
+
+
+def _circle_stamp(radius, thickness):
+    """
+    Rastérise un cercle OpenCV une fois pour toutes
+
+    Returns:
+        np.ndarray: Décalages (K, 2) (dy, dx) des pixels du cercle par rapport à son centre
+    """
+    size = 2 * (radius + thickness) + 1
+    canvas = np.zeros((size, size), dtype=np.uint8)
+    center = radius + thickness
+    cv2.circle(canvas, (center, center), radius, 255, thickness)
+    return np.argwhere(canvas) - center
+
+
+class _TextLayer:
+    """
+    Texte rastérisé une fois : patch de couleur, poids de mélange et position relative à l'origine
+    """
+    __slots__ = ('patch', 'weights', 'inverse', 'dx', 'dy')
+
+    def __init__(self, text, font, scale, thickness, color):
+        (width, height), baseline = cv2.getTextSize(text, font, scale, thickness)
+        pad = height + thickness  # Marge large : certains glyphes débordent de getTextSize
+        canvas = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+        # Selon la version d'OpenCV, cv2.putText lisse les bords : on conserve la couverture (0-255)
+        cv2.putText(canvas, text, (pad, pad + height), font, scale, 255, thickness)
+        # Ne conserver que la boîte englobante des pixels allumés
+        ys, xs = np.nonzero(canvas)
+        if ys.size == 0:
+            y0 = y1 = x0 = x1 = 0
+        else:
+            y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+        self.weights = canvas[y0:y1, x0:x1].astype(np.float32) / 255
+        self.inverse = 1 - self.weights
+        self.patch = np.empty(self.weights.shape + (len(color),), dtype=np.uint8)
+        self.patch[:] = color
+        self.dx = int(x0) - pad  # Décalage par rapport à l'origine de cv2.putText
+        self.dy = int(y0) - pad - height
+
+
+class OverlayRenderer:
+    """
+    Rendu réutilisant ses tampons d'une image à l'autre.
+
+    Utilisation pour chaque image :
+        renderer.begin(img)
+        renderer.draw_landmarks(face_points, face_style)
+        combined = renderer.blend(img)
+        renderer.put_text(combined, "texte", (20, 30), 0.8, (255, 255, 255), 2)
+
+    L'image renvoyée par blend() est un tampon interne réécrit à l'image suivante.
+    """
+    def __init__(self, text_cache_size=64):
+        """
+        Args:
+            text_cache_size: Nombre maximal de textes rastérisés conservés
+        """
+        self.text_cache_size = text_cache_size
+        self._overlay = None  # Calque des points (noir hors de la zone modifiée)
+        self._output = None  # Image finale
+        self._dirty = None  # Zone modifiée de l'image courante (x0, y0, x1, y1)
+        self._previous_dirty = None  # Zone à effacer avant la prochaine image
+        self._text_cache = {}
+
+    def begin(self, img):
+        """
+        Prépare les tampons pour une nouvelle image de mêmes dimensions que img
+        """
+        if self._overlay is None or self._overlay.shape != img.shape:
+            self._overlay = np.zeros_like(img)
+            self._output = np.empty_like(img)
+            self._previous_dirty = None
+        elif self._previous_dirty is not None:
+            # N'effacer que la zone dessinée à l'image précédente
+            x0, y0, x1, y1 = self._previous_dirty
+            self._overlay[y0:y1, x0:x1] = 0
+        self._dirty = None
+
+    def draw_landmarks(self, landmarks, style):
+        """
+        Trace des points normalisés et leurs connexions sur le calque
+
+        Args:
+            landmarks: Tableau (nombre de points, 2 ou 3) de coordonnées normalisées
+            style: LandmarkStyle à utiliser
+        """
+        overlay = self._overlay
+        h, w = overlay.shape[:2]
+        xy = np.asarray(landmarks)[:, :2]
+        # Comme MediaPipe : les points hors de l'image ne sont pas tracés
+        visible = ((xy >= 0) | np.isclose(xy, 0)).all(axis=1) & ((xy <= 1) | np.isclose(xy, 1)).all(axis=1)
+        if not visible.any():
+            return
+        pixels = np.minimum(np.floor(xy * (w, h)), (w - 1, h - 1)).astype(np.int32)
+
+        # Arêtes dont les deux extrémités sont visibles, en un seul appel
+        edges = style.edges[visible[style.edges].all(axis=1)]
+        if len(edges):
+            cv2.polylines(overlay, pixels[edges], False, style.line_color, style.line_thickness)
+
+        # Points : contours blancs puis remplissages, appliqués à tous les points à la fois
+        points = pixels[visible]
+        self._stamp(points, style.border_stamp, WHITE_COLOR)
+        self._stamp(points, style.point_stamp, style.point_color)
+
+        # Étendre la zone modifiée
+        (x0, y0), (x1, y1) = points.min(axis=0) - style.extent, points.max(axis=0) + style.extent + 1
+        box = (max(x0, 0), max(y0, 0), min(x1, w), min(y1, h))
+        if self._dirty is not None:
+            box = (min(box[0], self._dirty[0]), min(box[1], self._dirty[1]),
+                   max(box[2], self._dirty[2]), max(box[3], self._dirty[3]))
+        self._dirty = tuple(int(v) for v in box)
+
+    def _stamp(self, points, stamp, color):
+        h, w = self._overlay.shape[:2]
+        ys = (points[:, 1, None] + stamp[:, 0]).ravel()
+        xs = (points[:, 0, None] + stamp[:, 1]).ravel()
+        inside = (ys >= 0) & (ys < h) & (xs >= 0) & (xs < w)
+        self._overlay[ys[inside], xs[inside]] = color
+
+    def blend(self, img):
+        """
+        Mélange l'image et le calque (70 % / 30 %) en ne calculant le mélange
+        complet que dans la zone modifiée
+
+        Returns:
+            np.ndarray: Tampon de sortie (réutilisé à l'image suivante)
+        """
+        # Hors de la zone modifiée le calque est noir : l'image est simplement assombrie
+        # (mêmes valeurs arrondies que cv2.addWeighted(img, 0.7, 0, 0.3, 0))
+        cv2.convertScaleAbs(img, self._output, IMAGE_WEIGHT)
+        if self._dirty is not None:
+            x0, y0, x1, y1 = self._dirty
+            cv2.addWeighted(img[y0:y1, x0:x1], IMAGE_WEIGHT, self._overlay[y0:y1, x0:x1], OVERLAY_WEIGHT, 0,
+                            dst=self._output[y0:y1, x0:x1])
+        self._previous_dirty = self._dirty
+        return self._output
+
+    def put_text(self, img, text, org, scale, color, thickness, font=cv2.FONT_HERSHEY_SIMPLEX):
+        """
+        Équivalent de cv2.putText utilisant une couverture rastérisée une seule fois
+
+        Args:
+            img: Image BGR modifiée sur place
+            text: Texte à afficher
+            org: Coin inférieur gauche du texte (comme cv2.putText)
+            scale: Échelle de la police
+            color: Couleur BGR
+            thickness: Épaisseur du trait
+            font: Police Hershey
+        """
+        key = (text, font, scale, thickness, tuple(color))
+        layer = self._text_cache.get(key)
+        if layer is None:
+            if len(self._text_cache) >= self.text_cache_size:
+                self._text_cache.clear()
+            layer = self._text_cache[key] = _TextLayer(text, font, scale, thickness, color)
+        h, w = img.shape[:2]
+        x0, y0 = org[0] + layer.dx, org[1] + layer.dy
+        # Limiter le mélange à la partie visible dans l'image
+        mx0, my0 = max(0, -x0), max(0, -y0)
+        mx1, my1 = min(layer.weights.shape[1], w - x0), min(layer.weights.shape[0], h - y0)
+        if mx1 <= mx0 or my1 <= my0:
+            return
+        target = img[y0 + my0:y0 + my1, x0 + mx0:x0 + mx1]
+        # Fond * (1 - couverture) + couleur * couverture, comme le lissage de cv2.putText
+        cv2.blendLinear(target, layer.patch[my0:my1, mx0:mx1], layer.inverse[my0:my1, mx0:mx1],
+                        layer.weights[my0:my1, mx0:mx1], dst=target)
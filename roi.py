@@ -0,0 +1,260 @@
+"""
+Inférence sur région d'intérêt avec réduction optionnelle de la résolution.
+
+Le visage et les mains n'occupent généralement qu'une petite partie de l'image.
+Le RegionDetector recadre l'image autour des points détectés à l'image
+précédente (boîte englobante agrandie), réduit éventuellement ce recadrage,
+exécute les détecteurs sur cette petite image puis replace les points
+normalisés dans le repère de l'image complète. Lorsque la région perd sa cible,
+la détection est relancée sur l'image complète.
+
+Les graphes MediaPipe en mode suivi supposent que les images successives ont
+la même géométrie : les recadrages, dont la position et la taille changent à
+chaque image, passent donc par des détecteurs sans suivi (static_image_mode),
+et les détecteurs avec suivi ne voient que l'image complète.
+"""
+import cv2  # Bibliothèque OpenCV pour le redimensionnement
+import numpy as np  # Pour les opérations mathématiques sur les tableaux
+
+from classification import FACE_LANDMARK_COUNT, HAND_LANDMARK_COUNT, handedness_labels, landmarks_to_array
+from detectors import Detections, DetectorSet
+
+
+def region_around(landmarks, img_shape, margin=0.4, min_size=96):
+    """
+    Calcule une région carrée autour de points normalisés
+
+    Args:
+        landmarks: Tableau (..., 3) de points normalisés (au moins un point)
+        img_shape: Dimensions de l'image (hauteur, largeur)
+        margin: Marge ajoutée de chaque côté, en fraction de la taille de la boîte
+        min_size: Côté minimal de la région en pixels
+
+    Returns:
+        Tuple: (x0, y0, x1, y1) en pixels, limité aux bords de l'image
+    """
+    h, w = img_shape[:2]
+    points = landmarks.reshape(-1, 3)[:, :2] * (w, h)
+    (x_min, y_min), (x_max, y_max) = points.min(axis=0), points.max(axis=0)
+    side = max(x_max - x_min, y_max - y_min) * (1 + 2 * margin)
+    side = max(side, min_size)
+    cx, cy = (x_min + x_max) / 2, (y_min + y_max) / 2
+    x0, y0 = int(max(cx - side / 2, 0)), int(max(cy - side / 2, 0))
+    x1, y1 = int(min(cx + side / 2, w)), int(min(cy + side / 2, h))
+    return x0, y0, x1, y1
+
+
+def region_pixels(region, img_shape):
+    """
+    Convertit une région normalisée en pixels pour une taille d'image
+
+    Args:
+        region: (x0, y0, x1, y1) normalisés dans [0, 1], ou None
+        img_shape: Dimensions de l'image (hauteur, largeur)
+
+    Returns:
+        Tuple: (x0, y0, x1, y1) en pixels, ou None
+    """
+    if region is None:
+        return None
+    h, w = img_shape[:2]
+    x0, y0, x1, y1 = region
+    return int(x0 * w), int(y0 * h), max(int(x1 * w), int(x0 * w) + 1), max(int(y1 * h), int(y0 * h) + 1)
+
+
+def normalized_region(region, img_shape):
+    """
+    Returns:
+        Tuple: Région (x0, y0, x1, y1) en pixels exprimée en fraction de l'image
+    """
+    h, w = img_shape[:2]
+    x0, y0, x1, y1 = region
+    return x0 / w, y0 / h, x1 / w, y1 / h
+
+
+def remap_landmarks(landmarks, region, img_shape):
+    """
+    Replace des points normalisés dans une région vers le repère de l'image complète
+
+    Args:
+        landmarks: Tableau (..., 3) de points normalisés par rapport à la région
+        region: (x0, y0, x1, y1) en pixels
+        img_shape: Dimensions de l'image complète (hauteur, largeur)
+
+    Returns:
+        np.ndarray: Points normalisés par rapport à l'image complète
+    """
+    h, w = img_shape[:2]
+    x0, y0, x1, y1 = region
+    region_w, region_h = x1 - x0, y1 - y0
+    remapped = landmarks.copy()
+    remapped[..., 0] = (x0 + landmarks[..., 0] * region_w) / w
+    remapped[..., 1] = (y0 + landmarks[..., 1] * region_h) / h
+    # MediaPipe exprime z à l'échelle de la largeur de l'image traitée
+    remapped[..., 2] = landmarks[..., 2] * region_w / w
+    return remapped
+
+
+class RegionDetector:
+    """
+    Enveloppe un DetectorSet : chaque détecteur travaille sur une région
+    recadrée autour de sa cible à l'image précédente, avec retour à l'image
+    complète quand la cible est perdue et périodiquement pour découvrir de
+    nouveaux visages ou de nouvelles mains.
+    """
+    def __init__(self, detectors, crop_detectors=None, margin=0.4, max_size=None, min_size=96, refresh_interval=30):
+        """
+        Args:
+            detectors: DetectorSet à utiliser sur l'image complète
+            crop_detectors: DetectorSet sans suivi (static_image_mode) pour les recadrages,
+                            None = en créer un du même mode (fermé par close())
+            margin: Marge autour de la boîte englobante, en fraction de sa taille
+            max_size: Côté maximal de la région transmise aux détecteurs (None = pas de réduction)
+            min_size: Côté minimal de la région en pixels
+            refresh_interval: Nombre d'images entre deux détections forcées sur l'image complète
+        """
+        self.detectors = detectors
+        if crop_detectors is None:
+            crop_detectors = DetectorSet(detectors.mode, parallel=detectors.parallel, static_image_mode=True)
+        self.crop_detectors = crop_detectors
+        self.margin = margin
+        self.max_size = max_size
+        self.min_size = min_size
+        self.refresh_interval = refresh_interval
+        # Régions normalisées (x0, y0, x1, y1) dans [0, 1], ou None = image complète : elles restent
+        # valables si la résolution de l'image change entre deux images
+        self.face_region = None  # Région du visage
+        self.hand_region = None  # Région des mains
+        self.frames = 0  # Nombre d'images traitées
+        self.fallbacks = 0  # Images où la cible a été perdue et recherchée sur l'image complète
+        self.pixels_processed = 0  # Pixels effectivement transmis aux détecteurs
+        self.pixels_full = 0  # Pixels qu'aurait traités la détection sur l'image complète
+        self.last_saving = 0.0  # Proportion de pixels économisée sur la dernière image
+
+    def _prepare(self, img_rgb, region):
+        """
+        Recadre (et réduit si nécessaire) l'image pour une région
+
+        Returns:
+            Tuple: (image à transmettre au détecteur, nombre de pixels)
+        """
+        if region is None:
+            return img_rgb, img_rgb.shape[0] * img_rgb.shape[1]
+        x0, y0, x1, y1 = region
+        crop = img_rgb[y0:y1, x0:x1]
+        longest = max(crop.shape[:2])
+        if self.max_size and longest > self.max_size:
+            # La réduction ne change pas les coordonnées normalisées par rapport à la région
+            scale = self.max_size / longest
+            crop = cv2.resize(crop, (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale))),
+                              interpolation=cv2.INTER_AREA)
+        else:
+            # MediaPipe attend un tableau contigu
+            crop = np.ascontiguousarray(crop)
+        return crop, crop.shape[0] * crop.shape[1]
+
+    def detect(self, img_rgb, profiler=None):
+        """
+        Args:
+            img_rgb: Image RGB complète
+            profiler: StageProfiler optionnel (étapes 'roi', 'face_mesh', 'hands')
+
+        Returns:
+            Detections: Points dans le repère de l'image complète
+        """
+        self.frames += 1
+        shape = img_rgb.shape
+        full_pixels = shape[0] * shape[1]
+        run_face = self.detectors.face_mesh is not None
+        run_hands = self.detectors.hands is not None
+        if self.frames % self.refresh_interval == 0:
+            self.face_region = self.hand_region = None
+
+        face_region, hand_region = region_pixels(self.face_region, shape), region_pixels(self.hand_region, shape)
+        face_img, face_pixels = self._prepare(img_rgb, face_region) if run_face else (None, 0)
+        hand_img, hand_pixels = self._prepare(img_rgb, hand_region) if run_hands else (None, 0)
+        if profiler is not None:
+            profiler.mark('roi')
+        face_results, hand_results = self._process(face_img, face_region, hand_img, hand_region, profiler)
+        pixels = face_pixels + hand_pixels
+
+        faces, hands, handedness = self._collect(face_results, hand_results, face_region, hand_region, shape)
+
+        # Cible perdue dans sa région : nouvelle recherche sur l'image complète
+        retry_face = run_face and face_region is not None and len(faces) == 0
+        retry_hands = run_hands and hand_region is not None and len(hands) == 0
+        if retry_face or retry_hands:
+            self.fallbacks += 1
+            face_results, hand_results = self.detectors.process_images(
+                img_rgb if retry_face else None, img_rgb if retry_hands else None, profiler)
+            pixels += full_pixels * (retry_face + retry_hands)
+            full_faces, full_hands, full_handedness = self._collect(face_results, hand_results, None, None, shape)
+            if retry_face:
+                faces = full_faces
+            if retry_hands:
+                hands, handedness = full_hands, full_handedness
+
+        # Régions de l'image suivante
+        self.face_region = (normalized_region(region_around(faces, shape, self.margin, self.min_size), shape)
+                            if len(faces) else None)
+        self.hand_region = (normalized_region(region_around(hands, shape, self.margin, self.min_size), shape)
+                            if len(hands) else None)
+
+        # Pixels économisés par rapport à la détection sur l'image complète
+        reference = full_pixels * (run_face + run_hands)
+        self.pixels_processed += pixels
+        self.pixels_full += reference
+        self.last_saving = 1 - pixels / reference if reference else 0.0
+        return Detections(faces=faces, hands=hands, handedness=handedness)
+
+    def _process(self, face_img, face_region, hand_img, hand_region, profiler):
+        """
+        Exécute chaque détecteur sur son image : recadrage sans suivi, image complète avec suivi
+
+        Returns:
+            Tuple: (résultats FaceMesh ou None, résultats Hands ou None)
+        """
+        face_crop, hand_crop = face_region is not None, hand_region is not None
+        full_face, full_hands = self.detectors.process_images(
+            None if face_crop else face_img, None if hand_crop else hand_img, profiler)
+        crop_face, crop_hands = self.crop_detectors.process_images(
+            face_img if face_crop else None, hand_img if hand_crop else None, profiler)
+        return crop_face if face_crop else full_face, crop_hands if hand_crop else full_hands
+
+    def _collect(self, face_results, hand_results, face_region, hand_region, shape):
+        """
+        Convertit les résultats en tableaux dans le repère de l'image complète
+        """
+        faces = np.empty((0, FACE_LANDMARK_COUNT, 3), dtype=np.float32)
+        hands = np.empty((0, HAND_LANDMARK_COUNT, 3), dtype=np.float32)
+        handedness = []
+        if face_results is not None and face_results.multi_face_landmarks:
+            faces = landmarks_to_array(face_results.multi_face_landmarks)
+            if face_region is not None:
+                faces = remap_landmarks(faces, face_region, shape)
+        if hand_results is not None and hand_results.multi_hand_landmarks:
+            hands = landmarks_to_array(hand_results.multi_hand_landmarks)
+            if hand_region is not None:
+                hands = remap_landmarks(hands, hand_region, shape)
+            handedness = handedness_labels(hand_results.multi_handedness)
+            handedness += [None] * (len(hands) - len(handedness))
+        return faces, hands, handedness
+
+    def reset(self):
+        """
+        Oublie les régions : la prochaine détection se fait sur l'image complète
+        """
+        self.face_region = self.hand_region = None
+
+    def close(self):
+        """
+        Ferme les détecteurs des recadrages (les graphes d'un DetectorPool restent ouverts)
+        """
+        self.crop_detectors.close()
+
+    @property
+    def saving(self):
+        """
+        Proportion de pixels économisée depuis le début
+        """
+        return 1 - self.pixels_processed / self.pixels_full if self.pixels_full else 0.0
@@ -0,0 +1,524 @@
+"""
+Règles d'expressions et de gestes déclaratives, compilées en prédicats NumPy.
+
+Un fichier de règles (JSON, ou YAML si PyYAML est installé) contient une
+section "expressions" et/ou "gestures" :
+
+    "gestures": {
+      "units": "normalized",
+      "features": {
+        "thumb_index_distance": {"distance": ["thumb_tip", "index_finger_tip"]},
+        "thumb_direction": {"difference": ["thumb_tip.x", "wrist.x"]}
+      },
+      "rules": [
+        {"label": "OK 👌", "when": [["thumb_index_distance", "<", 0.05],
+                                   {"extended": "middle"}, {"extended": "ring"}]}
+      ]
+    }
+
+- landmarks : noms des points ({"top_lip": 13}) ; les 21 points de la main
+  portent déjà les noms de HandLandmark (wrist, thumb_tip, index_finger_pip...)
+- units : "normalized" (coordonnées MediaPipe) ou "pixels" (tronquées comme
+  int(), selon la taille de l'image)
+- features : grandeurs nommées, calculées une fois par lot :
+  {"difference": [a, b]}, {"mean": [a, b, ...], "floor": true},
+  {"ratio": [a, b], "min_denominator": 1}, {"distance": [p, q], "axes": "xy"}
+  où a, b sont un point et un axe ("top_lip.y", "13.y"), une autre grandeur
+  ou un nombre, et p, q des points
+- rules : étiquette et conditions, toutes requises ; la première règle
+  satisfaite l'emporte. Conditions : [a, "<", b] (et <=, >, >=, ==, !=),
+  {"extended": doigt}, {"folded": doigt}, {"handedness": "Left" | "Right"},
+  {"all": [...]}, {"any": [...]}, {"not": condition}
+
+À la compilation, les grandeurs sont regroupées par niveau et par opération,
+les comparaisons par opérateur, et les conditions mises sous forme disjonctive :
+l'évaluation d'un lot coûte quelques opérations NumPy sur des colonnes, quel
+que soit le nombre de règles. default_rules.json reproduit les règles de
+classification.py. RuleBook recharge le fichier dès qu'il est modifié.
+
+Utilisation :
+    python rules.py default_rules.json
+"""
+import argparse  # Pour les options de la ligne de commande
+import itertools  # Pour développer les conditions en forme disjonctive
+import json  # Pour lire les fichiers de règles
+import os  # Pour surveiller la date de modification du fichier
+import time  # Pour limiter la fréquence des vérifications
+
+import numpy as np  # Pour les opérations mathématiques sur les tableaux
+
+from classification import FACE_LANDMARK_COUNT, HAND_LANDMARK_COUNT, frame_sizes
+
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'default_rules.json')
+
+# Sections d'un fichier de règles et nombre de points des éléments classés
+SECTIONS = {'expressions': FACE_LANDMARK_COUNT, 'gestures': HAND_LANDMARK_COUNT}
+UNITS = ('normalized', 'pixels')
+AXES = 'xyz'
+
+# Noms des points de la main (mediapipe.solutions.hands.HandLandmark, en minuscules)
+HAND_LANDMARK_NAMES = (
+    'wrist', 'thumb_cmc', 'thumb_mcp', 'thumb_ip', 'thumb_tip',
+    'index_finger_mcp', 'index_finger_pip', 'index_finger_dip', 'index_finger_tip',
+    'middle_finger_mcp', 'middle_finger_pip', 'middle_finger_dip', 'middle_finger_tip',
+    'ring_finger_mcp', 'ring_finger_pip', 'ring_finger_dip', 'ring_finger_tip',
+    'pinky_mcp', 'pinky_pip', 'pinky_dip', 'pinky_tip',
+)
+# Doigt tendu : bout plus haut (y plus petit) que l'articulation de référence
+FINGERS = {
+    'thumb': ('thumb_tip', 'thumb_ip'),
+    'index': ('index_finger_tip', 'index_finger_pip'),
+    'middle': ('middle_finger_tip', 'middle_finger_pip'),
+    'ring': ('ring_finger_tip', 'ring_finger_pip'),
+    'pinky': ('pinky_tip', 'pinky_pip'),
+}
+
+_COMPARISONS = {'<': np.less, '<=': np.less_equal, '>': np.greater,
+                '>=': np.greater_equal, '==': np.equal, '!=': np.not_equal}
+_FEATURES = ('difference', 'mean', 'ratio', 'distance')
+
+
+class RuleSet:
+    """
+    Règles compilées d'une section (expressions ou gestes)
+    """
+    def __init__(self, section, spec, source=None):
+        """
+        Args:
+            section: 'expressions' ou 'gestures'
+            spec: Contenu de la section (dictionnaire lu dans le fichier de règles)
+            source: Fichier d'origine (pour les messages d'erreur)
+
+        Raises:
+            ValueError: Si la section est invalide
+        """
+        if section not in SECTIONS:
+            raise ValueError(f"Section de règles inconnue: {section!r}")
+        self.section = section
+        self.source = source
+        self.landmark_count = SECTIONS[section]
+        _Compiler(self, spec).compile()
+
+    def codes(self, points, context=None):
+        """
+        Évalue toutes les règles sur un lot en une passe
+
+        Args:
+            points: Tableau (N, P, 3) de tous les points, ou réduit aux indices (N, len(indices), 3)
+            context: Pour les expressions, (hauteur, largeur[, canaux]) commun ou tableau (N, 2) ;
+                     pour les gestes, latéralités "Left"/"Right" ou tableau booléen (True = droite)
+
+        Returns:
+            np.ndarray: Codes entiers (N,) indexant labels (0 = aucune règle satisfaite)
+        """
+        points = np.asarray(points)
+        count = len(points)
+        if points.shape[1] == self.landmark_count:
+            coordinates = points[:, self._coord_points, self._coord_axes]
+        elif points.shape[1] == len(self.indices):
+            coordinates = points[:, self._coord_positions, self._coord_axes]
+        else:
+            raise ValueError(f"Forme de points inattendue: {points.shape}")
+        if count == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # Une ligne par colonne (coordonnée, constante, grandeur) : les lectures groupées sont contiguës
+        values = np.empty((self._columns, count))
+        values[self._coord_columns] = coordinates.T
+        if self.pixels:
+            if context is None:
+                raise ValueError("Les règles en pixels ont besoin de la taille de l'image")
+            w, h = frame_sizes(context, count)
+            scale = np.where(self._coord_axes[:, None] == 1, h, w)
+            values[self._coord_columns] = np.trunc(values[self._coord_columns] * scale)
+        values[self._constant_columns] = self._constant_values[:, None]
+        if self._handedness_column is not None:
+            if context is None:
+                raise ValueError("Les règles de latéralité ont besoin de la latéralité de chaque main")
+            handedness = np.asarray(context)
+            values[self._handedness_column] = handedness if handedness.dtype == bool else handedness == "Right"
+
+        # Grandeurs, niveau par niveau (une opération NumPy par groupe)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for operation, out, inputs, parameter in self._steps:
+                if operation == 'difference':
+                    values[out] = values[inputs[:, 0]] - values[inputs[:, 1]]
+                elif operation == 'mean':
+                    total = values[inputs[:, 0]]
+                    for j in range(1, inputs.shape[1]):
+                        total += values[inputs[:, j]]
+                    values[out] = np.floor_divide(total, inputs.shape[1]) if parameter else total / inputs.shape[1]
+                elif operation == 'ratio':
+                    values[out] = values[inputs[:, 0]] / np.maximum(values[inputs[:, 1]], parameter)
+                else:  # distance : inputs = (p.x, p.y..., q.x, q.y...)
+                    axes = inputs.shape[1] // 2
+                    squares = (values[inputs[:, 0]] - values[inputs[:, axes]]) ** 2
+                    for k in range(1, axes):
+                        squares += (values[inputs[:, k]] - values[inputs[:, axes + k]]) ** 2
+                    values[out] = np.sqrt(squares)
+
+        # Comparaisons (une par opérateur), puis termes satisfaits et première règle vraie
+        literals = np.empty((2 * self._literal_count, count), dtype=bool)
+        for function, rows, lhs, rhs in self._comparisons:
+            literals[rows] = function(values[lhs], values[rhs])
+        np.logical_not(literals[:self._literal_count], out=literals[self._literal_count:])
+        missing = self._terms @ np.logical_not(literals).astype(np.float32)
+        satisfied = np.logical_or.reduceat(missing == 0, self._rule_starts, axis=0)
+        return np.where(satisfied.any(axis=0), self._rule_codes[satisfied.argmax(axis=0)], 0)
+
+    def classify(self, points, context=None):
+        """
+        Returns:
+            np.ndarray: Étiquettes (dtype object) : étiquette de la première règle satisfaite ou None
+        """
+        return self.labels[self.codes(points, context)]
+
+
+class _Compiler:
+    """
+    Traduit une section de règles en colonnes et en étapes vectorisées d'un RuleSet
+    """
+    def __init__(self, rule_set, spec):
+        self.rule_set = rule_set
+        self.spec = spec
+        self.where = f"{rule_set.source or 'règles'} [{rule_set.section}]"
+        self.columns = 0
+        self.coordinates = {}  # (point, axe) -> colonne
+        self.constants = {}  # valeur -> colonne
+        self.handedness = None  # colonne de latéralité (1 = droite)
+        self.features = {}  # nom -> (colonne, niveau)
+        self.resolving = set()
+        self.steps = {}  # (niveau, opération, arité, paramètre ou None) -> [(sortie, entrées, paramètre)]
+        self.literals = {}  # (opérateur, gauche, droite) -> littéral
+
+    def error(self, message):
+        return ValueError(f"{self.where}: {message}")
+
+    def new_column(self):
+        self.columns += 1
+        return self.columns - 1
+
+    def compile(self):
+        spec = self.spec
+        if not isinstance(spec, dict):
+            raise self.error("la section doit être un objet")
+        unknown = set(spec) - {'units', 'landmarks', 'fingers', 'features', 'rules'}
+        if unknown:
+            raise self.error(f"clés inconnues {sorted(unknown)}")
+        units = spec.get('units', 'normalized')
+        if units not in UNITS:
+            raise self.error(f"unités inconnues {units!r} (attendu: {', '.join(UNITS)})")
+
+        self.landmarks = dict(zip(HAND_LANDMARK_NAMES, range(HAND_LANDMARK_COUNT))) \
+            if self.rule_set.section == 'gestures' else {}
+        self.landmarks.update(spec.get('landmarks', {}))
+        self.fingers = dict(FINGERS) if self.rule_set.section == 'gestures' else {}
+        self.fingers.update({name: tuple(points) for name, points in spec.get('fingers', {}).items()})
+        self.feature_specs = spec.get('features', {})
+
+        rules = spec.get('rules')
+        if not rules:
+            raise self.error("aucune règle")
+        labels = [None]
+        rule_codes, rule_terms = [], []
+        for rule in rules:
+            if not isinstance(rule, dict) or 'label' not in rule:
+                raise self.error(f"règle sans étiquette: {rule!r}")
+            terms = self.dnf({'all': rule.get('when', [])})
+            if not terms:
+                raise self.error(f"la règle {rule['label']!r} ne peut jamais être satisfaite")
+            if rule['label'] not in labels:
+                labels.append(rule['label'])
+            rule_codes.append(labels.index(rule['label']))
+            rule_terms.append(terms)
+
+        rule_set = self.rule_set
+        rule_set.pixels = units == 'pixels'
+        rule_set.labels = np.array(labels, dtype=object)
+        rule_set.rules = [rule['label'] for rule in rules]
+        self.finish_coordinates(rule_set)
+        rule_set._columns = self.columns
+        rule_set._constant_columns = np.array(list(self.constants.values()), dtype=np.intp)
+        rule_set._constant_values = np.array(list(self.constants.keys()), dtype=np.float64)
+        rule_set._handedness_column = self.handedness
+        rule_set._steps = []
+        for (_, operation, _, parameter), group in sorted(self.steps.items(), key=lambda item: item[0][0]):
+            if operation == 'ratio':
+                parameter = np.array([minimum for _, _, minimum in group])  # Dénominateur minimal par grandeur
+            rule_set._steps.append((operation, np.array([out for out, _, _ in group], dtype=np.intp),
+                                    np.array([inputs for _, inputs, _ in group], dtype=np.intp), parameter))
+
+        # Littéraux : lignes [0, C) pour les comparaisons, [C, 2C) pour leurs négations
+        count = len(self.literals)
+        by_operator = {}
+        for (operator, lhs, rhs), literal in self.literals.items():
+            by_operator.setdefault(operator, []).append((literal, lhs, rhs))
+        rule_set._literal_count = count
+        rule_set._comparisons = [(_COMPARISONS[operator], *(np.array(column, dtype=np.intp) for column in zip(*group)))
+                                 for operator, group in by_operator.items()]
+        all_terms = [term for terms in rule_terms for term in terms]
+        rule_set._terms = np.zeros((len(all_terms), 2 * count), dtype=np.float32)
+        for t, term in enumerate(all_terms):
+            for literal, positive in term:
+                rule_set._terms[t, literal if positive else count + literal] = 1
+        rule_set._rule_starts = np.cumsum([0] + [len(terms) for terms in rule_terms[:-1]])
+        rule_set._rule_codes = np.array(rule_codes)
+
+    def finish_coordinates(self, rule_set):
+        """
+        Indices des points lus par les règles et correspondance avec les colonnes
+        """
+        keys = list(self.coordinates)
+        points = np.array([point for point, _ in keys], dtype=np.intp)
+        rule_set.indices = np.unique(points)
+        rule_set._coord_columns = np.array([self.coordinates[key] for key in keys], dtype=np.intp)
+        rule_set._coord_points = points
+        rule_set._coord_positions = np.searchsorted(rule_set.indices, points)
+        rule_set._coord_axes = np.array([AXES.index(axis) for _, axis in keys], dtype=np.intp)
+
+    def point(self, reference):
+        """
+        Returns:
+            Int: Indice du point désigné par son nom ou son numéro
+        """
+        index = self.landmarks.get(reference, reference)
+        if isinstance(index, str) and index.isdigit():
+            index = int(index)
+        if isinstance(index, bool) or not isinstance(index, int) or not 0 <= index < self.rule_set.landmark_count:
+            raise self.error(f"point inconnu {reference!r}")
+        return index
+
+    def coordinate(self, point, axis):
+        key = (self.point(point), axis)
+        if key not in self.coordinates:
+            self.coordinates[key] = self.new_column()
+        return self.coordinates[key]
+
+    def constant(self, value):
+        value = float(value)
+        if value not in self.constants:
+            self.constants[value] = self.new_column()
+        return self.constants[value]
+
+    def operand(self, reference):
+        """
+        Returns:
+            Tuple: (colonne, niveau) d'une grandeur, d'une coordonnée ou d'une constante
+        """
+        if isinstance(reference, (int, float)) and not isinstance(reference, bool):
+            return self.constant(reference), 0
+        if not isinstance(reference, str):
+            raise self.error(f"référence invalide {reference!r}")
+        if reference in self.feature_specs:
+            return self.feature(reference)
+        point, _, axis = reference.rpartition('.')
+        if point and axis in AXES:
+            return self.coordinate(point, axis), 0
+        raise self.error(f"référence inconnue {reference!r} (grandeur ou point.axe attendu)")
+
+    def feature(self, name):
+        """
+        Compile une grandeur nommée (une seule fois, même si elle est lue par plusieurs règles)
+        """
+        if name in self.features:
+            return self.features[name]
+        if name in self.resolving:
+            raise self.error(f"définition circulaire de {name!r}")
+        self.resolving.add(name)
+        spec = self.feature_specs[name]
+        operations = [key for key in _FEATURES if key in spec] if isinstance(spec, dict) else []
+        if len(operations) != 1:
+            raise self.error(f"la grandeur {name!r} doit avoir une opération parmi {', '.join(_FEATURES)}")
+        operation = operations[0]
+        arguments = spec[operation]
+        if not isinstance(arguments, list) or len(arguments) < 2 or (operation != 'mean' and len(arguments) != 2):
+            raise self.error(f"arguments invalides pour {operation} dans {name!r}")
+
+        parameter = None
+        if operation == 'distance':
+            axes = spec.get('axes', AXES)
+            if not axes or set(axes) - set(AXES):
+                raise self.error(f"axes invalides {axes!r} dans {name!r}")
+            inputs = [(self.coordinate(point, axis), 0) for point in arguments for axis in axes]
+        else:
+            inputs = [self.operand(argument) for argument in arguments]
+            if operation == 'mean':
+                parameter = bool(spec.get('floor', False))
+            elif operation == 'ratio':
+                parameter = float(spec.get('min_denominator', -np.inf))
+        level = 1 + max(level for _, level in inputs)
+        column = self.new_column()
+        key = (level, operation, len(inputs), parameter if operation == 'mean' else None)
+        self.steps.setdefault(key, []).append((column, [c for c, _ in inputs], parameter))
+        self.resolving.discard(name)
+        self.features[name] = (column, level)
+        return self.features[name]
+
+    def literal(self, operator, lhs, rhs):
+        key = (operator, lhs, rhs)
+        if key not in self.literals:
+            self.literals[key] = len(self.literals)
+        return self.literals[key]
+
+    def dnf(self, condition):
+        """
+        Met une condition sous forme disjonctive
+
+        Returns:
+            List: Termes (frozenset de (littéral, positif)) ; la condition est vraie si un terme l'est
+        """
+        if isinstance(condition, list) and len(condition) == 3 and condition[1] in _COMPARISONS:
+            lhs, operator, rhs = condition
+            literal = self.literal(operator, self.operand(lhs)[0], self.operand(rhs)[0])
+            return [frozenset({(literal, True)})]
+        if not isinstance(condition, dict) or len(condition) != 1:
+            raise self.error(f"condition invalide {condition!r}")
+        (kind, argument), = condition.items()
+        if kind in ('extended', 'folded'):
+            if argument not in self.fingers:
+                raise self.error(f"doigt inconnu {argument!r}")
+            tip, joint = self.fingers[argument]
+            operator = '<' if kind == 'extended' else '>'
+            literal = self.literal(operator, self.coordinate(tip, 'y'), self.coordinate(joint, 'y'))
+            return [frozenset({(literal, True)})]
+        if kind == 'handedness':
+            if self.rule_set.section != 'gestures' or argument not in ("Left", "Right"):
+                raise self.error(f"condition de latéralité invalide {condition!r}")
+            if self.handedness is None:
+                self.handedness = self.new_column()
+            literal = self.literal('==', self.handedness, self.constant(argument == "Right"))
+            return [frozenset({(literal, True)})]
+        if kind in ('all', 'any'):
+            if not isinstance(argument, list):
+                raise self.error(f"{kind} attend une liste de conditions")
+            children = [self.dnf(child) for child in argument]
+            if kind == 'any':
+                return [term for child in children for term in child]
+            return [frozenset().union(*combination) for combination in itertools.product(*children)]
+        if kind == 'not':
+            # Loi de De Morgan : non (t1 ou t2) = (non t1) et (non t2), chaque non ti étant une disjonction
+            negated = [[frozenset({(literal, not positive)}) for literal, positive in term]
+                       for term in self.dnf(argument)]
+            return [frozenset().union(*combination) for combination in itertools.product(*negated)]
+        raise self.error(f"condition inconnue {kind!r}")
+
+
+def read_rules(path):
+    """
+    Lit un fichier de règles JSON (ou YAML pour les extensions .yaml et .yml)
+
+    Returns:
+        Dict: Contenu du fichier
+
+    Raises:
+        ValueError: Si le fichier n'est pas un JSON (ou YAML) valide
+    """
+    with open(path, encoding='utf-8') as stream:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml  # Facultatif, uniquement pour les fichiers YAML
+            except ImportError:
+                raise ImportError("PyYAML est nécessaire pour lire des règles YAML (pip install pyyaml)") from None
+            try:
+                return yaml.safe_load(stream)
+            except yaml.YAMLError as error:
+                raise ValueError(f"{path}: {error}") from None
+        try:
+            return json.load(stream)
+        except json.JSONDecodeError as error:
+            raise ValueError(f"{path}: {error}") from None
+
+
+def load_rules(path=DEFAULT_RULES):
+    """
+    Lit et compile un fichier de règles
+
+    Returns:
+        Dict: RuleSet de chaque section présente ('expressions' et/ou 'gestures')
+    """
+    content = read_rules(path)
+    if not isinstance(content, dict) or not set(content) & set(SECTIONS):
+        raise ValueError(f"{path}: aucune section {' ou '.join(SECTIONS)}")
+    unknown = set(content) - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"{path}: sections inconnues {sorted(unknown)}")
+    return {section: RuleSet(section, spec, path) for section, spec in content.items()}
+
+
+class RuleBook:
+    """
+    Règles chargées depuis un fichier et rechargées dès qu'il est modifié
+    """
+    def __init__(self, path=DEFAULT_RULES, check_interval=1.0):
+        """
+        Args:
+            path: Fichier de règles
+            check_interval: Secondes minimales entre deux vérifications de la date de modification
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0  # Incrémenté à chaque chargement réussi
+        self.error = None  # Message de la dernière erreur de chargement
+        self._mtime = None
+        self._last_check = 0.0
+        self.expressions = None  # RuleSet des expressions (None = section absente)
+        self.gestures = None  # RuleSet des gestes
+        self.reload()
+        if self.error:
+            raise ValueError(self.error)
+
+    def reload(self):
+        """
+        Recharge le fichier ; en cas d'erreur, les règles précédentes sont conservées
+
+        Returns:
+            Bool: True si de nouvelles règles sont en place
+        """
+        self._last_check = time.monotonic()
+        try:
+            self._mtime = os.stat(self.path).st_mtime_ns
+            rule_sets = load_rules(self.path)
+        except (OSError, ValueError, ImportError) as error:
+            self.error = str(error)
+            return False
+        self.error = None
+        self.expressions = rule_sets.get('expressions')
+        self.gestures = rule_sets.get('gestures')
+        self.version += 1
+        return True
+
+    def reload_if_changed(self):
+        """
+        Recharge le fichier s'il a été modifié (au plus une vérification par check_interval)
+
+        Returns:
+            Bool: True si de nouvelles règles sont en place
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False  # Fichier en cours de remplacement : nouvelle tentative plus tard
+        if mtime == self._mtime:
+            return False
+        return self.reload()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vérifie et compile un fichier de règles")
+    parser.add_argument('path', nargs='?', default=DEFAULT_RULES, help="Fichier de règles (défaut: default_rules.json)")
+    args = parser.parse_args(argv)
+
+    for section, rule_set in load_rules(args.path).items():
+        print(f"{section}: {len(rule_set.rules)} règles, {len(rule_set.labels) - 1} étiquettes, "
+              f"{len(rule_set.indices)} points lus, {len(rule_set._steps)} étapes de calcul, "
+              f"{rule_set._literal_count} comparaisons, {len(rule_set._terms)} termes")
+        for label in rule_set.labels[1:]:
+            print(f"  {label}")
+
+
+if __name__ == "__main__":
+    main()
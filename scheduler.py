@@ -0,0 +1,257 @@
+"""
+Planification adaptative de l'inférence par images clés.
+
+L'inférence complète FaceMesh/Hands n'est exécutée que sur les images clés ;
+entre deux images clés, les points sont déplacés par flux optique (Lucas-Kanade
+pyramidal) sur l'image en niveaux de gris. Pour le visage, seul un échantillon
+des 468 points est suivi et une similitude (translation, rotation, échelle)
+estimée sur cet échantillon déplace tout le maillage ; les 21 points de chaque
+main sont suivis individuellement pour conserver la position des doigts.
+L'intervalle entre images clés est choisi automatiquement pour tenir un budget
+de temps par image, et une image clé est forcée dès que le mouvement ou
+l'erreur de suivi devient trop grand.
+"""
+import math  # Pour l'arrondi supérieur de l'intervalle
+import time  # Pour mesurer le coût de l'inférence et du suivi
+
+import cv2  # Bibliothèque OpenCV pour le flux optique
+import numpy as np  # Pour les opérations mathématiques sur les tableaux
+
+from detectors import Detections
+
+# Échantillon des points du maillage facial suivis par flux optique (1 sur 6)
+FACE_TRACK_INDICES = np.arange(0, 468, 6)
+
+
+class KeyframeScheduler:
+    """
+    Choisit l'intervalle entre images clés à partir du coût mesuré de
+    l'inférence (image clé) et du suivi (image intermédiaire).
+
+    Avec un intervalle k, le coût moyen par image vaut
+    (coût_clé + (k - 1) * coût_suivi) / k ; on retient le plus petit k qui
+    respecte le budget, borné par max_interval.
+    """
+    def __init__(self, budget_ms=20.0, max_interval=10, smoothing=0.2):
+        """
+        Args:
+            budget_ms: Temps de détection visé par image, en millisecondes
+            max_interval: Nombre maximal d'images entre deux images clés
+            smoothing: Coefficient de la moyenne mobile exponentielle des coûts
+        """
+        self.budget = budget_ms / 1000
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self.interval = 1  # Intervalle courant (1 = inférence sur chaque image)
+        self.since_keyframe = 0  # Images suivies depuis la dernière image clé
+        self.keyframe_cost = None  # Coût moyen d'une image clé (secondes)
+        self.track_cost = None  # Coût moyen d'une image suivie (secondes)
+
+    def keyframe_due(self):
+        """
+        Returns:
+            Bool: True si l'intervalle courant impose une image clé
+        """
+        return self.since_keyframe + 1 >= self.interval
+
+    def record_keyframe(self, cost):
+        """
+        Enregistre le coût d'une image clé (en secondes)
+        """
+        self.keyframe_cost = self._smooth(self.keyframe_cost, cost)
+        self.since_keyframe = 0
+        self._update_interval()
+
+    def record_tracked(self, cost):
+        """
+        Enregistre le coût d'une image suivie (en secondes)
+        """
+        self.track_cost = self._smooth(self.track_cost, cost)
+        self.since_keyframe += 1
+        self._update_interval()
+
+    def _smooth(self, average, value):
+        return value if average is None else average + self.smoothing * (value - average)
+
+    def _update_interval(self):
+        if self.keyframe_cost is None or self.keyframe_cost <= self.budget:
+            # L'inférence tient dans le budget : pas besoin de sauter des images
+            self.interval = 1
+            return
+        track_cost = self.track_cost if self.track_cost is not None else 0.0
+        if track_cost >= self.budget:
+            # Même le suivi dépasse le budget : espacer au maximum les images clés
+            self.interval = self.max_interval
+            return
+        needed = (self.keyframe_cost - track_cost) / (self.budget - track_cost)
+        self.interval = max(1, min(self.max_interval, math.ceil(needed)))
+
+
+class LandmarkTracker:
+    """
+    Suivi des points par flux optique Lucas-Kanade avec contrôle aller-retour :
+    un point est perdu si le flux échoue ou si le suivi inverse ne le ramène pas
+    à moins de max_fb_error pixels de sa position de départ.
+    """
+    def __init__(self, win_size=(15, 15), max_level=2, max_fb_error=2.0):
+        """
+        Args:
+            win_size: Taille de la fenêtre de recherche
+            max_level: Nombre de niveaux de la pyramide
+            max_fb_error: Erreur aller-retour maximale en pixels
+        """
+        self.lk_params = dict(
+            winSize=win_size, maxLevel=max_level,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+        )
+        self.max_fb_error = max_fb_error
+
+    def track(self, prev_gray, gray, points):
+        """
+        Args:
+            prev_gray: Image précédente en niveaux de gris
+            gray: Image courante en niveaux de gris
+            points: Tableau (K, 2) float32 de positions en pixels dans prev_gray
+
+        Returns:
+            Tuple: (nouvelles positions (K, 2), masque booléen (K,) des points suivis)
+        """
+        points = points.reshape(-1, 1, 2)
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, **self.lk_params)
+        back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, new_points, None, **self.lk_params)
+        fb_error = np.linalg.norm((back_points - points).reshape(-1, 2), axis=1)
+        valid = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.max_fb_error)
+        return new_points.reshape(-1, 2), valid
+
+
+class AdaptiveDetector:
+    """
+    Enveloppe un DetectorSet : inférence sur les images clés, suivi des points
+    entre deux, avec retour à l'inférence dès que le suivi n'est plus fiable.
+    """
+    def __init__(self, detectors, scheduler=None, tracker=None,
+                 max_motion=0.03, max_lost_ratio=0.3):
+        """
+        Args:
+            detectors: DetectorSet utilisé sur les images clés
+            scheduler: KeyframeScheduler (défaut: budget de 20 ms)
+            tracker: LandmarkTracker (défaut: paramètres standards)
+            max_motion: Déplacement médian maximal des points entre deux images,
+                        en fraction de la largeur de l'image, avant de forcer une image clé
+            max_lost_ratio: Proportion maximale de points perdus avant de forcer une image clé
+        """
+        self.detectors = detectors
+        self.scheduler = scheduler or KeyframeScheduler()
+        self.tracker = tracker or LandmarkTracker()
+        self.max_motion = max_motion
+        self.max_lost_ratio = max_lost_ratio
+        self.frames = 0  # Nombre total d'images traitées
+        self.keyframes = 0  # Nombre d'images clés (inférence complète)
+        self.forced_keyframes = 0  # Images clés forcées par le mouvement ou l'erreur de suivi
+        self._prev_gray = None
+        self._prev = None  # Detections de l'image précédente
+
+    def process(self, img_bgr, img_rgb, profiler=None):
+        """
+        Args:
+            img_bgr: Image BGR (utilisée pour le flux optique)
+            img_rgb: La même image en RGB (utilisée pour l'inférence)
+            profiler: StageProfiler optionnel (étapes 'track', 'face_mesh', 'hands')
+
+        Returns:
+            Detections: Points détectés (keyframe=True) ou suivis (keyframe=False)
+        """
+        self.frames += 1
+        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+
+        detections = None
+        if self._prev_gray is not None and self._prev_gray.shape != gray.shape:
+            # Résolution changée (par exemple par le ResolutionTuner) : pas de flux optique possible
+            self.forced_keyframes += 1
+        elif (self._prev is not None and not self._prev.empty
+                and not self.scheduler.keyframe_due()):
+            start = time.perf_counter()
+            detections = self._track(gray, img_bgr.shape)
+            if profiler is not None:
+                profiler.mark('track')
+            if detections is None:
+                self.forced_keyframes += 1
+            else:
+                self.scheduler.record_tracked(time.perf_counter() - start)
+
+        if detections is None:
+            start = time.perf_counter()
+            detections = self.detectors.detect(img_rgb, profiler)
+            self.scheduler.record_keyframe(time.perf_counter() - start)
+            self.keyframes += 1
+
+        self._prev_gray = gray
+        self._prev = detections
+        return detections
+
+    def _track(self, gray, shape):
+        """
+        Déplace les points de l'image précédente par flux optique
+
+        Returns:
+            Detections: Points suivis, ou None si le suivi n'est pas fiable
+        """
+        h, w = shape[:2]
+        size = np.array([w, h], dtype=np.float32)
+        faces, hands = self._prev.faces, self._prev.hands
+        face_samples = faces[:, FACE_TRACK_INDICES, :2].reshape(-1, 2)
+        points = np.concatenate([face_samples, hands[:, :, :2].reshape(-1, 2)]) * size
+
+        new_points, valid = self.tracker.track(self._prev_gray, gray, points)
+        if not valid.any() or 1 - valid.mean() > self.max_lost_ratio:
+            return None
+        displacement = new_points - points
+        if np.median(np.linalg.norm(displacement[valid], axis=1)) / w > self.max_motion:
+            return None
+
+        # Visages : similitude estimée sur les points échantillonnés, appliquée à tout le maillage
+        new_faces = faces.copy()
+        sample_count = len(FACE_TRACK_INDICES)
+        for i in range(len(faces)):
+            part = slice(i * sample_count, (i + 1) * sample_count)
+            ok = valid[part]
+            if ok.sum() < 3:
+                return None
+            matrix, _ = cv2.estimateAffinePartial2D(points[part][ok], new_points[part][ok])
+            if matrix is None:
+                return None
+            pixels = faces[i, :, :2] * size
+            new_faces[i, :, :2] = (pixels @ matrix[:, :2].T + matrix[:, 2]) / size
+            # La profondeur relative suit le changement d'échelle
+            new_faces[i, :, 2] *= np.hypot(matrix[0, 0], matrix[1, 0])
+
+        # Mains : chaque point suit son propre flux ; les points perdus suivent le déplacement médian de la main
+        new_hands = hands.copy()
+        offset = len(faces) * sample_count
+        for i in range(len(hands)):
+            part = slice(offset + i * hands.shape[1], offset + (i + 1) * hands.shape[1])
+            ok = valid[part]
+            hand_points = new_points[part]
+            if ok.any():
+                shift = np.median(displacement[part][ok], axis=0)
+            else:
+                shift = np.median(displacement[valid], axis=0)
+            hand_points[~ok] = points[part][~ok] + shift
+            new_hands[i, :, :2] = hand_points / size
+
+        return Detections(faces=new_faces, hands=new_hands,
+                          handedness=self._prev.handedness, keyframe=False)
+
+    @property
+    def keyframe_ratio(self):
+        """
+        Proportion d'images ayant nécessité une inférence complète
+        """
+        return self.keyframes / self.frames if self.frames else 0.0
+
+    def reset(self):
+        """
+        Oublie les points précédents : la prochaine image sera une image clé
+        """
+        self._prev_gray = None
+        self._prev = None
@@ -0,0 +1,679 @@
+"""
+Serveur de détection multi-sources.
+
+Plusieurs caméras ou fichiers vidéo sont lus chacun par un thread de capture,
+avec un plafond de cadence et une politique de rejet propres à la source. Un
+répartiteur distribue les images à tour de rôle entre les sources (une image
+par source et par tour) à un nombre fixe de processus d'inférence, chacun
+possédant ses propres instances FaceMesh/Hands (une par source rencontrée,
+pour que le suivi MediaPipe d'une source ne soit pas perturbé par les autres).
+Une source est de préférence renvoyée au processus qui a traité son image
+précédente. Le débit et la latence (capture -> résultat) sont mesurés par source.
+
+Par défaut, les images ne sont pas sérialisées vers les processus d'inférence :
+chaque source capture directement dans un FrameRing (mémoire partagée) et seul
+le numéro d'emplacement est transmis (--transport pickle pour revenir aux copies).
+
+Les fichiers vidéo remplacent des caméras avec --realtime (lecture à la cadence
+du fichier) et --loop (relecture sans fin).
+
+Utilisation :
+    python server.py clip1.mp4 clip2.mp4 "entree=0,fps=15,drop=newest" --workers 4 --realtime
+"""
+import argparse  # Pour les options de la ligne de commande
+import collections  # Pour la file à double entrée (deque)
+import json  # Pour l'écriture des résultats et du résumé
+import multiprocessing  # Pour les processus d'inférence
+import os  # Pour le nombre de cœurs
+import sys  # Pour la sortie d'erreur
+import threading  # Pour les threads de capture, de répartition et de collecte
+import time  # Pour les cadences et les latences
+import traceback  # Pour remonter les erreurs des processus d'inférence
+
+import cv2  # Bibliothèque OpenCV pour la capture vidéo
+
+from detectors import DETECTION_MODES
+from framering import FrameRing
+from instrumentation import StageProfiler
+from pipeline import FramePacket, open_capture
+
+DROP_POLICIES = ('oldest', 'newest', 'block')  # Image jetée quand la file d'une source est pleine
+QUEUE_STAGE = 'queue'  # Attente entre la capture et le début de l'inférence
+LATENCY_STAGE = 'latency'  # Latence de bout en bout (capture -> résultat reçu)
+TRANSPORTS = ('shared', 'pickle')  # Transmission des images : FrameRing ou copie sérialisée
+
+
+class RingPacket(FramePacket):
+    """
+    Image écrite dans un emplacement du FrameRing de sa source
+    """
+    __slots__ = ('slot', 'sequence')
+
+    def __init__(self, frame_id, capture_time, frame, slot, sequence):
+        super().__init__(frame_id, capture_time, frame)
+        self.slot = slot  # Emplacement dans l'anneau
+        self.sequence = sequence  # Numéro de séquence attribué à la publication
+
+
+class FrameQueue:
+    """
+    File bornée des images d'une source.
+
+    Politique appliquée quand la file est pleine :
+    - 'oldest' : l'image la plus ancienne est jetée (caméra en direct)
+    - 'newest' : l'image qui arrive est jetée
+    - 'block' : le producteur attend une place (aucune image perdue, lecture de fichiers)
+    """
+    def __init__(self, maxsize=2, policy='oldest', on_drop=None):
+        """
+        Args:
+            maxsize: Nombre maximal d'images en attente
+            policy: Politique de rejet ('oldest', 'newest' ou 'block')
+            on_drop: Fonction appelée avec chaque image jetée ou refusée (libération de son emplacement)
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize doit être supérieur ou égal à 1")
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Politique de rejet inconnue: {policy!r}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0  # Nombre d'images jetées faute de place
+        self.on_drop = on_drop
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, item):
+        """
+        Ajoute une image selon la politique de rejet
+
+        Returns:
+            Bool: True si l'image a été ajoutée
+        """
+        dropped = None
+        with self._cond:
+            if self.policy == 'block':
+                self._cond.wait_for(lambda: len(self._items) < self.maxsize or self._closed)
+            if self._closed:
+                dropped = item
+            elif len(self._items) >= self.maxsize:
+                self.dropped += 1
+                dropped = item if self.policy == 'newest' else self._items.popleft()
+            if dropped is not item:
+                self._items.append(item)
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+        return dropped is not item
+
+    def get_nowait(self):
+        """
+        Returns:
+            L'image la plus ancienne encore présente, ou None si la file est vide
+        """
+        with self._cond:
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()  # Réveille un producteur bloqué
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class StreamSource:
+    """
+    Source vidéo du serveur : thread de capture, plafond de cadence, file et statistiques
+    """
+    def __init__(self, name, source, max_fps=None, drop='oldest', queue_size=2,
+                 realtime=False, loop=False, max_frames=None, stats_window=1000):
+        """
+        Args:
+            name: Nom de la source dans les résultats et les statistiques
+            source: Source acceptée par open_capture() (index de caméra, fichier, URL)
+            max_fps: Cadence maximale transmise à l'inférence (None = toutes les images)
+            drop: Politique de rejet quand la file est pleine ('oldest', 'newest' ou 'block')
+            queue_size: Nombre d'images en attente d'inférence
+            realtime: True pour lire un fichier à sa cadence nominale, comme une caméra
+            loop: True pour relire un fichier sans fin
+            max_frames: Nombre maximal d'images capturées (None = jusqu'à la fin de la source)
+            stats_window: Nombre d'images conservées pour les statistiques glissantes
+        """
+        self.name = name
+        self.source = source
+        self.max_fps = max_fps
+        self.realtime = realtime
+        self.loop = loop
+        self.max_frames = max_frames
+        self.queue = FrameQueue(queue_size, drop, on_drop=self._release)
+        self.ring = None  # FrameRing créé à la première image (transport 'shared')
+        self.ring_slots = 0  # Emplacements de l'anneau (0 = images transmises par copie)
+        self.profiler = StageProfiler(window=stats_window)  # Durées par étape et latence de chaque image traitée
+
+        self.captured = 0  # Images lues
+        self.throttled = 0  # Images ignorées par le plafond de cadence
+        self.processed = 0  # Images dont le résultat a été reçu
+        self.shared = 0  # Images transmises par le FrameRing (sans copie)
+        self.finished = False  # Fin de la source atteinte
+        self.error = None  # Exception levée par le thread de capture
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def dropped(self):
+        return self.queue.dropped
+
+    def start(self, wake, ring_slots=0):
+        """
+        Démarre le thread de capture
+
+        Args:
+            wake: Fonction appelée après chaque image ajoutée (réveille le répartiteur)
+            ring_slots: Emplacements du FrameRing dans lequel capturer (0 = sans mémoire partagée)
+        """
+        self.ring_slots = ring_slots
+        self._thread = threading.Thread(target=self._capture_loop, args=(wake,),
+                                        name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self.queue.close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close_ring(self):
+        """
+        Supprime le FrameRing (une fois les processus d'inférence arrêtés)
+        """
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def _release(self, packet):
+        if isinstance(packet, RingPacket):
+            self.ring.release(packet.slot)
+
+    def _read(self, cap):
+        """
+        Lit l'image suivante, directement dans un emplacement du FrameRing si possible
+
+        Returns:
+            Tuple: (succès, image, emplacement ou None si l'image n'est pas dans l'anneau)
+        """
+        ring = self.ring
+        slot = ring.acquire() if ring is not None else None
+        buffer = ring.frame(slot) if slot is not None else None
+        success, frame = cap.read(buffer)
+        if not success and self.loop and self.captured:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Relire le fichier depuis le début
+            success, frame = cap.read(buffer)
+        if slot is not None and not (success and frame.ctypes.data == buffer.ctypes.data):
+            # Échec, ou image d'une autre taille réallouée par OpenCV : transmise par copie
+            ring.release(slot)
+            slot = None
+        elif success and ring is None and self.ring_slots and frame.dtype == 'uint8':
+            # Anneau dimensionné d'après la première image
+            ring = self.ring = FrameRing(self.ring_slots, frame.shape)
+            slot = ring.acquire()
+            ring.frame(slot)[...] = frame
+            frame = ring.frame(slot)
+        return success, frame, slot
+
+    def _capture_loop(self, wake):
+        cap = open_capture(self.source)
+        try:
+            # Cadence nominale du fichier pour simuler une caméra
+            native_fps = cap.get(cv2.CAP_PROP_FPS) if self.realtime else 0
+            interval = 1.0 / (native_fps if native_fps > 0 else 30.0) if self.realtime else 0.0
+            next_time = time.perf_counter()
+            # Seau à jetons : au plus max_fps images par seconde, une image d'avance au maximum
+            tokens, last = 1.0, time.perf_counter()
+            while not self._stop_event.is_set():
+                if self.max_frames is not None and self.captured >= self.max_frames:
+                    break
+                if interval:
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_time += interval
+                success, frame, slot = self._read(cap)
+                if not success:
+                    break
+                now = time.perf_counter()
+                self.captured += 1
+                if self.max_fps:
+                    tokens = min(1.5, tokens + (now - last) * self.max_fps)
+                    last = now
+                    # Tolérance : la gigue de capture ne doit pas faire sauter une image sur deux
+                    if tokens < 0.9:
+                        self.throttled += 1
+                        if slot is not None:
+                            self.ring.release(slot)
+                        continue
+                    tokens -= 1.0
+                if slot is None:
+                    packet = FramePacket(self.captured - 1, now, frame)
+                else:
+                    packet = RingPacket(self.captured - 1, now, frame, slot, self.ring.publish(slot))
+                if self.queue.put(packet):
+                    wake()
+        except Exception as exc:  # Remonter l'erreur au serveur
+            self.error = exc
+        finally:
+            cap.release()
+            self.queue.close()
+            self.finished = True
+            wake()
+
+    def summary(self, elapsed=None):
+        """
+        Args:
+            elapsed: Durée de fonctionnement du serveur en secondes (pour le débit moyen)
+
+        Returns:
+            Dict: Compteurs, débit (img/s) et latences en millisecondes
+        """
+        stats = self.profiler.summary()
+        stages = stats['stages']
+        latency = stages.get(LATENCY_STAGE, {})
+        return {
+            'captured': self.captured,
+            'throttled': self.throttled,
+            'dropped': self.dropped,
+            'processed': self.processed,
+            'shared': self.shared,
+            'fps': self.processed / elapsed if elapsed else stats['fps'],
+            'recent_fps': stats['fps'],
+            'latency_p50_ms': latency.get('p50_ms'),
+            'latency_p95_ms': latency.get('p95_ms'),
+            'latency_p99_ms': latency.get('p99_ms'),
+            'queue_mean_ms': stages.get(QUEUE_STAGE, {}).get('mean_ms'),
+            'inference_mean_ms': stages.get('total', {}).get('mean_ms'),
+        }
+
+
+def _worker_main(worker_id, tasks, results, mode, mirror, static_image_mode):
+    """
+    Processus d'inférence : exécute les détecteurs et les règles sur les images reçues
+    """
+    # Un seul thread OpenCV par processus pour éviter la surcharge des cœurs
+    cv2.setNumThreads(1)
+    analyzers = {}  # Source -> FrameAnalyzer (détecteurs propres à chaque source)
+    rings = {}  # Nom du bloc partagé -> FrameRing ouvert dans ce processus
+    try:
+        from batch import FrameAnalyzer
+        from detectors import mediapipe_solutions
+        mediapipe_solutions()  # Import coûteux payé avant de se déclarer prêt
+        results.put(('ready', worker_id))
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            source_index, name, frame_id, capture_time, frame = task
+            start = time.perf_counter()
+            ring = None
+            if isinstance(frame, tuple):
+                # (bloc partagé, emplacement, séquence) : l'image est lue sur place dans le FrameRing
+                ring_name, slot, sequence = frame
+                ring = rings.get(ring_name)
+                if ring is None:
+                    ring = rings[ring_name] = FrameRing.attach(ring_name)
+                if not ring.is_current(slot, sequence):
+                    raise RuntimeError(f"Emplacement {slot} de {name} réutilisé avant sa lecture")
+                frame = ring.frame(slot)
+            analyzer = analyzers.get(source_index)
+            if analyzer is None:
+                analyzer = analyzers[source_index] = FrameAnalyzer(mode, mirror, static_image_mode)
+            record = analyzer.analyze([(name, frame_id, None, frame)])[0]
+            if ring is not None:
+                if not ring.is_current(slot, sequence):
+                    raise RuntimeError(f"Emplacement {slot} de {name} réutilisé pendant sa lecture")
+                del frame
+                ring.release(slot)
+            results.put(('result', worker_id, source_index, capture_time, start, record, analyzer.last_timings[0]))
+    except Exception:
+        results.put(('error', worker_id, traceback.format_exc()))
+    finally:
+        for analyzer in analyzers.values():
+            analyzer.close()
+        for ring in rings.values():
+            ring.close()
+
+
+class DetectionServer:
+    """
+    Répartit les images de plusieurs sources entre des processus d'inférence
+    """
+    def __init__(self, sources, workers=None, mode='both', mirror=True, static_image_mode=False,
+                 prefetch=2, on_result=None, transport='shared'):
+        """
+        Args:
+            sources: Liste de StreamSource
+            workers: Nombre de processus d'inférence (défaut: nombre de cœurs)
+            mode: 'face', 'hand', ou 'both'
+            mirror: True pour appliquer l'effet miroir de l'application avant la détection
+            static_image_mode: True pour des détecteurs sans suivi entre les images
+            prefetch: Images confiées à un processus en même temps (une en cours, les autres en attente)
+            on_result: Fonction appelée avec (StreamSource, résultat de l'image, latence en secondes)
+            transport: 'shared' (images dans un FrameRing par source) ou 'pickle' (images copiées)
+        """
+        if mode not in DETECTION_MODES:
+            raise ValueError(f"Mode de détection inconnu: {mode!r}")
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Transport inconnu: {transport!r}")
+        names = [source.name for source in sources]
+        if not sources or len(set(names)) != len(names):
+            raise ValueError("Il faut au moins une source, avec des noms distincts")
+        self.sources = sources
+        self.worker_count = workers or os.cpu_count() or 1
+        self.mode = mode
+        self.mirror = mirror
+        self.static_image_mode = static_image_mode
+        self.prefetch = prefetch
+        self.on_result = on_result
+        self.transport = transport
+        self.error = None  # Première erreur d'une source ou d'un processus d'inférence
+
+        self._cond = threading.Condition()  # Réveille le répartiteur (image capturée, résultat reçu)
+        self._stopping = False
+        self._next_source = 0  # Tour de rôle entre les sources
+        self._workers = []
+        self._results = None
+        self._collector = None
+        self._ready = threading.Semaphore(0)
+        self._start_time = None
+        self._end_time = None
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify()
+
+    def start(self, timeout=60.0):
+        """
+        Démarre les processus d'inférence, attend qu'ils soient prêts, puis démarre les captures
+        """
+        # 'spawn' : chaque processus démarre sans état MediaPipe hérité (comportement identique sous Windows)
+        context = multiprocessing.get_context('spawn')
+        self._results = context.Queue()
+        for worker_id in range(self.worker_count):
+            tasks = context.Queue()
+            process = context.Process(
+                target=_worker_main, name=f"inference-{worker_id}", daemon=True,
+                args=(worker_id, tasks, self._results, self.mode, self.mirror, self.static_image_mode))
+            process.start()
+            self._workers.append({'process': process, 'tasks': tasks, 'in_flight': 0,
+                                  'processed': 0, 'last_source': None})
+        self._collector = threading.Thread(target=self._collect_loop, name="collect", daemon=True)
+        self._collector.start()
+        for _ in self._workers:
+            if not self._ready.acquire(timeout=timeout) or self.error:
+                self.stop()
+                raise RuntimeError(f"Processus d'inférence non démarré: {self.error or 'délai dépassé'}")
+
+        self._start_time = time.perf_counter()
+        for source in self.sources:
+            # Assez d'emplacements pour la file, les images confiées aux processus et la capture en cours
+            ring_slots = source.queue.maxsize + self.worker_count * self.prefetch + 1
+            source.start(self._wake, ring_slots if self.transport == 'shared' else 0)
+
+    def _collect_loop(self):
+        """
+        Reçoit les résultats des processus d'inférence et met à jour les statistiques
+        """
+        while True:
+            message = self._results.get()
+            if message is None:
+                break
+            kind, worker_id = message[0], message[1]
+            if kind == 'ready':
+                self._ready.release()
+                continue
+            if kind == 'error':
+                with self._cond:
+                    self.error = self.error or RuntimeError(f"Processus d'inférence {worker_id}:\n{message[2]}")
+                    self._stopping = True
+                    self._cond.notify()
+                self._ready.release()
+                continue
+            _, _, source_index, capture_time, start, record, timings = message
+            now = time.perf_counter()
+            source = self.sources[source_index]
+            latency = now - capture_time
+            timings[QUEUE_STAGE] = start - capture_time
+            timings[LATENCY_STAGE] = latency
+            source.profiler.record(timings, now)
+            source.processed += 1
+            if self.on_result is not None:
+                self.on_result(source, record, latency)
+            with self._cond:
+                worker = self._workers[worker_id]
+                worker['in_flight'] -= 1
+                worker['processed'] += 1
+                self._cond.notify()
+
+    def _dispatch(self):
+        """
+        Confie des images aux processus libres, une source après l'autre (appelé sous _cond)
+
+        Returns:
+            Bool: True si au moins une image a été confiée
+        """
+        sent = False
+        count = len(self.sources)
+        while True:
+            free = [worker for worker in self._workers if worker['in_flight'] < self.prefetch]
+            if not free:
+                return sent
+            # Prochaine source (dans l'ordre du tour) ayant une image en attente
+            for offset in range(count):
+                index = (self._next_source + offset) % count
+                packet = self.sources[index].queue.get_nowait()
+                if packet is not None:
+                    break
+            else:
+                return sent
+            self._next_source = (index + 1) % count
+            # Préférer le processus qui a traité l'image précédente de la source (suivi MediaPipe)
+            worker = next((w for w in free if w['last_source'] == index),
+                          min(free, key=lambda w: w['in_flight']))
+            worker['in_flight'] += 1
+            worker['last_source'] = index
+            source = self.sources[index]
+            if isinstance(packet, RingPacket):
+                frame = (source.ring.name, packet.slot, packet.sequence)
+                source.shared += 1
+            else:
+                frame = packet.frame
+            worker['tasks'].put((index, source.name, packet.frame_id, packet.capture_time, frame))
+            sent = True
+
+    def _finished(self):
+        """
+        Toutes les sources sont terminées, leurs files vides et aucun résultat n'est attendu
+        """
+        return (all(source.finished and not len(source.queue) for source in self.sources)
+                and not any(worker['in_flight'] for worker in self._workers))
+
+    def run(self, duration=None, report=None, report_interval=5.0):
+        """
+        Répartit les images jusqu'à la fin de toutes les sources (ou jusqu'à duration secondes)
+
+        Args:
+            duration: Durée maximale en secondes (None = jusqu'à la fin des sources)
+            report: Fonction appelée avec summary() toutes les report_interval secondes
+            report_interval: Intervalle entre deux rapports en secondes
+
+        Returns:
+            Dict: Statistiques finales (voir summary())
+        """
+        if self._start_time is None:
+            self.start()
+        deadline = self._start_time + duration if duration else None
+        next_report = time.perf_counter() + report_interval
+        try:
+            with self._cond:
+                while not self._stopping:
+                    self._dispatch()
+                    if self._finished():
+                        break
+                    if any(not worker['process'].is_alive() for worker in self._workers):
+                        self.error = self.error or RuntimeError("Un processus d'inférence s'est arrêté")
+                        break
+                    now = time.perf_counter()
+                    if deadline is not None and now >= deadline:
+                        break
+                    if report is not None and now >= next_report:
+                        report(self.summary())
+                        next_report = now + report_interval
+                    self._cond.wait(0.1)
+        finally:
+            self.stop()
+        errors = [source.error for source in self.sources if source.error]
+        if self.error or errors:
+            raise self.error or errors[0]
+        return self.summary()
+
+    def stop(self):
+        """
+        Arrête les captures et les processus d'inférence
+        """
+        with self._cond:
+            self._stopping = True
+        for source in self.sources:
+            source.stop()
+        if self._end_time is None and self._start_time is not None:
+            self._end_time = time.perf_counter()
+        for worker in self._workers:
+            worker['tasks'].put(None)
+        for worker in self._workers:
+            worker['process'].join(timeout=10)
+            if worker['process'].is_alive():
+                worker['process'].terminate()
+        for source in self.sources:
+            source.close_ring()
+        if self._collector is not None:
+            self._results.put(None)
+            self._collector.join()
+            self._collector = None
+
+    def summary(self):
+        """
+        Returns:
+            Dict: Durée, images traitées par processus et statistiques de chaque source
+        """
+        end = self._end_time or time.perf_counter()
+        elapsed = end - self._start_time if self._start_time is not None else 0.0
+        sources = {source.name: source.summary(elapsed) for source in self.sources}
+        return {
+            'elapsed_s': elapsed,
+            'workers': [worker['processed'] for worker in self._workers],
+            'fps': sum(stats['processed'] for stats in sources.values()) / elapsed if elapsed else 0.0,
+            'sources': sources,
+        }
+
+
+def parse_source(spec, index, defaults):
+    """
+    Lit une source de la ligne de commande : [nom=]source[,fps=N][,drop=politique][,queue=N]
+
+    Args:
+        spec: Texte de la source
+        index: Position de la source (nom par défaut)
+        defaults: Options communes à toutes les sources
+
+    Returns:
+        StreamSource
+    """
+    source, *options = spec.split(',')
+    name, separator, value = source.partition('=')
+    name, source = (name, value) if separator else (f"source{index}", source)
+    settings = dict(defaults)
+    for option in options:
+        key, _, value = option.partition('=')
+        if key == 'fps':
+            settings['max_fps'] = float(value)
+        elif key == 'drop':
+            settings['drop'] = value
+        elif key == 'queue':
+            settings['queue_size'] = int(value)
+        else:
+            raise ValueError(f"Option de source inconnue: {option!r} (fps, drop ou queue)")
+    return StreamSource(name, source, **settings)
+
+
+def print_summary(summary, stream):
+    """
+    Affiche un tableau des statistiques par source
+    """
+    print(f"{summary['elapsed_s']:.1f} s, {summary['fps']:.1f} img/s au total, "
+          f"images par processus : {summary['workers']}", file=stream)
+    print(f"{'source':<12} {'lues':>7} {'plaf.':>6} {'jetées':>7} {'traitées':>8} {'img/s':>6} "
+          f"{'p50':>7} {'p95':>7} {'p99':>7}  (latence ms)", file=stream)
+    for name, stats in summary['sources'].items():
+        latencies = [stats[key] for key in ('latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms')]
+        latencies = ' '.join(f"{value:7.1f}" if value is not None else f"{'-':>7}" for value in latencies)
+        print(f"{name:<12} {stats['captured']:7d} {stats['throttled']:6d} {stats['dropped']:7d} "
+              f"{stats['processed']:8d} {stats['fps']:6.1f} {latencies}", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur de détection sur plusieurs caméras ou vidéos")
+    parser.add_argument('sources', nargs='+',
+                        help="Sources : [nom=]caméra|fichier|URL[,fps=N][,drop=oldest|newest|block][,queue=N]")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Nombre de processus d'inférence (défaut: nombre de cœurs)")
+    parser.add_argument('--mode', choices=DETECTION_MODES, default='both', help="Mode de détection")
+    parser.add_argument('--max-fps', type=float, help="Cadence maximale par source (défaut: aucune)")
+    parser.add_argument('--drop', choices=DROP_POLICIES, default='oldest',
+                        help="Image jetée quand la file d'une source est pleine (défaut: oldest)")
+    parser.add_argument('--queue-size', type=int, default=2, help="Images en attente par source (défaut: 2)")
+    parser.add_argument('--realtime', action='store_true', help="Lire les fichiers à leur cadence, comme des caméras")
+    parser.add_argument('--loop', action='store_true', help="Relire les fichiers sans fin")
+    parser.add_argument('--duration', type=float, help="Durée maximale en secondes")
+    parser.add_argument('--no-mirror', action='store_true', help="Ne pas appliquer l'effet miroir avant la détection")
+    parser.add_argument('--transport', choices=TRANSPORTS, default='shared',
+                        help="Transmission des images aux processus : mémoire partagée ou copie (défaut: shared)")
+    parser.add_argument('-o', '--output', help="Écrire le résultat de chaque image au format JSONL")
+    parser.add_argument('--report-interval', type=float, default=5.0,
+                        help="Intervalle entre deux tableaux de statistiques en secondes (défaut: 5)")
+    parser.add_argument('--json', action='store_true', help="Afficher le résumé final au format JSON")
+    args = parser.parse_args(argv)
+
+    defaults = {'max_fps': args.max_fps, 'drop': args.drop, 'queue_size': args.queue_size,
+                'realtime': args.realtime, 'loop': args.loop}
+    sources = [parse_source(spec, index, defaults) for index, spec in enumerate(args.sources)]
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+
+    def write_result(source, record, latency):
+        output.write(json.dumps(dict(record, latency_ms=1000 * latency), ensure_ascii=False) + "\n")
+
+    server = DetectionServer(sources, args.workers, args.mode, mirror=not args.no_mirror,
+                             on_result=write_result if output else None, transport=args.transport)
+    try:
+        summary = server.run(args.duration, lambda stats: print_summary(stats, sys.stderr), args.report_interval)
+    except KeyboardInterrupt:
+        summary = server.summary()
+    finally:
+        if output is not None:
+            output.close()
+    if args.json:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    else:
+        print_summary(summary, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Relecture d'enregistrements synthétiques par la classification incrémentale :
+évaluations économisées sur des poses immobiles, et étiquettes stables pour
+une pose qui oscille autour d'un seuil des règles.
+
+Utilisation :
+    python -m pytest tests/
+"""
+import os  # Pour localiser les modules de l'application
+import sys  # Pour modifier le chemin d'import
+
+import numpy as np  # Pour les points synthétiques
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classification import EXPRESSION_SMILE, FACE_LANDMARK_COUNT, HAND_LANDMARK_COUNT  # noqa: E402
+from detectors import Detections  # noqa: E402
+from incremental import evaluate, face_classifier  # noqa: E402
+from recording import LandmarkRecorder, Recording  # noqa: E402
+
+FRAME_SHAPE = (480, 640, 3)
+FRAMES = 60
+
+
+def make_face(mouth_height):
+    """
+    Visage neutre (sourcils au repos, coins de la bouche relevés) dont seule
+    l'ouverture de la bouche varie
+
+    Args:
+        mouth_height: Hauteur de la bouche en pixels (largeur de 64 pixels : sourire au-delà de 12,8)
+
+    Returns:
+        np.ndarray: Tableau (1, 468, 3)
+    """
+    h, w = FRAME_SHAPE[:2]
+    face = np.full((1, FACE_LANDMARK_COUNT, 3), 0.5, dtype=np.float32)
+    face[0, [8, 168], 1] = 200 / h  # Entre les yeux
+    face[0, [66, 296], 1] = 195 / h  # Sourcils (ni levés ni froncés)
+    face[0, 78, 0], face[0, 308, 0] = 352 / w, 288 / w  # Largeur de la bouche
+    face[0, [61, 291], 1] = 240 / h  # Coins de la bouche
+    face[0, 13, 1] = 240 / h  # Lèvre supérieure
+    face[0, 14, 1] = (240 + mouth_height + 0.5) / h  # Lèvre inférieure
+    return face
+
+
+def write_recording(path, faces, hands=None):
+    """
+    Enregistre une image par visage (et une main droite immobile si hands est fourni)
+    """
+    with LandmarkRecorder(path, dtype='float32') as recorder:
+        for i, face in enumerate(faces):
+            if hands is None:
+                detections = Detections(faces=face, hands=np.empty((0, HAND_LANDMARK_COUNT, 3), dtype=np.float32))
+            else:
+                detections = Detections(faces=face, hands=hands, handedness=["Right"])
+            recorder.append(detections, FRAME_SHAPE, timestamp=i / 30)
+    return Recording(path)
+
+
+def test_static_poses_skip_evaluations(tmp_path):
+    hand = np.random.default_rng(0).uniform(0.3, 0.7, (1, HAND_LANDMARK_COUNT, 3)).astype(np.float32)
+    recording = write_recording(str(tmp_path), [make_face(20)] * FRAMES, hand)
+
+    stats = evaluate(recording)
+
+    assert stats['frames'] == FRAMES
+    assert stats['items'] == 2 * FRAMES
+    assert stats['evaluations'] == 2  # Une évaluation par piste, à sa première image
+    assert stats['saved_ratio'] > 0
+    assert stats['stable_changes'] <= 1  # Seulement l'adoption de l'étiquette
+
+
+def test_jitter_around_threshold_keeps_stable_label(tmp_path):
+    # La bouche oscille entre 12 et 14 pixels : le sourire apparaît et disparaît à chaque image
+    faces = [make_face(14 if i % 2 else 12) for i in range(FRAMES)]
+    recording = write_recording(str(tmp_path), faces)
+
+    stats = evaluate(recording)
+
+    assert stats['raw_changes'] >= FRAMES - 2
+    assert stats['stable_changes'] < stats['raw_changes']
+    assert stats['stable_changes'] <= 1
+
+    classifier = face_classifier()
+    sizes = np.array([FRAME_SHAPE[:2]])
+    labels = [classifier.update(face, sizes)[0][0] for face in faces]
+    assert labels[-1] == EXPRESSION_SMILE
+    assert len(set(labels[len(labels) // 2:])) == 1  # Plus aucun clignotement une fois l'étiquette adoptée